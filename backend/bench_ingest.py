@@ -0,0 +1,138 @@
+# bench_ingest.py
+"""
+Parse time and memory of read_* nodes under each ingestion mode
+(`ingest: numpy` vs `ingest: arrow`, see normalize_read_params in main).
+
+    python bench_ingest.py uploads/sales.csv uploads/events.tsv
+    python bench_ingest.py --generate 1000000          # synthetic string-heavy CSV
+    python bench_ingest.py --function read_table data.tsv --repeat 5
+
+Every (file, mode) pair runs in a fresh interpreter, so peak RSS is that
+read's alone; the time is the best of --repeat reads.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ("numpy", "arrow")
+
+
+def _peak_rss(reset: bool = False) -> int:
+    """High-water RSS in bytes; on Linux the mark is reset so imports don't mask the read."""
+    try:
+        if reset:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+
+
+def _child(path: str, mode: str, func_name: str, repeat: int):
+    import main
+    from node_cache import result_nbytes
+
+    node_def = {"function": func_name, "params": {"filepath_or_buffer": path}, "ingest": mode}
+    base = _peak_rss(reset=True)
+    best = None
+    df = None
+    for _ in range(max(1, repeat)):
+        df = None
+        t0 = time.perf_counter()
+        df = main.execute_node("bench", node_def, {})
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    peak = _peak_rss()
+    fallbacks = sum(v for _, _, v in main.READ_INGEST_FALLBACKS.samples())
+    print(json.dumps({
+        "seconds": best,
+        "peak_rss_delta_bytes": peak - base,
+        "frame_bytes": result_nbytes(df),
+        "rows": len(df),
+        "cols": df.shape[1],
+        "fell_back": fallbacks > 0,
+    }))
+
+
+def _generate(rows: int) -> str:
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(7)
+    words = np.array(["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"])
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "customer": np.char.add("customer-", rng.integers(0, 50_000, rows).astype(str)),
+        "city": rng.choice(["Chennai", "Madurai", "Coimbatore", "Salem", "Tiruchirappalli"], rows),
+        "email": np.char.add(rng.choice(words, rows), "@example.com"),
+        "status": rng.choice(["new", "paid", "shipped", "returned", None], rows),
+        "amount": np.round(rng.random(rows) * 1000, 2),
+        "quantity": rng.integers(1, 20, rows),
+        "note": np.char.add(np.char.add(rng.choice(words, rows), " "), rng.choice(words, rows)),
+    })
+    fd, path = tempfile.mkstemp(prefix="bench-ingest-", suffix=".csv")
+    os.close(fd)
+    df.to_csv(path, index=False)
+    return path
+
+
+def _run(path: str, mode: str, func_name: str, repeat: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, "--function", func_name,
+         "--repeat", str(repeat), path],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if out.returncode != 0:
+        return {"error": (out.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main_cli():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("--function", default="read_csv")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--generate", type=int, metavar="ROWS")
+    ap.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        _child(args.files[0], args.child, args.function, args.repeat)
+        return
+    files = [os.path.abspath(f) for f in args.files]
+    generated = _generate(args.generate) if args.generate else None
+    if generated:
+        files.append(generated)
+    if not files:
+        ap.error("give sample files or --generate ROWS")
+
+    mb = lambda n: f"{n / 2**20:9.1f}"
+    print(f"{'file':32} {'size MB':>9} {'mode':6} {'parse s':>8} {'peak RSS MB':>12} {'frame MB':>9}  note")
+    try:
+        for path in files:
+            size = os.path.getsize(path)
+            for mode in MODES:
+                r = _run(path, mode, args.function, args.repeat)
+                name = os.path.basename(path)[-32:]
+                if "error" in r:
+                    print(f"{name:32} {mb(size)} {mode:6} {'-':>8} {'-':>12} {'-':>9}  {r['error']}")
+                    continue
+                note = "fell back to the C parser" if r["fell_back"] else ""
+                print(f"{name:32} {mb(size)} {mode:6} {r['seconds']:8.3f} {mb(r['peak_rss_delta_bytes']):>12} "
+                      f"{mb(r['frame_bytes'])}  {note}")
+    finally:
+        if generated:
+            os.unlink(generated)
+
+
+if __name__ == "__main__":
+    main_cli()
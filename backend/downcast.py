@@ -0,0 +1,196 @@
+# downcast.py
+"""
+Column-by-column dtype optimization for read_* results (`optimize:` on a
+read node, or PIPELINE_READ_OPTIMIZE for every read).
+
+- integers: the smallest width (same signedness) holding the column's range;
+- floats: float32 where every value survives the round trip, or always with
+  `float32: true` (reduced precision, opt-in);
+- strings: `category` when the distinct values are at most `category_ratio`
+  of the rows, except `key_columns`;
+- float columns at least `sparse_ratio` missing: sparse.
+
+Narrow integers wrap on overflow in later arithmetic. Categorical keys would
+change results (groupby lists unobserved categories as empty groups, merges
+and pivots follow suit) and unordered ones reject <, <=, > and >=, so the
+planner passes the columns other nodes group, merge, pivot or sort on, or
+that a query orders, as `key_columns` and those stay text.
+"""
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from node_cache import result_nbytes
+
+try:
+    import pyarrow as pa
+except Exception:  # optional: Arrow-backed columns are then left alone
+    pa = None
+
+_OFF = (None, False, "", "false", "off", "none", "no", "0")
+_ON = (True, "true", "on", "yes", "1")
+_INT_WIDTHS = (8, 16, 32)
+
+
+_FIELDS = ("float32", "category_ratio", "sparse_ratio")
+
+
+class Options:
+    __slots__ = _FIELDS + ("key_columns",)
+
+    def __init__(self, float32: bool = False, category_ratio: float = 0.5, sparse_ratio: float = 0.9,
+                 key_columns: FrozenSet[str] = frozenset()):
+        self.float32 = float32
+        self.category_ratio = category_ratio
+        self.sparse_ratio = sparse_ratio
+        self.key_columns = key_columns
+
+    def with_key_columns(self, names: Iterable[Any]) -> "Options":
+        return Options(self.float32, self.category_ratio, self.sparse_ratio, frozenset(map(str, names)))
+
+    def __repr__(self) -> str:
+        return (f"Options(float32={self.float32}, category_ratio={self.category_ratio}, "
+                f"sparse_ratio={self.sparse_ratio}, key_columns={sorted(self.key_columns)})")
+
+
+def parse_options(value: Any) -> Optional[Options]:
+    """
+    `optimize:` as written in YAML: off (false/none), on (true), "float32"
+    (on, with reduced precision) or a mapping of Options fields.
+    """
+    if isinstance(value, str):
+        value = value.strip().lower()
+    if value in _OFF:
+        return None
+    if value in _ON:
+        return Options()
+    if value == "float32":
+        return Options(float32=True)
+    if not isinstance(value, dict):
+        raise ValueError(f"optimize must be true, false, 'float32' or a mapping, got {value!r}")
+    unknown = sorted(set(value) - set(_FIELDS))
+    if unknown:
+        raise ValueError(f"optimize: unknown option(s) {', '.join(map(str, unknown))}")
+    opts = Options(float32=value.get("float32", False) in _ON)
+    for name in ("category_ratio", "sparse_ratio"):
+        if name in value:
+            ratio = value[name]
+            if isinstance(ratio, bool) or not isinstance(ratio, (int, float)) or not 0 <= ratio <= 1:
+                raise ValueError(f"optimize: {name} must be a number between 0 and 1, got {ratio!r}")
+            setattr(opts, name, float(ratio))
+    return opts
+
+
+# ---------------- per-column rules ----------------
+
+def _family(dtype: Any) -> str:
+    if isinstance(dtype, pd.ArrowDtype):
+        return "arrow"
+    # Nullable Int*/Float* carry their numpy counterpart
+    return "masked" if isinstance(dtype, pd.api.extensions.ExtensionDtype) else "numpy"
+
+
+def _int_dtype(family: str, signed: bool, bits: int) -> Any:
+    name = f"{'' if signed else 'u'}int{bits}"
+    if family == "arrow":
+        return pd.ArrowDtype(getattr(pa, name)())
+    if family == "masked":
+        return pd.api.types.pandas_dtype(name.capitalize() if signed else "UInt" + str(bits))
+    return np.dtype(name)
+
+
+def _float32(family: str) -> Any:
+    if family == "arrow":
+        return pd.ArrowDtype(pa.float32())
+    return pd.Float32Dtype() if family == "masked" else np.dtype("float32")
+
+
+def _numeric_kind(s: pd.Series) -> Tuple[Optional[str], int]:
+    dtype = s.dtype
+    if isinstance(dtype, pd.ArrowDtype):
+        t = dtype.pyarrow_dtype
+        if pa.types.is_integer(t):
+            return ("i" if pa.types.is_signed_integer(t) else "u"), t.bit_width
+        if pa.types.is_floating(t):
+            return "f", t.bit_width
+        return None, 0
+    if isinstance(dtype, pd.SparseDtype) or pd.api.types.is_bool_dtype(dtype):
+        return None, 0
+    np_dtype = getattr(dtype, "numpy_dtype", dtype)
+    if isinstance(np_dtype, np.dtype) and np_dtype.kind in "iuf":
+        return np_dtype.kind, np_dtype.itemsize * 8
+    return None, 0
+
+
+def _downcast_int(s: pd.Series, family: str, kind: str, bits: int) -> Optional[Any]:
+    if s.count() == 0:
+        return None
+    lo, hi = s.min(), s.max()
+    for width in _INT_WIDTHS:
+        if width >= bits:
+            return None
+        info = np.iinfo(f"{'u' if kind == 'u' else ''}int{width}")
+        if info.min <= lo and hi <= info.max:
+            return _int_dtype(family, kind == "i", width)
+    return None
+
+
+def _downcast_float(s: pd.Series, family: str, bits: int, opts: Options) -> Optional[Any]:
+    if bits <= 32:
+        return None
+    if not opts.float32:
+        values = s.to_numpy(dtype="float64", na_value=np.nan)
+        if not np.array_equal(values.astype("float32").astype("float64"), values, equal_nan=True):
+            return None  # float32 would round some value
+    return _float32(family)
+
+
+def _is_text(s: pd.Series) -> bool:
+    dtype = s.dtype
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+    if isinstance(dtype, pd.StringDtype):
+        return True
+    return dtype == object and pd.api.types.infer_dtype(s, skipna=True) == "string"
+
+
+def _optimize_column(s: pd.Series, opts: Options, is_key: bool = False) -> Optional[pd.Series]:
+    """The column with a smaller dtype, or None to keep it as is."""
+    kind, bits = _numeric_kind(s)
+    family = _family(s.dtype)
+    if kind is not None and (family != "arrow" or pa is not None):
+        target = _downcast_int(s, family, kind, bits) if kind in "iu" else _downcast_float(s, family, bits, opts)
+        out = s.astype(target) if target is not None else s
+        if kind == "f" and family == "numpy" and len(s) and s.isna().mean() >= opts.sparse_ratio:
+            out = out.astype(pd.SparseDtype(out.dtype, np.nan))
+        return out if out is not s else None
+    if not is_key and _is_text(s) and len(s):
+        distinct = s.nunique(dropna=True)
+        if distinct < len(s) and distinct <= opts.category_ratio * len(s):
+            return s.astype("category")
+    return None
+
+
+def optimize_frame(df: Any, opts: Options) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """
+    (optimized frame, report). Anything but a DataFrame comes back unchanged
+    with no report; the input frame is never modified (reads may be shared).
+    """
+    if not isinstance(df, pd.DataFrame):
+        return df, None
+    before = result_nbytes(df)
+    out = None
+    changed: Dict[str, str] = {}
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        new = _optimize_column(col, opts, str(df.columns[i]) in opts.key_columns)
+        if new is None:
+            continue
+        if out is None:
+            out = df.copy(deep=False)
+        out.isetitem(i, new)
+        changed[str(df.columns[i])] = f"{col.dtype} -> {new.dtype}"
+    out = df if out is None else out
+    return out, {"bytes_before": before, "bytes_after": result_nbytes(out) if changed else before,
+                 "columns": changed}
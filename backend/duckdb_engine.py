@@ -0,0 +1,733 @@
+# duckdb_engine.py
+"""
+In-process DuckDB execution for relational pipeline subgraphs (`engine: duckdb`).
+
+Supported nodes don't compute when they run: they return a Relation, the
+SQL for their result written on top of their inputs' SQL. A chain of them
+becomes one query that DuckDB optimises and runs on all cores when the
+result is collected (a kept node, or one feeding a pandas node). pandas
+results a relation reads are handed over as Arrow tables.
+
+pandas semantics carried through the SQL:
+- row order: hidden ordinal columns, which every collect orders by
+- row labels: source row numbers / group keys come back as the index
+- missing values: comparisons are two-valued (NaN never equals, != keeps
+  it), join keys match NULL with NULL, groupby drops NULL keys
+- CSV types: columns are read as text and typed by read_csv's rules (see
+  Session._csv_columns), not by DuckDB's sniffer; header names are pandas'
+- sort ties: a single-key sort_values keeps ties in input order only with
+  kind=stable/mergesort; with pandas' default quicksort, ties fall back
+"""
+import ast
+import itertools
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import pushdown
+
+try:
+    import duckdb
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # optional: only needed for `engine: duckdb`
+    duckdb = None
+
+NAME = "duckdb"
+DUCKDB_THREADS = int(os.getenv("PIPELINE_DUCKDB_THREADS", "0"))  # 0: DuckDB's default
+DUCKDB_MEMORY_LIMIT = os.getenv("PIPELINE_DUCKDB_MEMORY_LIMIT", "")
+
+# pandas' default na_values, so CSV cells read as NULL exactly where read_csv gives NaN
+PANDAS_NA_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+                    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+
+_READ_OPTIONS = {
+    "read_csv": {"filepath_or_buffer", "sep", "delimiter", "usecols", "filters"},
+    "read_table": {"filepath_or_buffer", "sep", "delimiter", "usecols", "filters"},
+    "read_parquet": {"filepath_or_buffer", "columns", "filters"},
+}
+# read_csv (C parser) number and boolean spellings, matched against the raw CSV text
+PANDAS_INT = r"\s*[+-]?[0-9]+\s*"
+PANDAS_FLOAT = r"\s*[+-]?(([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?|(?i:inf|infinity))\s*"
+PANDAS_BOOLS = ("True", "TRUE", "true", "False", "FALSE", "false")
+STABLE_SORTS = ("stable", "mergesort")
+# Rows whose text decides a CSV column's candidate type (see Session._csv_columns)
+CSV_SAMPLE_ROWS = int(os.getenv("PIPELINE_DUCKDB_CSV_SAMPLE_ROWS", "20480"))
+_AGGS = {"sum", "mean", "min", "max", "count", "nunique", "median", "std", "var"}
+_NUMERIC_AGGS = {"sum", "mean", "median", "std", "var"}
+_SQL_COMPARE = {ast.Eq: "=", ast.NotEq: "<>", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
+# No division: DuckDB gives NULL for x/0 where pandas gives inf
+_SQL_ARITH = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*"}
+
+
+class Unsupported(Exception):
+    """The node, with these inputs, can't be written as SQL; it runs in pandas instead."""
+
+
+def available() -> bool:
+    return duckdb is not None
+
+
+def canonical(func_name: Optional[str]) -> str:
+    """`pandas.read_csv` -> `read_csv`, `pandas.core.groupby.DataFrameGroupBy.aggregate` -> `DataFrameGroupBy.agg`."""
+    name = func_name or ""
+    if name.startswith("pandas."):
+        name = name[len("pandas."):]
+    if "DataFrameGroupBy." in name:
+        name = "DataFrameGroupBy." + name.rsplit(".", 1)[-1]
+    if name == "DataFrameGroupBy.aggregate":
+        name = "DataFrameGroupBy.agg"
+    return "DataFrame.merge" if name == "merge" else name
+
+
+def restored_extension_columns(pandas_metadata: Dict[str, Any], columns: List[str]) -> List[str]:
+    """Parquet columns read_parquet gives back as the extension dtype they were written from (Int64, category)."""
+    out = []
+    for m in pandas_metadata.get("columns", []):
+        if m.get("name") not in columns:
+            continue
+        try:
+            numpy = m.get("pandas_type") != "categorical" and isinstance(np.dtype(m.get("numpy_type")), np.dtype)
+        except TypeError:
+            numpy = False
+        if not numpy:
+            out.append(m["name"])
+    return out
+
+
+def _q(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _lit(value: Any) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)) and np.isfinite(value):
+        return repr(value)
+    raise Unsupported(f"literal {value!r}")
+
+
+def _names(value: Any) -> Optional[List[str]]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+        return value
+    return None
+
+
+# ---------------- static capability ----------------
+
+def capability(node: Any) -> Optional[str]:
+    """None if the node can run in DuckDB, else why it runs in pandas."""
+    return shared_capability(node, lambda fn, params: f"{fn or 'this function'} has no SQL translation")
+
+
+def shared_capability(node: Any, otherwise: Callable[[str, Dict[str, Any]], Optional[str]]) -> Optional[str]:
+    """
+    The checks every lazy engine shares (reads, query, merge, groupby/agg,
+    sort, head, rename and column selection); any other function is left to
+    the engine's `otherwise(canonical name, params)`.
+    """
+    fn = canonical(node.func_name)
+    params = node.params
+    extra = lambda allowed: sorted(set(params) - set(allowed))
+
+    if fn in _READ_OPTIONS:
+        if extra(_READ_OPTIONS[fn]):
+            return f"{fn} options {extra(_READ_OPTIONS[fn])} aren't supported"
+        sep = params.get("sep", params.get("delimiter"))
+        if sep is not None and not (isinstance(sep, str) and len(sep) == 1):
+            return "only single-character separators are supported"
+        usecols = params.get("usecols")
+        if usecols is not None and not callable(usecols) and _names(usecols) is None:
+            return "usecols must be column names"
+        return None
+    if fn == "DataFrame.query":
+        if extra({"expr"}):
+            return f"query options {extra({'expr'})} aren't supported"
+        return None if pushdown.parse_query(params.get("expr")) is not None else "expression can't be parsed statically"
+    if fn == "DataFrame.merge":
+        if extra({"left", "right", "on", "left_on", "right_on", "how"}):
+            return f"merge options {extra({'left', 'right', 'on', 'left_on', 'right_on', 'how'})} aren't supported"
+        if params.get("how", "inner") not in ("inner", "left"):
+            return f"merge how={params.get('how')} isn't supported"
+        if (params.get("left_on") is None) != (params.get("right_on") is None):
+            return "left_on and right_on must be given together"
+        return None
+    if fn == "DataFrame.groupby":
+        if extra({"by", "as_index", "sort", "dropna"}):
+            return f"groupby options {extra({'by', 'as_index', 'sort', 'dropna'})} aren't supported"
+        if params.get("sort", True) is not True or params.get("dropna", True) is not True:
+            return "groupby supports the default sort=True, dropna=True only"
+        return None if _names(params.get("by")) else "groupby `by` must be column names"
+    if fn == "DataFrameGroupBy.agg":
+        func = params.get("func", params.get("arg"))
+        if extra({"func", "arg"}) or not isinstance(func, dict):
+            return "agg supports a {column: function} mapping only"
+        bad = [f for f in func.values() if f not in _AGGS]
+        return f"aggregations {bad} aren't supported" if bad else None
+    if fn.startswith("DataFrameGroupBy.") and fn.split(".")[-1] in _AGGS:
+        return f"{fn} options aren't supported" if params else None
+    if fn == "DataFrame.sort_values":
+        if extra({"by", "ascending", "na_position", "kind"}):
+            return f"sort_values options {extra({'by', 'ascending', 'na_position', 'kind'})} aren't supported"
+        return None if _names(params.get("by")) else "sort_values `by` must be column names"
+    if fn == "DataFrame.head":
+        n = params.get("n", 5)
+        return None if not extra({"n"}) and isinstance(n, int) and n >= 0 else "head needs a non-negative n"
+    if fn == "DataFrame.rename":
+        cols = params.get("columns")
+        if extra({"columns"}) or not isinstance(cols, dict):
+            return "rename supports a columns mapping only"
+        return None
+    if fn == "DataFrame.loc":
+        if node.rows != slice(None) or not isinstance(node.cols, list):
+            return "loc supports a column list with all rows only"
+        return None
+    if fn == "DataFrame.__getitem__":
+        return None if set(params) == {"key"} and isinstance(params["key"], list) and _names(params["key"]) \
+            else "[] supports a list of column names only"
+    if fn == "DataFrame.filter":
+        return None if set(params) == {"items"} and _names(params["items"]) else "filter supports items only"
+    return otherwise(fn, params)
+
+
+# ---------------- relations ----------------
+
+class Relation:
+    """
+    Lazy result: `sql` selects the visible `columns` plus hidden ordinal
+    (`order`) and index columns; `index` pairs hidden columns with level
+    names (empty: a fresh RangeIndex).
+    """
+
+    def __init__(self, sql: str, columns: List[str], order: List[str],
+                 index: List[Tuple[str, Any]]):
+        self.sql = sql
+        self.columns = columns
+        self.order = order
+        self.index = index
+        self.types: Optional[Dict[str, str]] = None
+        self.frame: Optional[pd.DataFrame] = None
+
+    def hidden(self) -> List[str]:
+        return list(dict.fromkeys(self.order + [c for c, _ in self.index]))
+
+    def derive(self, sql: str) -> "Relation":
+        return Relation(sql, list(self.columns), list(self.order), list(self.index))
+
+
+class Grouped:
+    """DataFrame.groupby over a relation; only an aggregation turns it back into rows."""
+
+    def __init__(self, rel: Relation, keys: List[str], as_index: bool):
+        self.rel = rel
+        self.keys = keys
+        self.as_index = as_index
+
+
+def is_lazy(value: Any) -> bool:
+    return isinstance(value, (Relation, Grouped))
+
+
+# ---------------- query expressions ----------------
+
+def _kind(sql_type: str) -> str:
+    return "text" if _is_text(sql_type) else "number" if _is_numeric(sql_type) else sql_type.upper()
+
+
+def _operand(node: ast.AST, types: Dict[str, str]) -> Tuple[str, str]:
+    """(SQL, kind) for a query operand; kinds keep DuckDB from casting where pandas would raise."""
+    if isinstance(node, ast.Name):
+        if node.id not in types:
+            raise Unsupported(f"query name '{node.id}' is not a column")
+        return _q(node.id), _kind(types[node.id])
+    if isinstance(node, ast.Constant) and not isinstance(node.value, bool) and node.value is not None:
+        return _lit(node.value), "text" if isinstance(node.value, str) else "number"
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        sql, kind = _operand(node.operand, types)
+        if kind != "number":
+            raise Unsupported("negating a non-number")
+        return f"(-{sql})", kind
+    if isinstance(node, ast.BinOp) and type(node.op) in _SQL_ARITH:
+        (a, ka), (b, kb) = _operand(node.left, types), _operand(node.right, types)
+        if ka != "number" or kb != "number":
+            raise Unsupported("arithmetic on non-numbers")
+        return f"({a} {_SQL_ARITH[type(node.op)]} {b})", "number"
+    raise Unsupported(f"query operand {ast.dump(node)[:60]}")
+
+
+def _in_list(node: ast.AST, kind: str) -> str:
+    if not isinstance(node, (ast.List, ast.Tuple)) or not node.elts \
+            or not all(isinstance(e, ast.Constant) for e in node.elts):
+        raise Unsupported("`in` needs a list of literals")
+    if any(_kind("VARCHAR" if isinstance(e.value, str) else "DOUBLE") != kind for e in node.elts):
+        raise Unsupported("`in` list doesn't match the column type")
+    return "(" + ", ".join(_lit(e.value) if e.value is not None else _lit(None) for e in node.elts) + ")"
+
+
+def _predicate(node: ast.AST, types: Dict[str, str]) -> str:
+    """Two-valued SQL condition (never NULL), matching pandas' NaN handling."""
+    if isinstance(node, ast.BoolOp):
+        op = " AND " if isinstance(node.op, ast.And) else " OR "
+        return "(" + op.join(_predicate(v, types) for v in node.values) + ")"
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+        return f"(NOT {_predicate(node.operand, types)})"
+    if isinstance(node, ast.Compare):
+        terms, left = [], node.left
+        for op, right in zip(node.ops, node.comparators):
+            sql, kind = _operand(left, types)
+            if isinstance(op, (ast.In, ast.NotIn)) or isinstance(right, (ast.List, ast.Tuple)):
+                if not isinstance(op, (ast.In, ast.NotIn, ast.Eq, ast.NotEq)):
+                    raise Unsupported("ordering comparison with a list")
+                cond = f"COALESCE({sql} IN {_in_list(right, kind)}, FALSE)"
+                terms.append(f"(NOT {cond})" if isinstance(op, (ast.NotIn, ast.NotEq)) else cond)
+            elif type(op) in _SQL_COMPARE:
+                other, other_kind = _operand(right, types)
+                if kind != other_kind:
+                    raise Unsupported(f"comparing {kind} with {other_kind}")
+                # NaN compares False, except != which pandas makes True
+                default = "TRUE" if isinstance(op, ast.NotEq) else "FALSE"
+                terms.append(f"COALESCE({sql} {_SQL_COMPARE[type(op)]} {other}, {default})")
+            else:
+                raise Unsupported(f"query operator {type(op).__name__}")
+            left = right
+        return "(" + " AND ".join(terms) + ")"
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "isin" \
+            and len(node.args) == 1 and not node.keywords:
+        sql, kind = _operand(node.func.value, types)
+        return f"COALESCE({sql} IN {_in_list(node.args[0], kind)}, FALSE)"
+    raise Unsupported(f"query expression {ast.dump(node)[:60]}")
+
+
+# ---------------- session ----------------
+
+class Session:
+    """One run's DuckDB connection, registered frames and temp files."""
+
+    def __init__(self, tmp_dir: Path):
+        config = {}
+        if DUCKDB_THREADS > 0:
+            config["threads"] = DUCKDB_THREADS
+        if DUCKDB_MEMORY_LIMIT:
+            config["memory_limit"] = DUCKDB_MEMORY_LIMIT
+        self.con = duckdb.connect(config=config)
+        self.queries: Dict[str, str] = {}
+        self._tmp_dir = tmp_dir
+        self._tmp_files: List[str] = []
+        self._frames: List[Any] = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def fresh(self, kind: str) -> str:
+        return f"__td_{kind}{next(self._ids)}"
+
+    def temp_file(self, data: bytes, suffix: str) -> str:
+        path = self._tmp_dir / f"pipeline-{uuid.uuid4().hex}{suffix}"
+        path.write_bytes(data)
+        with self._lock:
+            self._tmp_files.append(str(path))
+        return str(path)
+
+    def _columns(self, sql: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self.con.execute(f"DESCRIBE {sql}").fetchall()
+        return {r[0]: r[1] for r in rows}
+
+    def types(self, rel: Relation) -> Dict[str, str]:
+        if rel.types is None:
+            rel.types = self._columns(rel.sql)
+        return rel.types
+
+    # -------- inputs --------
+
+    def read(self, fn: str, path: str, fmt: str, params: Dict[str, Any]) -> Relation:
+        rn = self.fresh("rn")
+        wanted = params.get("usecols", params.get("columns"))
+        keep = None if wanted is None else \
+            wanted if callable(wanted) else (lambda c, names=set(_names(wanted) or []): c in names)
+        if fmt == "csv":
+            sep = params.get("sep", params.get("delimiter")) or ("\t" if fn == "read_table" else ",")
+            try:
+                exprs, columns, source = self._csv_columns(path, sep, keep)
+            except duckdb.Error as e:
+                detail = (str(e).strip().splitlines() or [""])[0]
+                raise Unsupported(f"DuckDB can't read this CSV the way read_csv does: {detail}")
+            sql = f"SELECT {', '.join(exprs + [f'row_number() OVER () - 1 AS {rn}'])} FROM {source}"
+            return Relation(sql, columns, [rn], [(rn, None)])
+        meta = pq.read_schema(path).pandas_metadata or {}
+        index = meta.get("index_columns", [])
+        if index and not (isinstance(index[0], dict) and index[0].get("start") == 0 and index[0].get("step") == 1):
+            raise Unsupported("Parquet file stores its own index")
+        sql = (f"SELECT * EXCLUDE (file_row_number), file_row_number AS {rn} "
+               f"FROM read_parquet({_lit(path)}, file_row_number=true)")
+        types = self._columns(sql)
+        columns = [c for c in types if c != rn]
+        if keep is not None:
+            columns = [c for c in columns if keep(c)]
+        restored = restored_extension_columns(meta, columns)
+        if restored:
+            raise Unsupported(f"Parquet columns {restored} store pandas extension dtypes")
+        # pandas reads an integer column with gaps as float64, and it stays float downstream
+        ints = [c for c in columns if _is_numeric(types[c]) and not _is_float(types[c])]
+        if ints:
+            with self._lock:
+                gaps = self.con.execute(
+                    f"SELECT {', '.join(f'bool_or({_q(c)} IS NULL)' for c in ints)} FROM ({sql}) AS t").fetchone()
+            floats = {c for c, gap in zip(ints, gaps) if gap}
+        else:
+            floats = set()
+        exprs = [f"CAST({_q(c)} AS DOUBLE) AS {_q(c)}" if c in floats else _q(c) for c in columns]
+        sql = f"SELECT {', '.join(exprs + [rn])} FROM ({sql}) AS t"
+        return Relation(sql, columns, [rn], [(rn, None)])
+
+    def _csv_columns(self, path: str, sep: str,
+                     keep: Optional[Callable[[str], bool]]) -> Tuple[List[str], List[str], str]:
+        """
+        (select expressions, column names, source) for a CSV typed the way
+        read_csv types it, not the way DuckDB's sniffer would: whole numbers
+        are int64 (float64 with gaps), other numbers float64, True/False
+        spellings bool, all-missing columns float64, anything else text.
+
+        The first CSV_SAMPLE_ROWS rows are classified as text; one value
+        read_csv wouldn't parse settles a column as text. The rest are
+        checked over the whole file in one typed scan, where a later value
+        DuckDB can't parse as the sampled type (text after numbers, an
+        integer past int64) sends the read back to pandas. Left over: a
+        spelling only DuckDB takes as a number (1_000, 0x10 in an integer
+        column) appearing after the sample.
+        """
+        nulls = "[" + ", ".join(_lit(v) for v in PANDAS_NA_VALUES) + "]"
+        reader = (f"read_csv({_lit(path)}, delim={_lit(sep)}, header=true, quote='\"', escape='\"', "
+                  f"nullstr={nulls}, %s)")
+        text = reader % "all_varchar=true"
+        raw = list(self._columns(f"SELECT * FROM {text}"))
+        # pandas' own header parse: mangled duplicates (a.1) and "Unnamed: i" for blank names
+        names = [str(c) for c in pd.read_csv(path, sep=sep, nrows=0).columns]
+        if len(names) != len(raw):
+            raise Unsupported("the header doesn't line up with the data the way read_csv reads it")
+        pairs = [(r, n) for r, n in zip(raw, names) if keep is None or keep(n)]
+        if not pairs:
+            return [], [], text
+
+        with self._lock:
+            sample = self.con.execute(
+                f"SELECT {', '.join(_text_class(r) for r, _ in pairs)} "
+                f"FROM (SELECT * FROM {text} LIMIT {CSV_SAMPLE_ROWS}) AS t").fetchone()
+        scan_types, checks = {}, []
+        for (r, _), flags in zip(pairs, sample):
+            kind = _class_of(flags)
+            if kind in ("int", "float"):
+                scan_types[r] = "BIGINT" if kind == "int" else "DOUBLE"
+            if kind == "int":
+                checks.append((r, "count", f"count({_q(r)})"))
+            elif kind == "bool":
+                checks.append((r, "bool", f"bool_and({_q(r)} IN ({', '.join(_lit(b) for b in PANDAS_BOOLS)}))"))
+            elif kind == "missing":
+                checks.append((r, "class", f"{_text_class(r)}, count({_q(r)})"))
+        # Columns not in `types` would be sniffed; the only candidate left is text
+        source = reader % ("types={" + ", ".join(f"{_lit(r)}: {_lit(t)}" for r, t in scan_types.items())
+                           + "}, auto_type_candidates=['VARCHAR']") if scan_types else text
+        with self._lock:
+            stats = self.con.execute(f"SELECT count(*){''.join(', ' + sql for _, _, sql in checks)} "
+                                     f"FROM {source}").fetchone()
+        rows, values, final = stats[0], iter(stats[1:]), dict(scan_types)
+        for r, check, _ in checks:
+            if check == "count":
+                if next(values) < rows:
+                    final[r] = "DOUBLE"  # integers with gaps read as float64
+            elif check == "bool":
+                if next(values):
+                    final[r] = "BOOLEAN"
+            else:
+                flags, present = next(values), next(values)
+                kind = _class_of(flags)
+                if rows and not present:
+                    final[r] = "DOUBLE"
+                elif kind in ("int", "float"):
+                    final[r] = "BIGINT" if kind == "int" and present == rows else "DOUBLE"
+                elif kind == "bool":
+                    final[r] = "BOOLEAN"
+        exprs = [(f"CAST({_q(r)} AS {final[r]})" if r in final and final[r] != scan_types.get(r) else _q(r))
+                 + f" AS {_q(n)}" for r, n in pairs]
+        return exprs, [n for _, n in pairs], source
+
+    def relation(self, value: Any) -> Relation:
+        """A relation for an input: lazy results as they are, pandas frames registered via Arrow."""
+        if isinstance(value, Relation):
+            return value
+        if not isinstance(value, pd.DataFrame):
+            raise Unsupported(f"{type(value).__name__} input")
+        cols = list(value.columns)
+        if not all(isinstance(c, str) and not c.startswith("__td_") for c in cols) or len(set(cols)) != len(cols):
+            raise Unsupported("input has non-string or duplicate column labels")
+        if not all(isinstance(t, np.dtype) for t in value.dtypes):
+            # Int64, category, ArrowDtype, ... would come back as plain numpy columns
+            raise Unsupported("input has pandas extension dtypes")
+        pos = self.fresh("pos")
+        default_index = isinstance(value.index, pd.RangeIndex) and value.index.start == 0 and value.index.step == 1 \
+            and value.index.name is None
+        index = [(pos, None)] if default_index else [(self.fresh("idx"), n) for n in value.index.names]
+        try:
+            table = pa.Table.from_pandas(value, preserve_index=False)
+            for level, (col, _) in enumerate([] if default_index else index):
+                table = table.append_column(col, pa.array(value.index.get_level_values(level), from_pandas=True))
+            table = table.append_column(pos, pa.array(np.arange(len(value), dtype=np.int64)))
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            raise Unsupported(f"input can't be converted to Arrow: {e}")
+        name = self.fresh("frame")
+        with self._lock:
+            self.con.register(name, table)
+            self._frames.append(table)
+        return Relation(f"SELECT * FROM {name}", cols, [pos], index)
+
+    # -------- node translation --------
+
+    def apply(self, node: Any, env: Dict[str, Any]) -> Any:
+        """Relation (or Grouped) for a non-read node whose inputs are in `env`."""
+        fn = canonical(node.func_name)
+        params = node.params
+        recv = env.get(node.receiver) if isinstance(node.receiver, str) else None
+
+        if fn.startswith("DataFrameGroupBy."):
+            if not isinstance(recv, Grouped):
+                raise Unsupported("receiver is not a groupby over a relation")
+            return self._aggregate(recv, fn.split(".")[-1], params)
+        if fn == "DataFrame.merge" and recv is None:
+            recv = env.get(params.get("left")) if isinstance(params.get("left"), str) else None
+        if recv is None:
+            raise Unsupported("receiver is not a pipeline node")
+        rel = self.relation(recv)
+
+        if fn == "DataFrame.query":
+            tree = pushdown.parse_query(params.get("expr"))
+            types = self.types(rel)
+            where = _predicate(tree, {c: types[c] for c in rel.columns})
+            return rel.derive(f"SELECT * FROM ({rel.sql}) AS t WHERE {where}")
+        if fn == "DataFrame.loc":
+            return self._project(rel, [(c, c) for c in node.cols])
+        if fn == "DataFrame.__getitem__":
+            return self._project(rel, [(c, c) for c in params["key"]])
+        if fn == "DataFrame.filter":
+            return self._project(rel, [(c, c) for c in params["items"] if c in rel.columns])
+        if fn == "DataFrame.rename":
+            mapping = params["columns"]
+            return self._project(rel, [(c, mapping.get(c, c)) for c in rel.columns])
+        if fn == "DataFrame.merge":
+            right = env.get(params.get("right")) if isinstance(params.get("right"), str) else None
+            if right is None:
+                raise Unsupported("merge right is not a pipeline node")
+            return self._merge(rel, self.relation(right), params)
+        if fn == "DataFrame.groupby":
+            keys = _names(params.get("by"))
+            missing = [k for k in keys if k not in rel.columns]
+            if missing:
+                raise Unsupported(f"groupby keys {missing} are not columns")
+            return Grouped(rel, keys, params.get("as_index", True) is not False)
+        if fn == "DataFrame.sort_values":
+            return self._sort(rel, params)
+        if fn == "DataFrame.head":
+            order = ", ".join(_q(c) for c in rel.order)
+            return rel.derive(f"SELECT * FROM ({rel.sql}) AS t ORDER BY {order} LIMIT {int(params.get('n', 5))}")
+        raise Unsupported(f"{fn} has no SQL translation")
+
+    def _project(self, rel: Relation, pairs: List[Tuple[str, str]]) -> Relation:
+        missing = [s for s, _ in pairs if s not in rel.columns]
+        out = [d for _, d in pairs]
+        if missing or len(set(out)) != len(out):
+            raise Unsupported("columns are missing or would be duplicated")
+        exprs = [f"{_q(s)} AS {_q(d)}" for s, d in pairs] + [_q(h) for h in rel.hidden()]
+        return Relation(f"SELECT {', '.join(exprs)} FROM ({rel.sql}) AS t", out, list(rel.order), list(rel.index))
+
+    def _merge(self, left: Relation, right: Relation, params: Dict[str, Any]) -> Relation:
+        on = params.get("on")
+        if on is None and params.get("left_on") is None:
+            on = [c for c in left.columns if c in right.columns]
+        lo = _names(on if on is not None else params.get("left_on"))
+        ro = _names(on if on is not None else params.get("right_on"))
+        if not lo or not ro or len(lo) != len(ro):
+            raise Unsupported("merge keys must be column names")
+        if any(k not in left.columns for k in lo) or any(k not in right.columns for k in ro):
+            raise Unsupported("merge keys are not columns")
+        ltypes, rtypes = self.types(left), self.types(right)
+        if any(_is_text(ltypes[a]) != _is_text(rtypes[b]) for a, b in zip(lo, ro)):
+            raise Unsupported("merge keys mix text and numbers")
+
+        # pandas: a right key named like its left key is dropped; other clashes get _x/_y
+        dropped = {b for a, b in zip(lo, ro) if a == b}
+        right_cols = [c for c in right.columns if c not in dropped]
+        clash = set(left.columns) & set(right_cols)
+        out_left = [(c, f"{c}_x" if c in clash else c) for c in left.columns]
+        out_right = [(c, f"{c}_y" if c in clash else c) for c in right_cols]
+        names = [d for _, d in out_left + out_right]
+        if len(set(names)) != len(names):
+            raise Unsupported("merge would produce duplicate column names")
+
+        right_order = [(c, self.fresh("ord")) for c in right.order]
+        exprs = ([f"l.{_q(s)} AS {_q(d)}" for s, d in out_left] + [f"r.{_q(s)} AS {_q(d)}" for s, d in out_right]
+                 + [f"l.{_q(c)}" for c in left.order] + [f"r.{_q(s)} AS {_q(d)}" for s, d in right_order])
+        cond = " AND ".join(f"l.{_q(a)} IS NOT DISTINCT FROM r.{_q(b)}" for a, b in zip(lo, ro))
+        join = "LEFT JOIN" if params.get("how", "inner") == "left" else "JOIN"
+        sql = f"SELECT {', '.join(exprs)} FROM ({left.sql}) AS l {join} ({right.sql}) AS r ON {cond}"
+        # pandas order: left rows in order, each left row's matches in right order
+        return Relation(sql, names, list(left.order) + [d for _, d in right_order], [])
+
+    def _aggregate(self, grouped: Grouped, how: str, params: Dict[str, Any]) -> Relation:
+        rel, keys = grouped.rel, grouped.keys
+        types = self.types(rel)
+        if how == "agg":
+            func = params.get("func", params.get("arg"))
+            targets = list(func.items())
+        else:
+            targets = [(c, how) for c in rel.columns if c not in keys]
+        aggs = []
+        for col, fn in targets:
+            if col not in rel.columns or col in keys:
+                raise Unsupported(f"can't aggregate '{col}'")
+            aggs.append((col, _agg_sql(_q(col), fn, types[col])))
+
+        key_sql = ", ".join(_q(k) for k in keys)
+        not_null = " AND ".join(f"{_q(k)} IS NOT NULL" for k in keys)
+        order = self.fresh("ord")
+        if grouped.as_index:
+            index = [(self.fresh("idx"), k) for k in keys]
+            key_exprs = [f"{_q(k)} AS {_q(h)}" for h, k in index]
+            columns = [c for c, _ in aggs]
+        else:
+            index = []
+            key_exprs = [_q(k) for k in keys]
+            columns = keys + [c for c, _ in aggs]
+        exprs = key_exprs + [f"{sql} AS {_q(c)}" for c, sql in aggs] + [f"row_number() OVER (ORDER BY {key_sql}) AS {order}"]
+        sql = f"SELECT {', '.join(exprs)} FROM ({rel.sql}) AS t WHERE {not_null} GROUP BY {key_sql}"
+        return Relation(sql, columns, [order], index)
+
+    def _sort(self, rel: Relation, params: Dict[str, Any]) -> Relation:
+        by = _names(params["by"])
+        if any(c not in rel.columns for c in by):
+            raise Unsupported("sort_values keys are not columns")
+        asc = params.get("ascending", True)
+        asc = asc if isinstance(asc, list) else [asc] * len(by)
+        if len(asc) != len(by) or not all(isinstance(a, bool) for a in asc):
+            raise Unsupported("ascending must be booleans")
+        nulls = "NULLS FIRST" if params.get("na_position", "last") == "first" else "NULLS LAST"
+        if len(by) == 1 and params.get("kind") not in STABLE_SORTS:
+            # pandas sorts one key with an unstable quicksort: ties come out in no order SQL can reproduce
+            with self._lock:
+                ties = self.con.execute(
+                    f"SELECT count({_q(by[0])}) > count(DISTINCT {_q(by[0])}) FROM ({rel.sql}) AS t").fetchone()[0]
+            if ties:
+                raise Unsupported("single-key sort with ties needs kind: stable to match pandas")
+        # Ties keep their current order (a stable sort)
+        terms = [f"{_q(c)} {'ASC' if a else 'DESC'} {nulls}" for c, a in zip(by, asc)] + [_q(c) for c in rel.order]
+        order = self.fresh("ord")
+        sql = f"SELECT *, row_number() OVER (ORDER BY {', '.join(terms)}) AS {order} FROM ({rel.sql}) AS t"
+        return Relation(sql, list(rel.columns), [order], list(rel.index))
+
+    # -------- results --------
+
+    def collect(self, value: Any, node_id: Optional[str] = None) -> Any:
+        """pandas result for a lazy value (cached on it); anything else passes through."""
+        if isinstance(value, Grouped):
+            return self.collect(value.rel).groupby(value.keys, as_index=value.as_index)
+        if not isinstance(value, Relation):
+            return value
+        if value.frame is not None:
+            return value.frame
+        idx = [c for c, _ in value.index]
+        cols = ", ".join(_q(c) for c in value.columns + idx)
+        order = ", ".join(_q(c) for c in value.order)
+        sql = f"SELECT {cols} FROM ({value.sql}) AS t" + (f" ORDER BY {order}" if order else "")
+        with self._lock:
+            table = self.con.execute(sql).arrow()
+        if node_id is not None:
+            self.queries[node_id] = sql
+        df = table.to_pandas()
+        for c in df.columns[df.dtypes == object]:
+            # Arrow gives None for missing text; read_csv/merge give NaN
+            if df[c].isna().any():
+                df[c] = df[c].where(df[c].notna(), np.nan)
+        if idx:
+            labels = [df.pop(c) for c in idx]
+            if len(labels) == 1:
+                index = pd.Index(labels[0]).rename(value.index[0][1])
+                if value.index[0][1] is None and index.dtype.kind == "i" and index.equals(pd.RangeIndex(len(df))):
+                    index = pd.RangeIndex(len(df))
+            else:
+                index = pd.MultiIndex.from_arrays(labels, names=[n for _, n in value.index])
+            df.index = index
+        value.frame = df
+        return df
+
+    def close(self):
+        try:
+            self.con.close()
+        except Exception:
+            pass
+        self._frames.clear()
+        for p in self._tmp_files:
+            try:
+                os.unlink(p)
+            except OSError:
+                pass
+
+
+def _text_class(col: str) -> str:
+    """Aggregate over a text column: bit 1 ints, 2 other numbers, 4 bools, 8 anything else."""
+    c = _q(col)
+    return (f"bit_or(CASE WHEN {c} IS NULL THEN 0 WHEN regexp_full_match({c}, {_lit(PANDAS_INT)}) THEN 1 "
+            f"WHEN regexp_full_match({c}, {_lit(PANDAS_FLOAT)}) THEN 2 "
+            f"WHEN {c} IN ({', '.join(_lit(b) for b in PANDAS_BOOLS)}) THEN 4 ELSE 8 END)")
+
+
+def _class_of(flags: Optional[int]) -> str:
+    if not flags:
+        return "missing"
+    if flags == 1:
+        return "int"
+    if flags in (2, 3):
+        return "float"
+    return "bool" if flags == 4 else "text"
+
+
+def _is_text(sql_type: str) -> bool:
+    return sql_type.upper().startswith("VARCHAR")
+
+
+def _is_numeric(sql_type: str) -> bool:
+    t = sql_type.upper()
+    return t.startswith(("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                         "UINTEGER", "UBIGINT", "FLOAT", "DOUBLE", "DECIMAL"))
+
+
+def _is_float(sql_type: str) -> bool:
+    return sql_type.upper().startswith(("FLOAT", "DOUBLE", "DECIMAL"))
+
+
+def _agg_sql(col: str, fn: str, sql_type: str) -> str:
+    if (fn in _NUMERIC_AGGS or fn in ("min", "max")) and not _is_numeric(sql_type):
+        # pandas sums text by concatenation and fails min/max of text with gaps
+        raise Unsupported(f"{fn} of a {sql_type} column")
+    integral = _is_numeric(sql_type) and not _is_float(sql_type)
+    if fn == "sum":
+        # pandas: an all-NaN group sums to 0 and integer sums stay int64
+        return f"CAST(COALESCE(SUM({col}), 0) AS {'BIGINT' if integral else 'DOUBLE'})"
+    if fn == "mean":
+        return f"CAST(AVG({col}) AS DOUBLE)"
+    if fn == "median":
+        return f"CAST(MEDIAN({col}) AS DOUBLE)"
+    if fn == "std":
+        return f"STDDEV_SAMP({col})"
+    if fn == "var":
+        return f"VAR_SAMP({col})"
+    if fn == "count":
+        return f"COUNT({col})"
+    if fn == "nunique":
+        return f"COUNT(DISTINCT {col})"
+    return f"{fn.upper()}({col})"  # min / max
@@ -1228,13 +1228,23 @@ Tharavu Dappa Backend — Light index + Robust pipeline executor + NL→YAML
 
 import os
 import re
+import copy
 import json
+import time
+import queue
+import uuid
+import asyncio
+import hashlib
+import threading
 import inspect
 import importlib
 from functools import lru_cache
-from typing import Any, Dict, List, Optional, Tuple, Set
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Set
 from pathlib import Path
 from io import BytesIO
+from types import GeneratorType
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 
 import requests
 import numpy as np
@@ -1244,9 +1254,21 @@ import yaml as pyyaml
 
 from fastapi import FastAPI, HTTPException, UploadFile, Form, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 
 
 from vanna_router import router as vanna_router  # <-- make sure the import path matches
+import process_executor
+import node_cache
+import spill
+import metrics
+import uploads
+import pushdown
+import duckdb_engine
+import polars_engine
+import downcast
+import result_formats
 
 
 
@@ -1263,6 +1285,11 @@ try:
 except Exception:
     auto_connect_from_env = None
 
+# Cached node results, parsed uploads and spilled frames are handed out as shallow copies
+# (node_cache.detach): under copy-on-write (the pandas 3 default) a node writing into one copies
+# what it touches instead of reaching the shared entry. Without it every hand-out is a deep copy.
+pd.set_option("mode.copy_on_write", True)
+
 app = FastAPI(title="Tharavu Dappa Backend", version="3.6.0")
 app.add_middleware(
     CORSMiddleware,
@@ -1272,6 +1299,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def _observe_request(request: Request, call_next):
+    # Labelled by route template (/pipeline/jobs/{job_id}), not raw path, to bound cardinality
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - t0, route=route,
+                                             method=request.method, status=str(status))
+
 # === Shared file upload for GenBI ===
 import unicodedata
 import string
@@ -1282,6 +1324,11 @@ LOCAL_STORAGE = os.getenv("LOCAL_STORAGE", ".")
 DATA_ROOT = Path(LOCAL_STORAGE).resolve()
 UPLOADS_DIR = (DATA_ROOT / "uploads")
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+# Saved uploads by content digest, so runs can reference them by id
+UPLOADS = uploads.UploadRegistry(UPLOADS_DIR)
+
+# Intermediate results spilled under memory pressure (see spill.py)
+SPILL_DIR = DATA_ROOT / "spill"
 
 # Path INSIDE the ibis-server container
 IBIS_DATA_PATH = "/usr/src/app/data"
@@ -1298,6 +1345,7 @@ def _safe_filename(name: str) -> str:
 
 @app.on_event("startup")
 async def _startup():
+    await asyncio.to_thread(UPLOADS.resume_pending)
     # If your vanna_router provides auto_connect_from_env, call it.
     if callable(auto_connect_from_env):
         try:
@@ -1307,6 +1355,11 @@ async def _startup():
             print(f"[startup] auto_connect_from_env error: {e}")
 
 
+@app.on_event("shutdown")
+async def _shutdown():
+    process_executor.shutdown_pool()
+
+
 @app.post("/files/upload")
 async def files_upload(file: UploadFile):
     """
@@ -1319,12 +1372,34 @@ async def files_upload(file: UploadFile):
     fname = _safe_filename(file.filename)
     dest = UPLOADS_DIR / fname
     data = await file.read()
-    dest.write_bytes(data)
+    await asyncio.to_thread(dest.write_bytes, data)
+    entry = await asyncio.to_thread(UPLOADS.register, fname, dest, data)
+    # CSV/TSV/xlsx get a Parquet copy in the background; poll /files/{id} for the new MDL.
+    # Queuing it stats the file and rewrites the manifest: off the event loop too
+    await asyncio.to_thread(UPLOADS.convert_async, entry["digest"])
+    return _upload_response(await asyncio.to_thread(UPLOADS.lookup, entry["digest"]) or entry)
+
+
+@app.get("/files/{upload_id}")
+async def files_status(upload_id: str):
+    entry = await asyncio.to_thread(UPLOADS.lookup, upload_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or modified upload '{upload_id}'")
+    return _upload_response(entry)
+
+
+def _upload_response(entry: Dict[str, Any]) -> Dict[str, Any]:
+    fname = entry["filename"]
+    columnar = entry.get("columnar") or {"status": "unsupported"}
 
     # Where the ibis container will see it
     ibis_abs = f"{IBIS_DATA_PATH}/uploads/{fname}"
-    # DuckDB/ibis can read a csv directly:
-    ref_sql = f"select * from read_csv_auto('{ibis_abs}')"
+    if columnar["status"] == "ready":
+        ibis_parquet = f"{IBIS_DATA_PATH}/uploads/{Path(columnar['path']).name}"
+        ref_sql = f"select * from read_parquet('{ibis_parquet}')"
+    else:
+        # DuckDB/ibis can read a csv directly:
+        ref_sql = f"select * from read_csv_auto('{ibis_abs}')"
 
     mdl = {
         "catalog": "local",
@@ -1337,8 +1412,13 @@ async def files_upload(file: UploadFile):
     return {
         "ok": True,
         "filename": fname,
-        "saved_to": str(dest),         # host path
+        "id": entry["id"],             # pass as upload_id to /pipeline/run
+        "source": f"{uploads.SAVED_PREFIX}{entry['id']}",  # or as a read node's filepath_or_buffer
+        "digest": entry["digest"],
+        "size": entry["size"],
+        "saved_to": entry["path"],     # host path
         "ibis_path": ibis_abs,         # path inside ibis container
+        "columnar": {k: v for k, v in columnar.items() if k != "path"},
         "refSql": ref_sql,
         "mdl": mdl,
     }
@@ -1379,7 +1459,12 @@ def get_function_signature(func: Any) -> Dict[str, Any]:
 
 
 def _add(functions: List[Dict[str, Any]], names: Set[str],
-         obj: Any, suggestion: str, library: str, category: str, canonical: str):
+         obj: Any, suggestion: str, library: str, category: str, canonical: str,
+         table: Optional[Dict[str, Any]] = None):
+    if table is not None:
+        # First writer wins: pandas is walked before numpy, matching resolution order
+        table.setdefault(canonical, obj)
+        table.setdefault(f"{library}.{canonical}", obj)
     info = get_function_signature(obj)
     info["library"] = library
     info["category"] = category
@@ -1405,7 +1490,8 @@ def _add_synthetic(functions: List[Dict[str, Any]], names: Set[str],
     names.add(canonical)
 
 
-def _collect_light() -> Tuple[List[Dict[str, Any]], List[str]]:
+def _collect_light(table: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Search index entries and suggestions; fills `table` (name -> callable) when given."""
     functions: List[Dict[str, Any]] = []
     suggestions: Set[str] = set()
 
@@ -1418,7 +1504,7 @@ def _collect_light() -> Tuple[List[Dict[str, Any]], List[str]]:
         except Exception:
             continue
         if _callable(obj):
-            _add(functions, suggestions, obj, name, "pandas", "pandas", name)
+            _add(functions, suggestions, obj, name, "pandas", "pandas", name, table)
 
     # key pandas classes/methods
     for cls in filter(None, [getattr(pd, "DataFrame", None),
@@ -1434,7 +1520,7 @@ def _collect_light() -> Tuple[List[Dict[str, Any]], List[str]]:
             except Exception:
                 continue
             if _callable(meth):
-                _add(functions, suggestions, meth, m, "pandas", cls_name, f"{cls_name}.{m}")
+                _add(functions, suggestions, meth, m, "pandas", cls_name, f"{cls_name}.{m}", table)
                 suggestions.add(f"{cls_name}.{m}")
 
     # synthetic indexers for search
@@ -1471,7 +1557,7 @@ def _collect_light() -> Tuple[List[Dict[str, Any]], List[str]]:
                 except Exception:
                     continue
                 if _callable(obj):
-                    _add(functions, suggestions, obj, a, "pandas", f"pandas.{sub}", f"{sub}.{a}")
+                    _add(functions, suggestions, obj, a, "pandas", f"pandas.{sub}", f"{sub}.{a}", table)
                     suggestions.add(f"{sub}.{a}")
         except Exception:
             pass
@@ -1485,7 +1571,7 @@ def _collect_light() -> Tuple[List[Dict[str, Any]], List[str]]:
         except Exception:
             continue
         if _callable(obj):
-            _add(functions, suggestions, obj, a, "numpy", "NumPy", a)
+            _add(functions, suggestions, obj, a, "numpy", "NumPy", a, table)
     for sub in ("linalg", "random", "fft"):
         try:
             submod = getattr(np, sub)
@@ -1497,7 +1583,7 @@ def _collect_light() -> Tuple[List[Dict[str, Any]], List[str]]:
                 except Exception:
                     continue
                 if _callable(obj):
-                    _add(functions, suggestions, obj, f"{sub}.{a}", "numpy", f"numpy.{sub}", f"{sub}.{a}")
+                    _add(functions, suggestions, obj, f"{sub}.{a}", "numpy", f"numpy.{sub}", f"{sub}.{a}", table)
                     suggestions.add(a)
         except Exception:
             pass
@@ -1514,14 +1600,50 @@ def _collect_light() -> Tuple[List[Dict[str, Any]], List[str]]:
 
 
 @lru_cache(maxsize=1)
+def _light_index() -> Tuple[List[Dict[str, Any]], List[str], Dict[str, Any]]:
+    table: Dict[str, Any] = {}
+    functions, suggestions = _collect_light(table)
+    return functions, suggestions, table
+
+
 def get_index() -> Tuple[List[Dict[str, Any]], List[str]]:
-    return _collect_light()
+    functions, suggestions, _ = _light_index()
+    return functions, suggestions
+
+
+def resolution_table() -> Dict[str, Any]:
+    """Canonical names (DataFrame.x, io.x, linalg.x, x) and their pandas./numpy. forms."""
+    return _light_index()[2]
 
 
 # ======================== Function resolution ========================
 
+PIPELINE_RESOLVE_CACHE_SIZE = int(os.getenv("PIPELINE_RESOLVE_CACHE_SIZE", "4096"))
+
+_NOT_FOUND = object()
+
+
 def get_callable_from_name(func_name: str):
     """Resolve a pandas/numpy function or pandas method by canonical/name."""
+    obj = resolution_table().get(func_name, _NOT_FOUND)
+    if obj is _NOT_FOUND:
+        obj = _resolve_fallback(func_name)
+    if obj is _NOT_FOUND:
+        raise ValueError(f"Function '{func_name}' not found")
+    return obj
+
+
+# Names outside the table (numpy.ma.*, emath.*, typos...) resolve the slow
+# way once; misses are memoized too so a bad YAML name doesn't re-import.
+@lru_cache(maxsize=PIPELINE_RESOLVE_CACHE_SIZE)
+def _resolve_fallback(func_name: str):
+    try:
+        return _resolve_by_import(func_name)
+    except ValueError:
+        return _NOT_FOUND
+
+
+def _resolve_by_import(func_name: str):
     # module path (pandas.x.y or numpy.x.y)
     if func_name.startswith("pandas.") or func_name.startswith("numpy."):
         parts = func_name.split(".")
@@ -1730,7 +1852,37 @@ def is_read_function(func_name: str) -> bool:
         "read_pickle", "read_html", "read_xml", "read_table"
     }
 
-def normalize_read_params(func_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+# Ingestion mode for read_* nodes: per node `ingest:`, else this server-wide default.
+# "arrow" parses CSVs with pyarrow's multithreaded reader and keeps Arrow-backed dtypes.
+INGEST_MODES = ("numpy", "arrow")
+READ_INGEST = os.getenv("PIPELINE_READ_INGEST", "numpy").lower()
+# Dtype optimization after a read (see downcast.py): per node `optimize:`, else this default
+READ_OPTIMIZE = os.getenv("PIPELINE_READ_OPTIMIZE", "off")
+
+# Readers that take dtype_backend="pyarrow"
+_ARROW_BACKEND_READS = {"read_csv", "read_table", "read_fwf", "read_json", "read_excel", "read_parquet",
+                        "read_feather", "read_orc", "read_html", "read_xml", "read_spss"}
+# read_csv options the pyarrow engine rejects (pandas 2.2); such reads keep the C parser
+_PYARROW_CSV_UNSUPPORTED = {"chunksize", "comment", "converters", "dayfirst", "delim_whitespace", "dialect",
+                            "float_precision", "iterator", "lineterminator", "low_memory", "memory_map",
+                            "nrows", "quoting", "skipfooter", "skipinitialspace", "thousands", "verbose"}
+
+
+def arrow_read_options(func_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """engine/dtype_backend an arrow-ingest read adds; options the node sets itself win."""
+    fn = func_name.split(".")[-1]
+    extra: Dict[str, Any] = {}
+    if fn in _ARROW_BACKEND_READS and "dtype_backend" not in params:
+        extra["dtype_backend"] = "pyarrow"
+    sep = params.get("sep", params.get("delimiter"))
+    if fn in ("read_csv", "read_table") and "engine" not in params \
+            and not (_PYARROW_CSV_UNSUPPORTED & {k for k, v in params.items() if v is not None}) \
+            and (sep is None or (isinstance(sep, str) and len(sep) == 1)):
+        extra["engine"] = "pyarrow"
+    return extra
+
+
+def normalize_read_params(func_name: str, params: Dict[str, Any], ingest: Optional[str] = None) -> Dict[str, Any]:
     if not isinstance(params, dict) or not is_read_function(func_name):
         return params
     p = dict(params)
@@ -1739,19 +1891,260 @@ def normalize_read_params(func_name: str, params: Dict[str, Any]) -> Dict[str, A
             if k in READ_ARG_ALIASES:
                 p["filepath_or_buffer"] = p.pop(k)
                 break
+    if ingest == "arrow":
+        p.update(arrow_read_options(func_name, p))
     return p
 
 
-# ======================== Pipeline executor ========================
+# ======================== Node compilation ========================
 
-@app.post("/pipeline/run")
-async def pipeline_run(
-    yaml_text: Optional[str] = Form(None),
-    yaml: Optional[str] = Form(None),
-    preview_node: Optional[str] = Form(None),
-    file: Optional[UploadFile] = None,
-):
-    raw_yaml = yaml_text if yaml_text is not None else yaml
+_RECEIVER_KEYS = ("self", "df", "left")
+
+
+class CompiledNode:
+    """
+    Front-end work for one node, done once per distinct spec: the resolved
+    callable, coerced params (receiver removed) and the receiver binding.
+    Resolution/parse failures are kept and raised when the node executes,
+    so pruned or never-reached nodes behave as before.
+    """
+
+    __slots__ = ("func_name", "func", "error", "params", "key_params", "source", "source_arg",
+                 "receiver", "has_receiver", "is_indexer", "is_read", "rows", "cols", "ingest_options",
+                 "optimize")
+
+    def __init__(self, node_def: Dict[str, Any]):
+        self.func_name = node_def.get("function")
+        ingest = str(node_def.get("ingest") or READ_INGEST).lower()
+        given = dict(node_def.get("params") or {})
+        raw = normalize_read_params(self.func_name, given, ingest)
+        # What arrow ingestion added, dropped again if this file can't be read that way
+        self.ingest_options = tuple(k for k in ("engine", "dtype_backend") if k in raw and k not in given)
+        self.is_indexer = self.func_name in ("DataFrame.iloc", "DataFrame.loc")
+        self.is_read = is_read_function(self.func_name or "")
+        self.source = raw.get("filepath_or_buffer")
+        self.source_arg = "filepath_or_buffer"
+        self.func = None
+        self.error: Optional[str] = None
+        self.rows = self.cols = None
+        self.optimize: Optional[downcast.Options] = None
+
+        # Receiver for methods (self/df/left); `left` only binds for *.merge
+        recv_key = next((k for k in _RECEIVER_KEYS if k in raw and
+                         (k != "left" or (self.func_name or "").endswith(".merge"))), None)
+        self.has_receiver = recv_key is not None
+        self.receiver = raw.get(recv_key) if recv_key else None
+
+        # Coercion is per value, so the key params are the exec params plus the receiver
+        self.key_params = coerce_params(raw)
+        self.params = {k: v for k, v in self.key_params.items() if k != recv_key}
+        try:
+            if self.is_read and ingest not in INGEST_MODES:
+                raise ValueError(f"ingest must be one of {', '.join(INGEST_MODES)}, got {ingest!r}")
+            if self.is_read:
+                self.optimize = downcast.parse_options(node_def.get("optimize", READ_OPTIMIZE))
+            if self.is_indexer:
+                iloc = (self.func_name == "DataFrame.iloc")
+                self.rows = _normalize_indexer(raw.get("rows"), iloc=iloc)
+                self.cols = _normalize_indexer(raw.get("cols"), iloc=iloc)
+            else:
+                self.func = get_callable_from_name(self.func_name)
+                if self.is_read:
+                    self.source_arg = _source_arg(self.func)
+        except Exception as e:
+            self.error = str(e)
+
+
+def _source_arg(func: Any) -> str:
+    # read_parquet/read_feather call the canonical filepath_or_buffer `path`
+    try:
+        params = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return "filepath_or_buffer"
+    first = next(iter(params.values()), None)
+    if "filepath_or_buffer" in params or first is None or first.kind in (first.VAR_POSITIONAL, first.VAR_KEYWORD):
+        return "filepath_or_buffer"  # wrappers taking *args/**kwargs get the canonical name
+    return first.name
+
+
+# ======================== Pipeline planner ========================
+
+# Params naming the columns a node groups, joins, pivots or dedupes on
+_KEY_PARAMS = ("by", "on", "left_on", "right_on", "keys", "level", "index", "columns", "subset")
+
+
+def key_column_names(nodes: Iterable[CompiledNode]) -> Set[str]:
+    """
+    Every name a node uses as a key, or that a query orders by comparison;
+    optimized reads keep these columns as text.
+    """
+    names: Set[str] = set()
+    for c in nodes:
+        if c.func_name == "DataFrame.query":
+            names |= pushdown.ordered_comparison_columns(c.key_params.get("expr"))
+        for k in _KEY_PARAMS:
+            v = c.key_params.get(k)
+            for item in (v if isinstance(v, (list, tuple)) else [v]):
+                if isinstance(item, (str, int)) and not isinstance(item, bool):
+                    names.add(str(item))
+    return names
+
+
+class PipelinePlan:
+    """
+    Explicit DAG for a pipeline spec plus its compiled nodes.
+    `levels` is the Kahn ordering: every node's dependencies sit in an earlier level.
+    Plans are shared between runs through the compiled plan cache, so nothing
+    here (nor the spec it came from) may be mutated after construction.
+    """
+
+    def __init__(self, nodes: Dict[str, Any], deps: Dict[str, Set[str]],
+                 consumers: Dict[str, List[str]], levels: List[List[str]]):
+        self.nodes = nodes
+        self.compiled = {nid: CompiledNode(node_def) for nid, node_def in nodes.items()}
+        self.deps = deps
+        self.consumers = consumers
+        self.levels = levels
+        self.order = [nid for level in levels for nid in level]
+        self.position = {nid: i for i, nid in enumerate(self.order)}
+        self.projection: Dict[str, List[str]] = {}
+        self.predicates: Dict[str, pushdown.DNF] = {}
+        optimized = [c for c in self.compiled.values() if c.optimize is not None]
+        if optimized:
+            keys = key_column_names(self.compiled.values())
+            for c in optimized:
+                c.optimize = c.optimize.with_key_columns(keys)
+
+    def ancestors(self, targets: List[str]) -> Set[str]:
+        """Targets plus everything they transitively depend on."""
+        closure: Set[str] = set()
+        stack = list(targets)
+        while stack:
+            nid = stack.pop()
+            if nid in closure:
+                continue
+            closure.add(nid)
+            stack.extend(self.deps[nid])
+        return closure
+
+    def execution_order(self, targets: Optional[List[str]] = None) -> List[str]:
+        """Plan order, pruned to the ancestor closure of `targets` when given."""
+        if not targets:
+            return list(self.order)
+        closure = self.ancestors(targets)
+        return sorted(closure, key=self.position.__getitem__)
+
+    def consumer_counts(self, order: List[str]) -> Dict[str, int]:
+        """How many nodes in `order` read each result (deps outside `order` included)."""
+        counts = {nid: 0 for nid in order}
+        for nid in order:
+            for d in self.deps[nid]:
+                counts[d] = counts.get(d, 0) + 1
+        return counts
+
+    def with_pushdown(self, projection: Dict[str, List[str]],
+                      predicates: Dict[str, "pushdown.DNF"]) -> "PipelinePlan":
+        """Per-run copy whose read nodes get the planner's column projection and row-group filters."""
+        if not projection and not predicates:
+            return self
+        plan = copy.copy(self)
+        plan.nodes = dict(self.nodes)
+        plan.compiled = dict(self.compiled)
+        for nid in set(projection) | set(predicates):
+            node_def = self.nodes[nid]
+            params = dict(node_def.get("params") or {})
+            if nid in projection:
+                option = PROJECTABLE_READS[(node_def.get("function") or "").split(".")[-1]]
+                params[option] = pushdown.ColumnSelector(projection[nid])
+            if nid in predicates:
+                params["filters"] = pushdown.RowGroupFilter(predicates[nid])
+            plan.nodes[nid] = {**node_def, "params": params}
+            plan.compiled[nid] = CompiledNode(plan.nodes[nid])
+        plan.projection = projection
+        plan.predicates = predicates
+        return plan
+
+    def describe(self, targets: Optional[List[str]] = None) -> Dict[str, Any]:
+        return {
+            "levels": self.levels,
+            "order": self.order,
+            "edges": [[d, nid] for nid in self.order for d in sorted(self.deps[nid])],
+            "targets": targets or [],
+            "execute": self.execution_order(targets),
+        }
+
+
+def node_dependencies(node_id: str, node_def: Dict[str, Any], node_ids: Set[str]) -> Set[str]:
+    """Explicit `dependencies` plus implicit refs (param strings naming another node)."""
+    func_name = node_def.get("function")
+    raw_params = normalize_read_params(func_name, dict(node_def.get("params") or {}))
+    implicit = (extract_param_node_refs(raw_params) & node_ids) - {node_id}
+    return set(node_def.get("dependencies") or []) | implicit
+
+
+def _cycle_members(remaining: Set[str], deps: Dict[str, Set[str]],
+                   consumers: Dict[str, List[str]]) -> List[str]:
+    # Kahn leaves cycles *and* everything downstream of them; peel off the
+    # downstream tail (nodes nobody in the remainder consumes) to name the cycle.
+    outdeg = {nid: sum(1 for c in consumers[nid] if c in remaining) for nid in remaining}
+    stack = [nid for nid, n in outdeg.items() if n == 0]
+    while stack:
+        nid = stack.pop()
+        remaining.discard(nid)
+        for d in deps[nid]:
+            if d in remaining:
+                outdeg[d] -= 1
+                if outdeg[d] == 0:
+                    stack.append(d)
+    return sorted(remaining)
+
+
+def build_pipeline_plan(nodes: Dict[str, Any]) -> PipelinePlan:
+    node_ids = set(nodes.keys())
+    position = {nid: i for i, nid in enumerate(nodes)}
+    deps: Dict[str, Set[str]] = {}
+    consumers: Dict[str, List[str]] = {nid: [] for nid in nodes}
+
+    for node_id, node_def in nodes.items():
+        if not isinstance(node_def, dict):
+            raise HTTPException(status_code=400, detail=f"Node '{node_id}' must be a mapping")
+        node_deps = node_dependencies(node_id, node_def, node_ids)
+        missing = sorted(str(d) for d in node_deps - node_ids)
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Pipeline has unsatisfied dependencies: node '{node_id}' depends on unknown node(s) {', '.join(missing)}",
+            )
+        deps[node_id] = node_deps
+        for d in node_deps:
+            consumers[d].append(node_id)
+
+    indegree = {nid: len(d) for nid, d in deps.items()}
+    levels: List[List[str]] = []
+    level = [nid for nid in nodes if indegree[nid] == 0]
+    while level:
+        levels.append(level)
+        nxt = []
+        for nid in level:
+            for c in consumers[nid]:
+                indegree[c] -= 1
+                if indegree[c] == 0:
+                    nxt.append(c)
+        level = sorted(nxt, key=position.__getitem__)
+
+    planned = sum(len(lvl) for lvl in levels)
+    if planned < len(nodes):
+        blocked = {nid for nid, n in indegree.items() if n > 0}
+        cycle = _cycle_members(blocked, deps, consumers)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pipeline has cyclic dependencies among nodes: {', '.join(cycle)}",
+        )
+
+    return PipelinePlan(nodes, deps, consumers, levels)
+
+
+def parse_pipeline_spec(raw_yaml: Optional[str]) -> Dict[str, Any]:
     if not raw_yaml:
         raise HTTPException(status_code=400, detail="Missing 'yaml' string")
 
@@ -1762,113 +2155,1940 @@ async def pipeline_run(
 
     if not isinstance(spec, dict) or "nodes" not in spec or not isinstance(spec["nodes"], dict):
         raise HTTPException(status_code=400, detail="YAML must contain 'nodes' dict")
+    return spec
+
+
+def requested_outputs(spec: Dict[str, Any], outputs: Optional[str] = None) -> List[str]:
+    """
+    Sink nodes to return: the `outputs` form field (comma list or YAML list)
+    wins over a top-level `outputs:` list in the spec.
+    """
+    raw = _coerce_value(outputs) if outputs else spec.get("outputs")
+    if raw is None or raw == "":
+        return []
+    if isinstance(raw, str):
+        raw = [raw]
+    if not isinstance(raw, list) or not all(isinstance(x, str) for x in raw):
+        raise HTTPException(status_code=400, detail="'outputs' must be a list of node ids")
+    unknown = [x for x in raw if x not in spec["nodes"]]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown output node(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(raw))
+
+
+# ======================== Compiled plan cache ========================
+
+PIPELINE_PLAN_CACHE_SIZE = int(os.getenv("PIPELINE_PLAN_CACHE_SIZE", "128"))
+
+
+class CompiledPlanCache:
+    """
+    Bounded LRU of (spec, PipelinePlan) keyed by a hash of the YAML text and
+    by a hash of the normalized spec, so a re-posted pipeline skips YAML
+    parsing, function resolution and param coercion entirely and one that
+    only differs in formatting skips everything but the parse.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], PipelinePlan]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[Tuple[Dict[str, Any], PipelinePlan]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, keys: List[str], entry: Tuple[Dict[str, Any], PipelinePlan]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for key in keys:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def compile(self, raw_yaml: Optional[str]) -> Tuple[Dict[str, Any], PipelinePlan]:
+        text_key = "text:" + hashlib.sha256((raw_yaml or "").encode("utf-8")).hexdigest()
+        entry = self._get(text_key)
+        if entry is None:
+            spec = parse_pipeline_spec(raw_yaml)
+            try:
+                # Node order breaks ties in the plan and picks the default output: part of the key
+                normalized = json.dumps([list(spec["nodes"]), spec], sort_keys=True, default=repr)
+                spec_key = "spec:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+            except Exception:
+                spec_key = None  # e.g. mixed-type keys: cache by text only
+            entry = self._get(spec_key) if spec_key else None
+            if entry is None:
+                entry = (spec, build_pipeline_plan(spec["nodes"]))
+            self._put([k for k in (text_key, spec_key) if k], entry)
+            with self._lock:
+                self.misses += 1
+        else:
+            with self._lock:
+                self.hits += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
 
-    nodes: Dict[str, Any] = spec["nodes"]
-    executed: Dict[str, Any] = {}
-    remaining = set(nodes.keys())
 
-    uploaded_bytes = await file.read() if file else None
+PLAN_CACHE = CompiledPlanCache(PIPELINE_PLAN_CACHE_SIZE)
 
-    while remaining:
-        made_progress = False
 
-        for node_id in list(remaining):
-            node_def = nodes[node_id]
-            func_name = node_def.get("function")
-            raw_params = dict(node_def.get("params", {}))
-            deps = list(node_def.get("dependencies", []))
+def compile_pipeline(raw_yaml: Optional[str]) -> Tuple[Dict[str, Any], PipelinePlan]:
+    """Parsed spec and compiled plan for a YAML string, cached by content."""
+    return PLAN_CACHE.compile(raw_yaml)
 
-            # unify IO params early so pandas won't complain
-            raw_params = normalize_read_params(func_name, raw_params)
 
-            # recognize indexers
-            is_indexer = func_name in ("DataFrame.iloc", "DataFrame.loc")
+# ======================== Projection & predicate pushdown ========================
+
+# Readers that can skip columns while parsing, and the option that does it
+PROJECTABLE_READS = {"read_csv": "usecols", "read_table": "usecols",
+                     "read_parquet": "columns", "read_feather": "columns"}
+# Reader options that name columns themselves; leave those reads alone
+_COLUMN_READ_OPTIONS = {"usecols", "columns", "index_col", "names", "header", "parse_dates",
+                        "converters", "filters"}
+# Reads whose consumers' query filters can skip Parquet row groups
+_PRUNABLE_READS = {"read_parquet", "read_csv", "read_table", "read_excel"}
+_ORDERING_ONLY: List[str] = []
+
+
+def _receiver_only(plan: PipelinePlan, consumer: str, source: str) -> Optional[bool]:
+    """True if `consumer` reads `source` only as its receiver; None if it doesn't read it at all."""
+    node = plan.compiled[consumer]
+    raw = normalize_read_params(node.func_name, dict(plan.nodes[consumer].get("params") or {}))
+    uses = [k for k, v in raw.items() if source in extract_param_node_refs({k: v})]
+    if not uses:
+        return None  # listed in `dependencies` only
+    return len(uses) == 1 and uses[0] in _RECEIVER_KEYS and node.receiver == source and not node.error
+
+
+def _consumer_columns(plan: PipelinePlan, consumer: str, source: str) -> Optional[List[str]]:
+    """Columns of `source` that `consumer` reads; None if it may read any of them."""
+    receiver_only = _receiver_only(plan, consumer, source)
+    if receiver_only is None:
+        return _ORDERING_ONLY
+    if not receiver_only:
+        return None
 
-            # Implicit deps: any param that looks like a node id
-            implicit_refs = extract_param_node_refs(raw_params)
-            all_deps = set(deps) | (implicit_refs & set(nodes.keys()))
-            if any(d not in executed for d in all_deps):
+    node = plan.compiled[consumer]
+    func_name, params = node.func_name, node.params
+    if func_name == "DataFrame.loc":
+        cols = node.cols
+    elif func_name == "DataFrame.__getitem__" and set(params) == {"key"}:
+        cols = params["key"]
+    elif func_name == "DataFrame.get" and set(params) <= {"key", "default"}:
+        cols = params.get("key")
+    elif func_name == "DataFrame.filter" and set(params) <= {"items", "axis"} \
+            and params.get("axis") in (None, 1, "columns"):
+        cols = params.get("items")
+    else:
+        return None
+    if isinstance(cols, str):
+        cols = [cols]
+    # A key naming another node is resolved to its value (e.g. a boolean mask)
+    if not isinstance(cols, list) or not cols or \
+            not all(isinstance(c, str) and c not in plan.nodes for c in cols):
+        return None
+    return cols
+
+
+def plan_projection(spec: Dict[str, Any], plan: PipelinePlan, order: List[str],
+                    keep: Set[str]) -> Dict[str, List[str]]:
+    """
+    read node -> the columns its consumers in `order` use, for reads whose
+    every consumer selects columns by name (loc cols, [] / get keys, filter
+    items). Kept reads, and reads feeding anything else, parse every column.
+    `pushdown: false` in the spec turns this off.
+    """
+    if spec.get("pushdown", True) is False:
+        return {}
+    selected = set(order)
+    projection: Dict[str, List[str]] = {}
+    for nid in order:
+        node = plan.compiled[nid]
+        if (node.func_name or "").split(".")[-1] not in PROJECTABLE_READS or nid in keep:
+            continue
+        if node.error or _COLUMN_READ_OPTIONS & set(node.key_params):
+            continue
+        used: Optional[List[str]] = []
+        for c in plan.consumers[nid]:
+            if c not in selected:
                 continue
+            cols = _consumer_columns(plan, c, nid)
+            if cols is None:
+                used = None
+                break
+            used.extend(cols)
+        if used:
+            projection[nid] = sorted(set(used))
+    return projection
+
+
+def _consumer_predicate(plan: PipelinePlan, consumer: str, source: str) -> Optional["pushdown.DNF"]:
+    """Filters implied by a DataFrame.query reading `source`; None if it may need any row."""
+    receiver_only = _receiver_only(plan, consumer, source)
+    if receiver_only is None:
+        return _ORDERING_ONLY
+    node = plan.compiled[consumer]
+    if not receiver_only or node.func_name != "DataFrame.query":
+        return None
+    if set(node.params) - {"expr", "engine", "parser"} or node.params.get("parser", "pandas") != "pandas":
+        return None
+    return pushdown.translate_query(node.params.get("expr"))
 
-            # Receiver for methods (self/df/left)
-            recv = None
-            if "self" in raw_params:
-                k = raw_params["self"]
-                recv = executed.get(k) if isinstance(k, str) else k
-                raw_params.pop("self", None)
-            elif "df" in raw_params:
-                k = raw_params["df"]
-                recv = executed.get(k) if isinstance(k, str) else k
-                raw_params.pop("df", None)
-            elif "left" in raw_params and func_name and func_name.endswith(".merge"):
-                k = raw_params["left"]
-                recv = executed.get(k) if isinstance(k, str) else k
-                raw_params.pop("left", None)
-
-            # read_* auto: feed uploaded file bytes (using canonical key)
-            if uploaded_bytes is not None and is_read_function(func_name or ""):
-                raw_params = normalize_read_params(func_name, raw_params)
-                raw_params["filepath_or_buffer"] = BytesIO(uploaded_bytes)
 
+def plan_predicates(spec: Dict[str, Any], plan: PipelinePlan, order: List[str],
+                    keep: Set[str]) -> Dict[str, "pushdown.DNF"]:
+    """
+    read node -> pyarrow filters (DNF) implied by its consumers, for reads
+    that only feed DataFrame.query nodes: plain read_parquet, or any read
+    of an upload that may have a columnar copy. The filters only skip
+    row groups; every query still runs on what is read.
+    """
+    if spec.get("pushdown", True) is False:
+        return {}
+    selected = set(order)
+    predicates: Dict[str, pushdown.DNF] = {}
+    for nid in order:
+        node = plan.compiled[nid]
+        short = (node.func_name or "").split(".")[-1]
+        if short not in _PRUNABLE_READS or nid in keep or node.error:
+            continue
+        if short == "read_parquet":
+            if set(node.key_params) != {"filepath_or_buffer"}:
+                continue
+        elif not UPLOADS.by_source(node.source):
+            continue
+        dnf: Optional[pushdown.DNF] = []
+        for c in plan.consumers[nid]:
+            if c not in selected:
+                continue
+            cond = _consumer_predicate(plan, c, nid)
+            if cond is None:
+                dnf = None
+                break
+            dnf.extend(cond)
+        if dnf and len(dnf) <= pushdown.MAX_CONJUNCTIONS:
+            predicates[nid] = dnf
+    return predicates
+
+
+# ======================== Node result cache ========================
+
+# Non-deterministic or side-effecting functions never get a cache key
+_UNCACHEABLE_PREFIXES = ("random.", "numpy.random.")
+# Writers (files, buffers, databases); pure to_* conversions (to_datetime, to_numeric, ...) stay cacheable
+_WRITER_METHODS = {
+    "to_csv", "to_parquet", "to_excel", "to_json", "to_pickle", "to_feather", "to_hdf", "to_sql",
+    "to_stata", "to_orc", "to_html", "to_latex", "to_markdown", "to_xml", "to_clipboard", "to_gbq",
+}
+_SAMPLING_FUNCS = {"DataFrame.sample", "Series.sample"}
+
+
+def _truthy(v: Any) -> bool:
+    return _coerce_value(v) is True if isinstance(v, str) else bool(v)
+
+
+def _file_signature(path: Any) -> Optional[str]:
+    """Cheap content stand-in for a server-side path: absolute path + size + mtime."""
+    if not isinstance(path, str) or "://" in path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _saved_upload_digest(path: Any) -> Optional[str]:
+    saved = UPLOADS.by_source(path)
+    return saved["digest"] if saved else None
+
+
+def node_cache_key(node: CompiledNode, dep_keys: Dict[str, str],
+                   upload_digest: Optional[str] = None) -> Optional[str]:
+    func_name = node.func_name or ""
+
+    if func_name.startswith(_UNCACHEABLE_PREFIXES) or func_name.split(".")[-1] in _WRITER_METHODS:
+        return None
+    if func_name in _SAMPLING_FUNCS and "random_state" not in node.key_params:
+        return None
+
+    source = None
+    if node.is_read:
+        source = upload_digest or _file_signature(node.source) or _saved_upload_digest(node.source)
+        if source is None:
+            return None
+
+    payload = {
+        "function": func_name,
+        "params": node.key_params,
+        "deps": sorted(dep_keys.items()),
+        "source": source,
+    }
+    if node.optimize is not None:
+        payload["optimize"] = repr(node.optimize)
+    try:
+        blob = json.dumps(payload, sort_keys=True, default=repr)
+    except Exception:
+        return None
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def has_inplace(plan: PipelinePlan, order: List[str]) -> bool:
+    return any(_truthy((plan.nodes[nid].get("params") or {}).get("inplace")) for nid in order)
+
+
+def node_cache_keys(plan: PipelinePlan, order: List[str],
+                    upload_digest: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """Keys for every node in `order`; None means "always recompute" and propagates downstream."""
+    # An in-place node mutates its receiver, which may be a shared cached object
+    if has_inplace(plan, order):
+        return {nid: None for nid in order}
+    keys: Dict[str, Optional[str]] = {}
+    for nid in order:
+        dep_keys = {d: keys[d] for d in plan.deps[nid]}
+        if any(k is None for k in dep_keys.values()):
+            keys[nid] = None
+        else:
+            keys[nid] = node_cache_key(plan.compiled[nid], dep_keys, upload_digest)
+    return keys
+
+
+def serve_from_cache(plan: PipelinePlan, order: List[str], targets: List[str],
+                     keys: Dict[str, Optional[str]], executed: Dict[str, Any]) -> Tuple[List[str], int]:
+    """
+    Load cache hits into `executed` and return (nodes still to run, hit count).
+    A hit cuts the walk, so its ancestors only run if some other miss needs them.
+    """
+    needed: Set[str] = set()
+    visited: Set[str] = set()
+    hits = 0
+    stack = list(targets or order)
+    while stack:
+        nid = stack.pop()
+        if nid in visited:
+            continue
+        visited.add(nid)
+        key = keys.get(nid)
+        if key is not None:
+            value = node_cache.NODE_CACHE.get(key)
+            if not node_cache.is_missing(value):
+                executed[nid] = value
+                hits += 1
+                continue
+        needed.add(nid)
+        stack.extend(plan.deps[nid])
+    return [nid for nid in order if nid in needed], hits
+
+
+# ======================== Streaming execution ========================
+
+# `mode: stream` pipelines: read_csv/read_table yield chunks that flow through
+# row-local nodes as generators; anything else materializes (or rejects) its input.
+STREAM_SOURCES = {"read_csv", "read_table"}
+STREAM_ROW_LOCAL = {"DataFrame.rename", "DataFrame.astype", "DataFrame.query", "DataFrame.dropna",
+                    "DataFrame.iloc", "DataFrame.to_csv"}
+STREAM_DEFAULT_CHUNKSIZE = int(os.getenv("PIPELINE_STREAM_CHUNKSIZE", "100000"))
+
+
+def _receiver_ref(node_def: Dict[str, Any]) -> Optional[str]:
+    """Node id bound as the method receiver (self or df)."""
+    params = node_def.get("params") or {}
+    for k in ("self", "df"):
+        if k in params:
+            return params[k] if isinstance(params[k], str) else None
+    return None
+
+
+def _stream_blocker(node_id: str, node_def: Dict[str, Any], stream_deps: List[str]) -> Optional[str]:
+    """None if the node can run chunk by chunk on its streamed receiver, else the reason it can't."""
+    func_name = node_def.get("function") or ""
+    params = node_def.get("params") or {}
+    recv = _receiver_ref(node_def)
+    other = [d for d in stream_deps if d != recv]
+    if other:
+        return f"{func_name} reads stream '{other[0]}' as a non-receiver input and needs all of it"
+    if func_name not in STREAM_ROW_LOCAL:
+        return f"{func_name} is blocking and needs every row of '{recv or stream_deps[0]}'"
+    if func_name == "DataFrame.dropna" and str(params.get("axis", 0)).lower() not in ("0", "index", "rows"):
+        return "dropna along columns needs every row"
+    if func_name == "DataFrame.iloc":
+        try:
+            rows = _normalize_indexer(params.get("rows"), iloc=True)
+        except ValueError as e:
+            return str(e)
+        if not (isinstance(rows, slice) and rows.start in (None, 0) and rows.step in (None, 1)
+                and rows.stop is not None and rows.stop >= 0):
+            return "only head slices (rows: 0:N) can stream through DataFrame.iloc"
+    if func_name == "DataFrame.to_csv" and not isinstance(params.get("path_or_buf"), str):
+        return "to_csv without path_or_buf returns one string and needs every row"
+    if func_name == "DataFrame.astype" and _casts_to_category(params.get("dtype")):
+        return "astype to category needs every row to fix the categories"
+    return None
+
+
+def _casts_to_category(dtype: Any) -> bool:
+    targets = dtype.values() if isinstance(dtype, dict) else [dtype]
+    for target in targets:
+        try:
+            if isinstance(pd.api.types.pandas_dtype(target), pd.CategoricalDtype):
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+class StreamPlan:
+    """
+    Which nodes run as chunk generators (`roles`), which of those must be
+    collected into one DataFrame when produced (`collect`), and where the
+    planner had to materialize instead of streaming (`notes`).
+    """
+
+    def __init__(self, roles: Dict[str, str], collect: Set[str], notes: List[Dict[str, Any]], chunksize: int):
+        self.roles = roles
+        self.collect = collect
+        self.notes = notes
+        self.chunksize = chunksize
+        self.check: Callable[[], None] = lambda: None  # run_plan installs RunControl.check
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "chunksize": self.chunksize,
+            "streamed": list(self.roles),
+            "collected": sorted(self.collect),
+            "materialized": self.notes,
+        }
+
+    def run(self, node_id: str, plan: PipelinePlan, executed: Dict[str, Any],
+            uploaded_bytes: Optional[bytes] = None) -> Any:
+        node_def = plan.nodes[node_id]
+        if self.roles[node_id] == "source":
+            params = dict(node_def.get("params") or {})
+            params.setdefault("chunksize", self.chunksize)
+            reader = execute_node(node_id, {**node_def, "params": params}, executed, uploaded_bytes)
+            out = _guard_stream(node_id, node_def, _iter_reader(reader), self.check)
+        else:
+            recv = _receiver_ref(node_def)
+            # Snapshot side inputs now: refcounting may drop them before the generator runs
+            env = {d: executed[d] for d in plan.deps[node_id] if d != recv}
+            out = _stream_apply(node_id, node_def, recv, executed[recv], env, plan.compiled[node_id])
+        return materialize(out) if node_id in self.collect else out
+
+
+def plan_streaming(spec: Dict[str, Any], plan: PipelinePlan, order: List[str],
+                   keep: Set[str], forward: Optional[str] = None) -> Optional[StreamPlan]:
+    # `forward`: a kept node whose chunks go straight into a streamed response, so it isn't collected
+    if str(spec.get("mode") or "").lower() != "stream":
+        return None
+    counts = plan.consumer_counts(order)
+    reject = str(spec.get("stream_blocking") or "materialize").lower() == "reject"
+    roles: Dict[str, str] = {}
+    notes: List[Dict[str, Any]] = []
+
+    def exclusive(d: str) -> bool:
+        # A generator can be drained once: only single-consumer, unkept streams stay lazy
+        return d in roles and counts.get(d, 0) == 1 and d not in keep
+
+    for nid in order:
+        node_def = plan.nodes[nid]
+        func_name = node_def.get("function") or ""
+        if func_name.split(".")[-1] in STREAM_SOURCES and not plan.deps[nid]:
+            roles[nid] = "source"
+            continue
+        stream_deps = sorted(d for d in plan.deps[nid] if exclusive(d))
+        if not stream_deps:
+            continue
+        reason = _stream_blocker(nid, node_def, stream_deps)
+        if reason is None:
+            roles[nid] = "stream"
+            continue
+        if reject:
+            raise HTTPException(status_code=400, detail=f"Streaming rejected at node '{nid}': {reason}")
+        notes.append({"node": nid, "materializes": stream_deps, "reason": reason})
+
+    collect = {
+        nid for nid in roles
+        if nid != forward
+        and (not exclusive(nid) or not any(c in roles for c in plan.consumers[nid] if c in counts))
+    }
+    try:
+        chunksize = int(spec.get("chunksize") or STREAM_DEFAULT_CHUNKSIZE)
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"'chunksize' must be an integer, got {spec.get('chunksize')!r}")
+    return StreamPlan(roles, collect, notes, max(1, chunksize))
+
+
+def _iter_reader(reader: Any):
+    if isinstance(reader, (pd.DataFrame, pd.Series)):
+        yield reader
+        return
+    with reader:
+        yield from reader
+
+
+def _guard_stream(node_id: str, node_def: Dict[str, Any], chunks, check: Callable[[], None]):
+    # Errors surface when chunks are pulled, possibly from a downstream node;
+    # cancellation and deadlines are honoured between chunks
+    try:
+        for chunk in chunks:
+            check()
+            yield chunk
+    except (HTTPException, RunInterrupted):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error executing node '{node_id}' ({node_def.get('function')}): {e}")
+
+
+def _stream_apply(node_id: str, node_def: Dict[str, Any], recv: str, upstream, env: Dict[str, Any],
+                  compiled: Optional[CompiledNode] = None):
+    func_name = node_def.get("function")
+    params = dict(node_def.get("params") or {})
+
+    if func_name == "DataFrame.to_csv":
+        # Sink: drain eagerly, header on the first chunk only
+        first = True
+        for chunk in upstream:
+            p = dict(params, mode="w" if first else "a")
+            if not first:
+                p["header"] = False
+            execute_node(node_id, {**node_def, "params": p}, {**env, recv: chunk})
+            first = False
+        if first:
+            execute_node(node_id, node_def, {**env, recv: pd.DataFrame()})
+        return None
+
+    if func_name == "DataFrame.iloc":
+        return _stream_head(node_id, node_def, recv, upstream, env)
+
+    return (execute_node(node_id, node_def, {**env, recv: chunk}, compiled=compiled) for chunk in upstream)
+
+
+def _stream_head(node_id: str, node_def: Dict[str, Any], recv: str, upstream, env: Dict[str, Any]):
+    params = dict(node_def.get("params") or {})
+    stop = _normalize_indexer(params.get("rows"), iloc=True).stop
+    emitted = 0
+    try:
+        for chunk in upstream:
+            if emitted >= stop:
+                break
+            take = stop - emitted
+            out = execute_node(node_id, {**node_def, "params": dict(params, rows=f"0:{take}")}, {**env, recv: chunk})
+            emitted += min(take, len(chunk))
+            yield out
+    finally:
+        # Stop pulling: closes the upstream chain and its file reader
+        if hasattr(upstream, "close"):
+            upstream.close()
+
+
+def materialize(value: Any) -> Any:
+    if not isinstance(value, GeneratorType):
+        return value
+    chunks = list(value)
+    return pd.concat(chunks) if chunks else pd.DataFrame()
+
+
+# ======================== Execution engines ========================
+
+# `engine: duckdb` / `engine: polars`: supported nodes become lazy plans built
+# on their inputs' plans (SQL relations / LazyFrames), so each maximal chain
+# runs as one optimised query when a result is collected (kept, or read by a
+# pandas node). pandas results cross into the engine, and collected results
+# back, as Arrow data.
+ENGINES = {duckdb_engine.NAME: duckdb_engine, polars_engine.NAME: polars_engine}
+
+
+def is_lazy(value: Any) -> bool:
+    return any(engine.is_lazy(value) for engine in ENGINES.values())
+
+
+class EnginePlan:
+    """
+    Nodes an engine runs (`roles`), which of them must come back as pandas
+    objects when produced (`collect`), and per node the reason it stays in
+    pandas (`reasons`, None for engine nodes). Nodes that turn out to be
+    untranslatable at run time (input types, names) fall back to pandas and
+    are recorded in `fallbacks`.
+    """
+
+    def __init__(self, engine: Any, roles: Set[str], collect: Set[str], reasons: Dict[str, Optional[str]]):
+        self.engine = engine
+        self.roles = roles
+        self.collect = collect
+        self.reasons = reasons
+        self.fallbacks: Dict[str, str] = {}
+        self._session = None
+        self._upload_path: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = self.engine.Session(process_executor.SHM_DIR)
+            return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    def describe(self) -> Dict[str, Any]:
+        nodes = {}
+        for nid, reason in self.reasons.items():
+            if nid in self.fallbacks:
+                nodes[nid] = {"engine": "pandas", "reason": self.fallbacks[nid], "fallback": "runtime"}
+            else:
+                nodes[nid] = {"engine": self.engine.NAME} if reason is None else {"engine": "pandas", "reason": reason}
+        out = {"name": self.engine.NAME, "nodes": nodes, "collected": [n for n in self.reasons if n in self.collect]}
+        if self._session is not None:
+            out["queries"] = dict(self._session.queries)
+        return out
+
+    def _source(self, node: CompiledNode, uploaded_bytes: Optional[bytes]) -> Tuple[str, str]:
+        """(path, format) an engine read scans: the upload, a saved upload's Parquet copy, or a local file."""
+        fmt = "parquet" if self.engine.canonical(node.func_name) == "read_parquet" else "csv"
+        if uploaded_bytes is not None:
+            session = self.session
+            with self._lock:
+                if self._upload_path is None:
+                    self._upload_path = session.temp_file(uploaded_bytes, "." + fmt)
+            return self._upload_path, fmt
+        saved = UPLOADS.by_source(node.source)
+        if saved is not None:
+            info = saved.get("columnar") or {}
+            options = {k: v for k, v in node.params.items() if k != "filters"}
+            if fmt == "csv" and uploads.columnar_compatible(info, node.func_name, options) \
+                    and os.path.exists(info["path"]):
+                return info["path"], "parquet"
+            return saved["path"], fmt
+        if isinstance(node.source, str) and os.path.isfile(node.source):
+            return node.source, fmt
+        raise self.engine.Unsupported("source is not a local file or upload")
+
+    def run(self, node_id: str, plan: PipelinePlan, executed: Dict[str, Any],
+            uploaded_bytes: Optional[bytes] = None) -> Any:
+        node = plan.compiled[node_id]
+        session = self.session
+        try:
             try:
-                if is_indexer:
-                    if recv is None:
-                        raise HTTPException(status_code=400, detail=f"Node '{node_id}' ({func_name}) requires 'self' (a DataFrame/Series)")
-                    iloc = (func_name == "DataFrame.iloc")
-                    rows = _normalize_indexer(raw_params.pop("rows", None), iloc=iloc)
-                    cols = _normalize_indexer(raw_params.pop("cols", None), iloc=iloc)
-                    idxer = getattr(recv, "iloc" if iloc else "loc")
-                    result = idxer[rows] if (cols is None or (isinstance(cols, slice) and cols == slice(None))) else idxer[rows, cols]
+                if node.is_read:
+                    value = session.read(self.engine.canonical(node.func_name),
+                                         *self._source(node, uploaded_bytes), node.params)
                 else:
-                    func = get_callable_from_name(func_name)
-                    params = coerce_params(raw_params)
-                    params = resolve_param_references(params, executed)
-
-                    if func is pd.merge:
-                        left_obj = params.pop("left", None)
-                        right_obj = params.pop("right", None)
-                        if isinstance(left_obj, str):
-                            left_obj = executed.get(left_obj)
-                        if isinstance(right_obj, str):
-                            right_obj = executed.get(right_obj)
-                        if left_obj is None or right_obj is None:
-                            raise HTTPException(status_code=400, detail=f"Node '{node_id}': pd.merge requires left and right")
-                        result = func(left_obj, right_obj, **params)
-                    else:
-                        if recv is not None:
-                            result = func(recv, **params)
-                        else:
-                            result = func(**params)
-
-            except HTTPException:
-                raise
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error executing node '{node_id}' ({func_name}): {e}")
-
-            executed[node_id] = result
-            remaining.remove(node_id)
-            made_progress = True
-
-            if preview_node and node_id == preview_node:
-                return serialize_result(result)
-
-        if not made_progress:
-            raise HTTPException(status_code=400, detail="Pipeline has cyclic or unsatisfied dependencies.")
-
-    last_key = list(executed.keys())[-1]
-    return serialize_result(executed[last_key])
+                    value = session.apply(node, {d: executed[d] for d in plan.deps[node_id]})
+            except self.engine.Unsupported as e:
+                self.fallbacks[node_id] = str(e)
+                inputs = {d: session.collect(executed[d]) for d in plan.deps[node_id]}
+                return execute_node(node_id, plan.nodes[node_id], inputs, uploaded_bytes, node)
+            return session.collect(value, node_id) if node_id in self.collect else value
+        except (HTTPException, RunInterrupted):
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error executing node '{node_id}' ({node.func_name}): {e}")
+
+
+def plan_engine(spec: Dict[str, Any], plan: PipelinePlan, order: List[str],
+                keep: Set[str]) -> Optional[EnginePlan]:
+    name = str(spec.get("engine") or "pandas").lower()
+    if name == "pandas":
+        return None
+    engine = ENGINES.get(name)
+    if engine is None:
+        raise HTTPException(status_code=400, detail=f"Unknown engine '{name}' (expected one of: pandas, {', '.join(ENGINES)})")
+    if not engine.available():
+        raise HTTPException(status_code=400, detail=f"engine: {name} requires the {name} package on the server")
+    if str(spec.get("mode") or "").lower() == "stream":
+        raise HTTPException(status_code=400, detail=f"engine: {name} can't be combined with mode: stream")
+
+    reasons = {nid: plan.compiled[nid].error
+               or ("optimize: runs in pandas" if plan.compiled[nid].optimize is not None else None)
+               or engine.capability(plan.compiled[nid]) for nid in order}
+    selected = set(order)
+    roles: Set[str] = set()
+    for nid in order:
+        if reasons[nid] is None and (plan.compiled[nid].is_read or plan.deps[nid] & roles):
+            roles.add(nid)
+    # A read no engine node consumes would only be parsed twice; drop it, then what it alone fed
+    changed = True
+    while changed:
+        changed = False
+        for nid in order:
+            if nid not in roles:
+                continue
+            if plan.compiled[nid].is_read:
+                if not any(c in roles for c in plan.consumers[nid] if c in selected):
+                    roles.discard(nid)
+                    changed = True
+            elif not plan.deps[nid] & roles:
+                roles.discard(nid)
+                changed = True
+    for nid in order:
+        if reasons[nid] is None and nid not in roles:
+            reasons[nid] = "no input or consumer runs in " + name
+    collect = {nid for nid in roles
+               if nid in keep or any(c not in roles for c in plan.consumers[nid] if c in selected)}
+    return EnginePlan(engine, roles, collect, reasons)
+
+
+def _result_mismatch(actual: Any, expected: Any) -> Optional[str]:
+    """None when an engine result equals the pandas one, else what differs."""
+    try:
+        if isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(actual, expected)
+        elif isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(actual, expected)
+        elif isinstance(expected, np.ndarray):
+            np.testing.assert_array_equal(actual, expected)
+        elif type(actual) is not type(expected):
+            return f"{type(actual).__name__} != {type(expected).__name__}"
+    except AssertionError as e:
+        return " ".join(str(e).split())[:500]
+    return None
+
+
+# ======================== Pipeline executor ========================
+
+# Default thread-pool size for a run; callers may override per run up to the cap
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+PIPELINE_MAX_WORKERS_CAP = max(PIPELINE_MAX_WORKERS, int(os.getenv("PIPELINE_MAX_WORKERS_CAP", str(os.cpu_count() or 1))))
+
+
+READ_INGEST_FALLBACKS = metrics.counter(
+    "tharavu_read_ingest_fallbacks_total",
+    "Arrow-ingest reads retried with pandas' default parser and dtypes.",
+    ("function",),
+)
+
+
+def _with_ingest_fallback(node: CompiledNode, func: Callable) -> Callable:
+    # Per file: pyarrow rejects some inputs (an option value, a ragged row); the retry drops
+    # only what arrow ingestion added, so a genuine error is raised by the retry unchanged
+    def read(**params):
+        try:
+            return func(**params)
+        except Exception:
+            src = params.get(node.source_arg)
+            if hasattr(src, "seek"):
+                src.seek(0)
+            READ_INGEST_FALLBACKS.inc(function=node.func_name.split(".")[-1])
+            return func(**{k: v for k, v in params.items() if k not in node.ingest_options})
+    return read
+
+
+def execute_node(node_id: str, node_def: Dict[str, Any], executed: Dict[str, Any],
+                 uploaded_bytes: Optional[bytes] = None,
+                 compiled: Optional[CompiledNode] = None,
+                 upload_digest: Optional[str] = None,
+                 share_uploads: bool = False) -> Any:
+    # Compiled plans hand in their node; ad-hoc callers (chunks, process workers) compile here.
+    # With `share_uploads`, read_* nodes share one parse per upload digest across nodes and runs.
+    node = compiled or CompiledNode(node_def)
+    func_name = node.func_name
+
+    recv = None
+    if node.has_receiver:
+        k = node.receiver
+        recv = executed.get(k) if isinstance(k, str) else k
+
+    params = node.params
+    # read_* auto: feed uploaded file bytes (using canonical key)
+    if uploaded_bytes is not None and node.is_read:
+        params = dict(params, filepath_or_buffer=BytesIO(uploaded_bytes))
+
+    try:
+        if node.is_indexer:
+            if recv is None:
+                raise HTTPException(status_code=400, detail=f"Node '{node_id}' ({func_name}) requires 'self' (a DataFrame/Series)")
+            if node.error is not None:
+                raise ValueError(node.error)
+            rows, cols = node.rows, node.cols
+            idxer = getattr(recv, "iloc" if func_name == "DataFrame.iloc" else "loc")
+            return idxer[rows] if (cols is None or (isinstance(cols, slice) and cols == slice(None))) else idxer[rows, cols]
+
+        if node.error is not None:
+            raise ValueError(node.error)
+        func = node.func
+        params = resolve_param_references(params, executed)
+
+        if node.is_read:
+            if node.ingest_options:
+                func = _with_ingest_fallback(node, func)
+            params = pushdown.bind_columns(func_name, params)
+            row_filter = params.pop("filters", None) if isinstance(params.get("filters"), pushdown.RowGroupFilter) else None
+            if "filepath_or_buffer" in params and node.source_arg != "filepath_or_buffer":
+                params = dict(params)
+                params[node.source_arg] = params.pop("filepath_or_buffer")
+            saved = None
+            if uploaded_bytes is not None:
+                digest, load = upload_digest, (lambda: func(**params))
+            else:
+                # A read naming a file saved via /files/upload uses its Parquet copy when ready
+                saved = UPLOADS.by_source(node.source)
+                if saved is None and uploads.is_saved_ref(node.source):
+                    raise FileNotFoundError(f"Unknown or modified upload '{node.source}'")
+                digest = saved["digest"] if saved else None
+                load = None
+            if saved is not None:
+                load = lambda: uploads.load_saved(saved, func_name, func, params, node.source_arg, row_filter)
+            elif row_filter is not None and uploaded_bytes is None:
+                load = lambda: pushdown.read_parquet_pruned(params.get(node.source_arg), row_filter,
+                                                            params.get("columns"), lambda: func(**params),
+                                                            params.get("dtype_backend"))
+            key = uploads.parse_key(digest, func_name, node.key_params) if share_uploads and digest else None
+            if key is not None:
+                return uploads.get_or_parse(key, load)
+            if load is not None:
+                return load()
+
+        if func is pd.merge:
+            left_obj = params.pop("left", None)
+            right_obj = params.pop("right", None)
+            if isinstance(left_obj, str):
+                left_obj = executed.get(left_obj)
+            if isinstance(right_obj, str):
+                right_obj = executed.get(right_obj)
+            if left_obj is None or right_obj is None:
+                raise HTTPException(status_code=400, detail=f"Node '{node_id}': pd.merge requires left and right")
+            return func(left_obj, right_obj, **params)
+        if recv is not None:
+            return func(recv, **params)
+        return func(**params)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error executing node '{node_id}' ({func_name}): {e}")
+
+
+def _resolve_max_workers(spec: Dict[str, Any], max_workers: Optional[int]) -> int:
+    raw = max_workers if max_workers is not None else spec.get("max_workers", PIPELINE_MAX_WORKERS)
+    try:
+        n = int(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"'max_workers' must be an integer, got {raw!r}")
+    return max(1, min(n, PIPELINE_MAX_WORKERS_CAP))
+
+
+def process_nodes_for(spec: Dict[str, Any], order: List[str]) -> Set[str]:
+    """
+    Nodes routed to the process pool via `executor: process` or
+    PIPELINE_PROCESS_FUNCTIONS, plus nodes with `timeout_s` and no executor
+    hint: a worker can be killed when the node overruns, a thread can't.
+    """
+    chosen = {nid for nid in order if process_executor.wants_process(spec, spec["nodes"][nid])}
+    if chosen and not process_executor.available():
+        raise HTTPException(status_code=400, detail="executor: process requires pyarrow on the server")
+    if process_executor.available():
+        chosen |= {nid for nid in order
+                   if spec["nodes"][nid].get("timeout_s") not in (None, "")
+                   and not (spec["nodes"][nid].get("executor") or spec.get("executor"))}
+    return chosen
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+# How often a run's peak RSS is sampled while its nodes execute (0: only between nodes)
+RSS_SAMPLE_INTERVAL_S = float(os.getenv("PIPELINE_RSS_SAMPLE_INTERVAL_S", "0.01"))
+
+
+class RssSampler:
+    """
+    Highest RSS seen during a run. A node's temporaries are freed by the time
+    it returns, so a background thread polls while nodes execute; node
+    boundaries are sampled too. Process-wide: concurrent runs see each other.
+    """
+
+    def __init__(self, interval_s: Optional[float] = None):
+        self.interval_s = RSS_SAMPLE_INTERVAL_S if interval_s is None else interval_s
+        self.start_bytes = self.peak_bytes = current_rss()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if self.interval_s > 0:
+            self._thread = threading.Thread(target=self._poll, name="rss-sampler", daemon=True)
+            self._thread.start()
+
+    def _poll(self):
+        while not self._stop.wait(self.interval_s):
+            self.sample()
+
+    def sample(self) -> int:
+        self.peak_bytes = max(self.peak_bytes, current_rss())
+        return self.peak_bytes
+
+    def stop(self) -> int:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.sample()
+
+
+def _release(executed: Dict[str, Any], node_id: str) -> bool:
+    try:
+        del executed[node_id]
+        return True
+    except KeyError:
+        return False
+
+
+PARTIAL_PREVIEW_ROWS = int(os.getenv("PIPELINE_PARTIAL_PREVIEW_ROWS", "20"))
+
+
+def _head_preview(value: Any) -> Any:
+    """Small detached copy of a finished result, kept for partial responses."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.head(PARTIAL_PREVIEW_ROWS).copy()
+    if isinstance(value, np.ndarray):
+        return value.flatten()[:PARTIAL_PREVIEW_ROWS].copy()
+    if isinstance(value, GeneratorType) or is_lazy(value):
+        return None
+    return value
+
+
+class RunInterrupted(Exception):
+    """A run stopped early: status is "cancelled" or "timeout"."""
+
+    def __init__(self, status: str, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.completed: Dict[str, Any] = {}  # node id -> head preview, filled by run_plan
+
+    def partial(self) -> Dict[str, Any]:
+        return {
+            "detail": self.reason,
+            "status": self.status,
+            "completed": list(self.completed),
+            "previews": {nid: serialize_result(v) for nid, v in self.completed.items()},
+        }
+
+
+class RunControl:
+    """Cancellation flag and run deadline shared by everything executing one run."""
+
+    def __init__(self, cancel_event: Optional[threading.Event] = None, deadline_s: Optional[float] = None):
+        self.cancel_event = cancel_event or threading.Event()
+        self.deadline_s = deadline_s
+        self.deadline = time.monotonic() + deadline_s if deadline_s else None
+        # Set once the run gave up; node threads it abandoned must not publish results
+        self.stopped = False
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise RunInterrupted("cancelled", "Run was cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise RunInterrupted("timeout", f"Run exceeded its deadline of {self.deadline_s:g}s")
+
+
+def _positive_seconds(value: Any, what: str) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        seconds = float(value)
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"{what} must be a number of seconds, got {value!r}")
+    if seconds <= 0:
+        raise HTTPException(status_code=400, detail=f"{what} must be positive, got {value!r}")
+    return seconds
+
+
+def _result_shape(value: Any) -> Tuple[Optional[int], Optional[int]]:
+    if isinstance(value, pd.DataFrame):
+        return len(value), value.shape[1]
+    if isinstance(value, pd.Series):
+        return len(value), 1
+    if isinstance(value, np.ndarray):
+        return (value.shape[0], value.shape[1] if value.ndim > 1 else 1) if value.ndim else (1, 1)
+    return None, None
+
+
+class RunProfile:
+    """
+    Opt-in per-node measurements for one run (`profile: true`). CPU time is
+    the executing thread's, so it is None for process-pool nodes; RSS deltas
+    are process-wide and overlap when nodes run concurrently.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def _describe_result(self, value: Any) -> Dict[str, Any]:
+        if isinstance(value, GeneratorType):
+            return {"rows_out": None, "cols_out": None, "bytes": None, "streamed": True}
+        if is_lazy(value):
+            return {"rows_out": None, "cols_out": None, "bytes": None, "deferred": True}
+        rows, cols = _result_shape(value)
+        return {"rows_out": rows, "cols_out": cols, "bytes": node_cache.result_nbytes(value)}
+
+    def measure(self, node_id: str, compute: Callable[[], Any], executor: str = "thread") -> Any:
+        rss0 = current_rss()
+        c0 = time.thread_time()
+        t0 = time.perf_counter()
+        result = compute()
+        entry = {
+            "wall_s": time.perf_counter() - t0,
+            "cpu_s": None if executor == "process" else time.thread_time() - c0,
+            "rss_delta_bytes": current_rss() - rss0,
+            "executor": executor,
+            **self._describe_result(result),
+        }
+        with self._lock:
+            self.nodes[node_id] = entry
+        return result
+
+    def annotate(self, node_id: str, **fields: Any):
+        with self._lock:
+            if node_id in self.nodes:
+                self.nodes[node_id].update(fields)
+
+    def record_hit(self, node_id: str, value: Any):
+        entry = {"wall_s": 0.0, "cpu_s": 0.0, "rss_delta_bytes": 0, "executor": "cache",
+                 **self._describe_result(value)}
+        with self._lock:
+            self.nodes[node_id] = entry
+
+    def report(self, plan: PipelinePlan, cache_keys: Dict[str, Optional[str]],
+               cache_enabled: bool) -> Dict[str, Any]:
+        """Entries in plan order, with inputs, cache status and the critical path marked."""
+        with self._lock:
+            entries = {nid: dict(self.nodes[nid]) for nid in plan.order if nid in self.nodes}
+
+        # Longest wall-time chain through the nodes this run touched
+        finish: Dict[str, float] = {}
+        via: Dict[str, Optional[str]] = {}
+        for nid, entry in entries.items():
+            deps = [d for d in plan.deps[nid] if d in finish]
+            prev = max(deps, key=finish.__getitem__, default=None)
+            via[nid] = prev
+            finish[nid] = entry["wall_s"] + (finish[prev] if prev else 0.0)
+        path: List[str] = []
+        nid = max(finish, key=finish.__getitem__, default=None)
+        while nid is not None:
+            path.append(nid)
+            nid = via[nid]
+        path.reverse()
+
+        for nid, entry in entries.items():
+            entry["inputs"] = {
+                d: {"rows": entries[d]["rows_out"], "cols": entries[d]["cols_out"]}
+                for d in sorted(plan.deps[nid]) if d in entries
+            }
+            if entry["executor"] == "cache":
+                entry["cache"] = "hit"
+            elif not cache_enabled:
+                entry["cache"] = "off"
+            else:
+                entry["cache"] = "miss" if cache_keys.get(nid) is not None else "uncacheable"
+            entry["critical"] = nid in path
+            if nid in plan.projection:
+                entry["columns_read"] = plan.projection[nid]
+            if nid in plan.predicates:
+                entry["filters"] = plan.predicates[nid]
+        return {
+            "wall_s": time.perf_counter() - self._t0,
+            "nodes": entries,
+            "critical_path": path,
+            "critical_path_s": finish[path[-1]] if path else 0.0,
+        }
+
+
+# How often the scheduler wakes to notice cancellation and expired timeouts
+_CONTROL_POLL_S = 0.25
+
+
+NODE_SECONDS = metrics.histogram(
+    "tharavu_pipeline_node_duration_seconds",
+    "Pipeline node execution time by function (streamed nodes: generator setup only).",
+    ("function",),
+)
+
+
+def _function_label(node: CompiledNode) -> str:
+    # Only resolvable names become label values; YAML typos would grow the series set
+    if node.func is not None or node.is_indexer:
+        return node.func_name
+    return "unresolved"
+
+
+def run_plan(plan: PipelinePlan, order: List[str], executed: Dict[str, Any],
+             uploaded_bytes: Optional[bytes] = None, max_workers: int = 1,
+             process_nodes: Set[str] = frozenset(),
+             cache_keys: Optional[Dict[str, Optional[str]]] = None,
+             keep: Optional[Set[str]] = None,
+             stream: Optional[StreamPlan] = None,
+             control: Optional[RunControl] = None,
+             profile: Optional[RunProfile] = None,
+             upload_digest: Optional[str] = None,
+             share_uploads: bool = False,
+             engine: Optional[EnginePlan] = None) -> Dict[str, Any]:
+    """
+    Execute `order` (a dependency-closed slice of the plan) into `executed`.
+    With max_workers > 1 every node is handed to a thread pool as soon as its
+    last dependency finishes, so independent branches overlap wherever pandas
+    releases the GIL (C/pyarrow CSV parsing, sorts, numeric reductions).
+    Nodes in `process_nodes` are shipped to the warm process pool instead.
+    Results with a key in `cache_keys` are stored in the node result cache.
+    When `keep` is given, every other result is dropped as soon as its last
+    consumer in `order` has run. Nodes in `stream.roles` produce chunk
+    generators (see plan_streaming); nodes in `engine.roles` run in that
+    engine (see plan_engine). Read nodes with `optimize` have their frame's
+    dtypes shrunk (downcast.py) before it is cached or consumed.
+
+    `control` is checked between nodes and between streamed chunks; node
+    `timeout_s` and the run deadline raise RunInterrupted carrying previews of
+    the nodes that finished. Process-pool nodes (which `timeout_s` nodes are,
+    unless they say otherwise) are killed with their workers; a thread stuck
+    in a node can't be killed and is abandoned, its result discarded uncached.
+    With `profile`, every executed node is measured into it (optimized reads
+    also get a `dtypes` entry with bytes before/after). `share_uploads`
+    lets in-thread read nodes share parsed uploads (see uploads.py).
+    Returns RSS/freeing stats for the run; the peak is polled while nodes run (RssSampler).
+    """
+    watched = control is not None
+    control = control or RunControl()
+    timeouts = {nid: t for nid in order
+                if (t := _positive_seconds(plan.nodes[nid].get("timeout_s"), f"Node '{nid}' timeout_s"))}
+    proc = process_executor.ProcessRun(uploaded_bytes) if process_nodes else None
+    if stream is not None:
+        stream.check = control.check
+    cache_keys = cache_keys or {}
+    pending = plan.consumer_counts(order)
+    previews: Dict[str, Any] = {}
+    started: Dict[str, float] = {}
+    rss = RssSampler()
+    stats = {"rss_start_bytes": rss.start_bytes, "rss_peak_bytes": rss.start_bytes, "freed_early": 0}
+
+    optimized: Dict[str, Dict[str, Any]] = {}
+
+    def compute(nid: str) -> Any:
+        if stream is not None and nid in stream.roles:
+            return stream.run(nid, plan, executed, uploaded_bytes)
+        if engine is not None and nid in engine.roles:
+            return engine.run(nid, plan, executed, uploaded_bytes)
+        if proc is not None and nid in process_nodes:
+            result = proc.execute(execute_node, nid, plan.nodes[nid], sorted(plan.deps[nid]), executed)
+        else:
+            result = execute_node(nid, plan.nodes[nid], executed, uploaded_bytes, plan.compiled[nid],
+                                  upload_digest, share_uploads)
+        if plan.compiled[nid].optimize is not None:
+            # After the read, not inside it: shared upload parses stay unoptimized
+            result, report = downcast.optimize_frame(result, plan.compiled[nid].optimize)
+            if report is not None:
+                optimized[nid] = report
+        return result
+
+    def run_one(nid: str) -> Any:
+        control.check()
+        started[nid] = time.monotonic()
+        t0 = time.perf_counter()
+        if profile is not None:
+            if engine is not None and nid in engine.roles:
+                executor = engine.engine.NAME
+            else:
+                executor = "process" if nid in process_nodes else "thread"
+            result = profile.measure(nid, lambda: compute(nid), executor)
+            if nid in optimized:
+                profile.annotate(nid, dtypes=optimized.pop(nid))
+        else:
+            result = compute(nid)
+        NODE_SECONDS.observe(time.perf_counter() - t0, function=_function_label(plan.compiled[nid]))
+        if cache_keys.get(nid) is not None and not control.stopped:
+            node_cache.NODE_CACHE.put(cache_keys[nid], result)
+        return result
+
+    def finish(nid: str, result: Any):
+        executed[nid] = result
+        previews[nid] = _head_preview(result)
+        rss.sample()
+        if keep is None:
+            return
+        for d in plan.deps[nid]:
+            pending[d] -= 1
+            if pending[d] == 0 and d not in keep and _release(executed, d):
+                stats["freed_early"] += 1
+        if pending[nid] == 0 and nid not in keep and _release(executed, nid):
+            stats["freed_early"] += 1
+
+    def done() -> Dict[str, Any]:
+        stats["rss_peak_bytes"] = rss.stop()
+        stats["rss_end_bytes"] = current_rss()
+        return stats
+
+    # The inline path can't notice a cancel or a clock while a node runs
+    if (max_workers <= 1 or len(order) <= 1) and not watched and not timeouts:
+        try:
+            for node_id in order:
+                finish(node_id, run_one(node_id))
+        except RunInterrupted as e:
+            e.completed = previews
+            raise
+        finally:
+            rss.stop()
+            if proc is not None:
+                proc.close()
+        return done()
+
+    selected = set(order)
+    # Deps outside `order` (cache hits) are already in `executed`
+    waiting = {nid: len(plan.deps[nid] & selected) for nid in order}
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+    running: Dict[Future, str] = {}
+    interrupted = False
+
+    def submit(nid: str):
+        running[pool.submit(run_one, nid)] = nid
+
+    def next_wakeup() -> float:
+        now = time.monotonic()
+        limits = [_CONTROL_POLL_S]
+        if control.deadline is not None:
+            limits.append(control.deadline - now)
+        for nid in running.values():
+            if nid in timeouts and nid in started:
+                limits.append(started[nid] + timeouts[nid] - now)
+        return max(0.0, min(limits))
+
+    def check_timeouts():
+        now = time.monotonic()
+        for fut, nid in running.items():
+            if not fut.done() and nid in timeouts and nid in started and now - started[nid] >= timeouts[nid]:
+                raise RunInterrupted(
+                    "timeout",
+                    f"Node '{nid}' ({plan.nodes[nid].get('function')}) exceeded timeout_s={timeouts[nid]:g}",
+                )
+
+    try:
+        for nid in order:
+            if waiting[nid] == 0:
+                submit(nid)
+        while running:
+            finished, _ = wait(running, timeout=next_wakeup(), return_when=FIRST_COMPLETED)
+            control.check()
+            check_timeouts()
+            # Retire in plan order so the first error reported is deterministic
+            for fut in sorted(finished, key=lambda f: plan.position[running[f]]):
+                nid = running.pop(fut)
+                finish(nid, fut.result())
+                for c in plan.consumers[nid]:
+                    if c in selected:
+                        waiting[c] -= 1
+                        if waiting[c] == 0:
+                            submit(c)
+    except RunInterrupted as e:
+        interrupted = control.stopped = True
+        e.completed = previews
+        raise
+    finally:
+        # Don't wait on a runaway node; kill process workers so they stop too
+        pool.shutdown(wait=not interrupted, cancel_futures=True)
+        rss.stop()
+        if proc is not None:
+            if interrupted:
+                proc.abort()
+            proc.close()
+    return done()
+
+
+@app.post("/pipeline/explain")
+async def pipeline_explain(
+    yaml_text: Optional[str] = Form(None),
+    yaml: Optional[str] = Form(None),
+    preview_node: Optional[str] = Form(None),
+    outputs: Optional[str] = Form(None),
+):
+    spec, plan = compile_pipeline(yaml_text if yaml_text is not None else yaml)
+    targets = [preview_node] if preview_node else requested_outputs(spec, outputs)
+    if preview_node and preview_node not in plan.nodes:
+        raise HTTPException(status_code=400, detail=f"Unknown preview node '{preview_node}'")
+    out = plan.describe(targets)
+    keep = set(targets) if targets else set(plan.order[-1:])
+    out["projection"] = plan_projection(spec, plan, out["execute"], keep)
+    out["predicates"] = plan_predicates(spec, plan, out["execute"], keep)
+    stream = plan_streaming(spec, plan, out["execute"], keep)
+    if stream is not None:
+        out["stream"] = stream.describe()
+    engine = plan_engine(spec, plan, out["execute"], keep)
+    if engine is not None:
+        out["engine"] = engine.describe()
+    return out
+
+
+def run_pipeline(raw_yaml: Optional[str], preview_node: Optional[str] = None,
+                 outputs: Optional[str] = None, max_workers: Optional[int] = None,
+                 uploaded_bytes: Optional[bytes] = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 deadline_s: Optional[float] = None,
+                 profile: Optional[str] = None,
+                 upload_digest: Optional[str] = None,
+                 window: Optional["ResultWindow"] = None,
+                 result_format: str = "json",
+                 stream_response: bool = False) -> Any:
+    """
+    Synchronous body of a pipeline run; called from a job worker thread.
+    Returns the JSON response dict, an EncodedResult for binary formats, or
+    a StreamedResult when `stream_response` asks for a chunked body.
+    """
+    spec, plan = compile_pipeline(raw_yaml)
+    nodes: Dict[str, Any] = spec["nodes"]
+    if not nodes:
+        raise HTTPException(status_code=400, detail="Pipeline has no nodes")
+    if preview_node and preview_node not in nodes:
+        raise HTTPException(status_code=400, detail=f"Unknown preview node '{preview_node}'")
+
+    # Only the ancestors of what the caller will actually see get executed
+    output_ids = [] if preview_node else requested_outputs(spec, outputs)
+    targets = [preview_node] if preview_node else output_ids
+    if (result_format != "json" or stream_response) and len(output_ids) > 1:
+        what = "a streamed response" if stream_response else f"format {result_format}"
+        raise HTTPException(status_code=400, detail=f"{what} returns one result; "
+                                                    "ask for a single output or a preview_node")
+    workers = _resolve_max_workers(spec, max_workers)
+    deadline = _positive_seconds(deadline_s if deadline_s is not None else spec.get("deadline_s"), "deadline_s")
+    control = RunControl(cancel_event, deadline)
+    profiled = _truthy(profile if profile is not None else spec.get("profile", False))
+    if uploaded_bytes is not None and upload_digest is None:
+        upload_digest = uploads.digest_bytes(uploaded_bytes)
+
+    executed = spill.SpillingResults(SPILL_DIR) if spill.spilling_enabled() else {}
+    try:
+        return _run_and_serialize(spec, plan, targets, preview_node, output_ids,
+                                  executed, uploaded_bytes, workers, control,
+                                  RunProfile() if profiled else None, upload_digest, window, result_format,
+                                  stream_response)
+    finally:
+        if isinstance(executed, spill.SpillingResults):
+            executed.close()
+
+
+def _streamed_result(target: str, value: Any, window: Optional["ResultWindow"],
+                     result_format: str) -> result_formats.StreamedResult:
+    headers = {"X-Pipeline-Node": str(target)}
+    if isinstance(value, GeneratorType):
+        chunks, rows, cols = value, None, None  # mode: stream: forwarded as the chunks are produced
+    else:
+        chunks = result_formats.iter_chunks(value)
+        rows, cols = _result_shape(value)
+        rows, cols = (1, 1) if rows is None else (rows, cols)
+        headers.update({"X-Total-Rows": str(rows), "X-Total-Columns": str(cols)})
+    seen = {"rows": 0, "cols": None, "done": False}
+
+    def counted():
+        try:
+            for chunk in chunks:
+                seen["rows"] += len(chunk)
+                if seen["cols"] is None:
+                    seen["cols"] = chunk.shape[1] if isinstance(chunk, pd.DataFrame) else 1
+                yield chunk
+            seen["done"] = True
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def trailer() -> Dict[str, Any]:
+        # A forwarded stream's total is only known if it was drained (no limit cut it short)
+        total = rows if rows is not None else (seen["rows"] if seen["done"] else None)
+        return {"offset": window.offset if window else 0, "total_rows": total,
+                "total_columns": cols if cols is not None else seen["cols"]}
+
+    source = counted()
+    # Forwarded chunks carry source row labels that later chunks may not continue (after a filter)
+    return result_formats.StreamedResult(result_format, window.over_chunks(source) if window else source,
+                                         headers, trailer, index=True if rows is None else None)
+
+
+def _run_and_serialize(spec: Dict[str, Any], plan: PipelinePlan, targets: List[str],
+                       preview_node: Optional[str], output_ids: List[str],
+                       executed: Dict[str, Any], uploaded_bytes: Optional[bytes],
+                       workers: int, control: Optional[RunControl] = None,
+                       profile: Optional[RunProfile] = None,
+                       upload_digest: Optional[str] = None,
+                       window: Optional["ResultWindow"] = None,
+                       result_format: str = "json",
+                       stream_response: bool = False) -> Any:
+    order = plan.execution_order(targets)
+    # Free each intermediate after its last consumer; keep only what gets serialized
+    keep = set(targets) if targets else {plan.order[-1]}
+    plan = plan.with_pushdown(plan_projection(spec, plan, order, keep),
+                              plan_predicates(spec, plan, order, keep))
+    target = preview_node or (output_ids[0] if output_ids else plan.order[-1])
+    # A streamed response drains the target's chunks itself (mode: stream) instead of collecting them
+    stream = plan_streaming(spec, plan, order, keep, target if stream_response else None)
+    engine = plan_engine(spec, plan, order, keep)
+    keys: Dict[str, Optional[str]] = {}
+    hits = 0
+    # Chunk generators and engine relations can't be cached; those runs always recompute
+    use_cache = stream is None and engine is None and node_cache.NODE_CACHE.enabled \
+        and spec.get("cache", True) is not False
+    if use_cache:
+        keys = node_cache_keys(plan, order, upload_digest)
+        order, hits = serve_from_cache(plan, order, targets, keys, executed)
+        if profile is not None:
+            for nid in executed:
+                profile.record_hit(nid, executed[nid])
+
+    # Parsed uploads come out as detached copies, so in-place nodes can share them too
+    try:
+        memory = run_plan(plan, order, executed, uploaded_bytes, workers,
+                          process_nodes_for(spec, order), keys, keep, stream, control, profile,
+                          upload_digest, True, engine)
+    finally:
+        if engine is not None:
+            engine.close()
+
+    if stream_response:
+        return _streamed_result(target, executed[target], window, result_format)
+    if result_format != "json":
+        value = executed[target]
+        rows, cols = _result_shape(value)
+        try:
+            body = result_formats.encode(window.apply(value) if window else value, result_format)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Could not encode node '{target}' as {result_format}: {e}")
+        headers = {"X-Pipeline-Node": str(target), "X-Total-Rows": str(rows if rows is not None else 1),
+                   "X-Total-Columns": str(cols if cols is not None else 1)}
+        return result_formats.EncodedResult(result_format, body, headers)
+
+    if preview_node:
+        response = serialize_result(executed[preview_node], window)
+    elif output_ids:
+        response = {"outputs": {nid: serialize_result(executed[nid], window) for nid in output_ids}}
+    else:
+        response = serialize_result(executed[plan.order[-1]], window)
+    response["cache"] = {
+        "hits": hits,
+        "misses": sum(1 for nid in order if keys.get(nid) is not None),
+        "uncacheable": sum(1 for nid in order if keys.get(nid) is None),
+        **{k: v for k, v in node_cache.NODE_CACHE.stats().items() if k in ("entries", "bytes", "max_bytes")},
+    }
+    response["memory"] = memory
+    if profile is not None:
+        response["profile"] = profile.report(plan, keys, use_cache)
+    if stream is not None:
+        response["stream"] = stream.describe()
+    if engine is not None:
+        response["engine"] = engine.describe()
+        if _truthy(spec.get("engine_check", False)):
+            # Conformance: the same outputs computed by pandas alone
+            expected: Dict[str, Any] = {}
+            run_plan(plan, order, expected, uploaded_bytes, workers, process_nodes_for(spec, order),
+                     keep=keep, control=control, upload_digest=upload_digest)
+            mismatches = {nid: m for nid in sorted(keep)
+                          if (m := _result_mismatch(executed[nid], expected[nid])) is not None}
+            response["engine"]["check"] = {"match": not mismatches, "mismatches": mismatches}
+    if isinstance(executed, spill.SpillingResults):
+        response["spill"] = executed.stats()
+    return response
+
+
+# ======================== Pipeline jobs ========================
+
+# Runs execute on this bounded pool, never on the event loop
+PIPELINE_JOB_WORKERS = int(os.getenv("PIPELINE_JOB_WORKERS", "2"))
+PIPELINE_JOB_QUEUE_LIMIT = int(os.getenv("PIPELINE_JOB_QUEUE_LIMIT", "64"))
+PIPELINE_JOB_HISTORY = int(os.getenv("PIPELINE_JOB_HISTORY", "200"))
+# A streamed body nobody has read from for this long is abandoned (the client never started reading)
+PIPELINE_STREAM_IDLE_S = float(os.getenv("PIPELINE_STREAM_IDLE_S", "300"))
+# Finished jobs' stored results (encoded bodies, JSON responses) are held up to this many bytes in all
+PIPELINE_JOB_HISTORY_BYTES = int(os.getenv("PIPELINE_JOB_HISTORY_BYTES", str(256 * 2**20)))
+
+
+class PipelineJob:
+    def __init__(self, request: Dict[str, Any], job_id: Optional[str] = None, kept: bool = True):
+        self.id = job_id or uuid.uuid4().hex
+        # /pipeline/jobs results stay in the history; /pipeline/run hands its result back directly
+        self.kept = kept
+        self.request: Optional[Dict[str, Any]] = request
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.result_bytes = 0
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+        # Resolved once the result can be answered: the run ended, or its streamed body started
+        self.ready: Future = Future()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled", "timeout")
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobStream:
+    """
+    A streamed result's body, encoded on its job's pool thread while the
+    response sends it, a few pieces ahead. The job stays running, and
+    DELETE can stop it, until the body is drained or the client leaves.
+    """
+
+    BUFFERED_PIECES = 4
+    _END = object()
+
+    def __init__(self, result: result_formats.StreamedResult, cancel_event: threading.Event):
+        self.media_type = result.media_type
+        self.headers = result.headers
+        self._result = result
+        self._cancel = cancel_event
+        self._pieces: "queue.Queue[Any]" = queue.Queue(maxsize=self.BUFFERED_PIECES)
+        self._closed = threading.Event()
+        self._claimed = False
+        self._claim_lock = threading.Lock()
+        self.on_close: Optional[Callable[[], None]] = None
+
+    def pump(self):
+        """Encode the body into the buffer (on the job thread); raises whatever stopped it."""
+        try:
+            for piece in self._result:
+                if self._cancel.is_set():
+                    raise RunInterrupted("cancelled", "Run was cancelled")
+                self._put(piece)
+            self._put(self._END)
+        except BaseException as e:
+            # The response ends with the error; the job records it
+            self._put(e, fail=False)
+            raise
+        finally:
+            self._result.close()
+
+    def _put(self, item: Any, fail: bool = True):
+        idle_until = time.monotonic() + PIPELINE_STREAM_IDLE_S
+        while not self._closed.is_set() and time.monotonic() < idle_until:
+            try:
+                self._pieces.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if fail and self._cancel.is_set():
+                    raise RunInterrupted("cancelled", "Run was cancelled")
+        if fail:
+            raise RunInterrupted("cancelled", "Client stopped reading the streamed result")
+
+    def claim(self) -> bool:
+        """True for the one response that may send the body."""
+        with self._claim_lock:
+            claimed, self._claimed = self._claimed, True
+        return not claimed
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            while True:
+                item = self._pieces.get()
+                if item is self._END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        if not self._closed.is_set():
+            self._closed.set()
+            if self.on_close is not None:
+                self.on_close()
+
+
+_job_pool = ThreadPoolExecutor(max_workers=PIPELINE_JOB_WORKERS, thread_name_prefix="pipeline-job")
+_jobs: "OrderedDict[str, PipelineJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+RUNS_IN_FLIGHT = metrics.gauge("tharavu_pipeline_runs_in_flight", "Pipeline runs currently executing.")
+
+
+def _job_status_samples():
+    with _jobs_lock:
+        statuses = [j.status for j in _jobs.values()]
+    return [({"status": st}, statuses.count(st)) for st in sorted(set(statuses))]
+
+
+metrics.REGISTRY.collector("tharavu_pipeline_jobs", "Tracked pipeline jobs by status.", _job_status_samples)
+
+
+def _run_job(job: PipelineJob):
+    try:
+        # Cancelled after the pool picked the job up but before it ran: the finally still resolves and prunes
+        if job.cancel_event.is_set():
+            raise RunInterrupted("cancelled", "Run was cancelled before it started")
+        job.status = "running"
+        job.started_at = time.time()
+        with RUNS_IN_FLIGHT.track_inprogress():
+            result = run_pipeline(cancel_event=job.cancel_event, **job.request)
+            if isinstance(result, result_formats.StreamedResult):
+                # The body is encoded here, inside the bounded job pool, as the response sends it
+                job.result = JobStream(result, job.cancel_event)
+                job.request = None
+                job.ready.set_result(None)
+                job.result.pump()
+            else:
+                job.result = result
+        job.status = "succeeded"
+    except RunInterrupted as e:
+        job.status = e.status
+        job.result = e.partial()
+    except HTTPException as e:
+        job.status = "failed"
+        job.error = {"status_code": e.status_code, "detail": e.detail}
+    except Exception as e:
+        job.status = "failed"
+        job.error = {"status_code": 500, "detail": f"{e.__class__.__name__}: {e}"}
+    finally:
+        job.finished_at = time.time()
+        job.request = None  # drop the uploaded bytes
+        if not job.ready.done():
+            job.ready.set_result(None)
+        if job.kept:
+            job.result_bytes = _result_nbytes(job.result)
+            with _jobs_lock:
+                _prune_jobs(newest=job.id)
+
+
+def _result_nbytes(result: Any) -> int:
+    """About how much a stored job result holds: the encoded body, or the JSON response's size."""
+    if result is None:
+        return 0
+    if isinstance(result, result_formats.EncodedResult):
+        return len(result.body)
+    try:
+        return len(json.dumps(result, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _prune_jobs(newest: Optional[str] = None):
+    # Oldest finished jobs go first, past PIPELINE_JOB_HISTORY jobs or PIPELINE_JOB_HISTORY_BYTES of
+    # results; queued/running ones are never dropped, nor the `newest` result over the byte cap
+    done = [jid for jid, j in _jobs.items() if j.done]
+    excess = len(_jobs) - PIPELINE_JOB_HISTORY
+    held = sum(_jobs[jid].result_bytes for jid in done)
+    for jid in done:
+        if excess <= 0 and (held <= PIPELINE_JOB_HISTORY_BYTES or jid == newest):
+            continue
+        excess -= 1
+        held -= _jobs.pop(jid).result_bytes
+
+
+def submit_job(request: Dict[str, Any], job_id: Optional[str] = None, kept: bool = True) -> PipelineJob:
+    job = PipelineJob(request, job_id, kept)
+    with _jobs_lock:
+        if job.id in _jobs:
+            raise HTTPException(status_code=409, detail=f"Job '{job.id}' already exists")
+        queued = sum(1 for j in _jobs.values() if j.status == "queued")
+        if queued >= PIPELINE_JOB_QUEUE_LIMIT:
+            raise HTTPException(status_code=429, detail="Too many queued pipeline jobs; try again later")
+        _prune_jobs()
+        _jobs[job.id] = job
+    job.future = _job_pool.submit(_run_job, job)
+    return job
+
+
+def get_job(job_id: str) -> PipelineJob:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+
+def cancel_job(job: PipelineJob):
+    job.cancel_event.set()
+    # Still queued: drop it outright; running jobs stop at the next node/chunk boundary
+    if job.future is not None and job.future.cancel():
+        job.status = "cancelled"
+        job.result = RunInterrupted("cancelled", "Run was cancelled before it started").partial()
+        job.finished_at = time.time()
+        job.ready.set_result(None)
+
+
+def job_result(job: PipelineJob) -> Any:
+    if isinstance(job.result, JobStream) and job.status in ("running", "succeeded"):
+        if not job.result.claim():
+            raise HTTPException(status_code=409, detail=f"Job '{job.id}' is streaming its result to its own request")
+        # Starlette pulls each piece on its threadpool while the job thread encodes the next ones
+        return StreamingResponse(iter(job.result), media_type=job.result.media_type,
+                                 headers=job.result.headers, background=BackgroundTask(job.result.close))
+    if job.status == "succeeded":
+        if isinstance(job.result, result_formats.EncodedResult):
+            return Response(content=job.result.body, media_type=job.result.media_type, headers=job.result.headers)
+        return job.result
+    if job.status == "failed":
+        raise HTTPException(status_code=job.error["status_code"], detail=job.error["detail"])
+    # Interrupted runs answer with what finished before the stop
+    if job.status == "cancelled":
+        return JSONResponse(status_code=409, content=job.result)
+    if job.status == "timeout":
+        return JSONResponse(status_code=504, content=job.result)
+    raise HTTPException(status_code=409, detail=f"Job '{job.id}' is still {job.status}")
+
+
+def _read_saved_upload(upload_id: str) -> Tuple[bytes, str]:
+    entry = UPLOADS.lookup(upload_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or modified upload '{upload_id}'")
+    return Path(entry["path"]).read_bytes(), entry["digest"]
+
+
+async def _pipeline_request(yaml_text: Optional[str], yaml: Optional[str], preview_node: Optional[str],
+                            outputs: Optional[str], max_workers: Optional[int],
+                            deadline_s: Optional[float], profile: Optional[str],
+                            file: Optional[UploadFile], upload_id: Optional[str],
+                            offset: Optional[int] = None, limit: Optional[int] = None,
+                            columns: Optional[str] = None, result_format: Optional[str] = None,
+                            accept: Optional[str] = None, stream: bool = False) -> Dict[str, Any]:
+    window = parse_window(offset, limit, columns)
+    try:
+        fmt = result_formats.negotiate(result_format, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result_formats.requires_pyarrow(fmt):
+        raise HTTPException(status_code=400, detail=f"format {fmt} requires pyarrow on the server")
+    if file and upload_id:
+        raise HTTPException(status_code=400, detail="Send either 'file' or 'upload_id', not both")
+    uploaded_bytes = upload_digest = None
+    if file:
+        uploaded_bytes = await file.read()
+        upload_digest = await asyncio.to_thread(uploads.digest_bytes, uploaded_bytes)
+    elif upload_id:
+        uploaded_bytes, upload_digest = await asyncio.to_thread(_read_saved_upload, upload_id)
+    return {
+        "raw_yaml": yaml_text if yaml_text is not None else yaml,
+        "preview_node": preview_node,
+        "outputs": outputs,
+        "max_workers": max_workers,
+        "deadline_s": deadline_s,
+        "profile": profile,
+        "uploaded_bytes": uploaded_bytes,
+        "upload_digest": upload_digest,
+        "window": window,
+        "result_format": fmt,
+        "stream_response": stream,
+    }
+
+
+@app.post("/pipeline/jobs", status_code=202)
+async def pipeline_job_submit(
+    http_request: Request,
+    yaml_text: Optional[str] = Form(None),
+    yaml: Optional[str] = Form(None),
+    preview_node: Optional[str] = Form(None),
+    outputs: Optional[str] = Form(None),
+    max_workers: Optional[int] = Form(None),
+    deadline_s: Optional[float] = Form(None),
+    run_id: Optional[str] = Form(None),
+    profile: Optional[str] = Form(None),
+    upload_id: Optional[str] = Form(None),
+    offset: Optional[int] = Form(None),
+    limit: Optional[int] = Form(None),
+    columns: Optional[str] = Form(None),
+    format: Optional[str] = Form(None),
+    file: Optional[UploadFile] = None,
+):
+    request = await _pipeline_request(yaml_text, yaml, preview_node, outputs, max_workers, deadline_s, profile, file, upload_id,
+                                      offset, limit, columns, format, http_request.headers.get("accept"))
+    return submit_job(request, run_id).describe()
+
+
+@app.get("/pipeline/jobs")
+async def pipeline_job_list():
+    with _jobs_lock:
+        return {"jobs": [j.describe() for j in _jobs.values()]}
+
+
+@app.get("/pipeline/jobs/{job_id}")
+async def pipeline_job_status(job_id: str):
+    return get_job(job_id).describe()
+
+
+@app.get("/pipeline/jobs/{job_id}/result")
+async def pipeline_job_result(job_id: str):
+    return job_result(get_job(job_id))
+
+
+@app.delete("/pipeline/jobs/{job_id}")
+async def pipeline_job_cancel(job_id: str):
+    job = get_job(job_id)
+    if not job.done:
+        cancel_job(job)
+    return job.describe()
+
+
+@app.post("/pipeline/run")
+async def pipeline_run(
+    http_request: Request,
+    yaml_text: Optional[str] = Form(None),
+    yaml: Optional[str] = Form(None),
+    preview_node: Optional[str] = Form(None),
+    outputs: Optional[str] = Form(None),
+    max_workers: Optional[int] = Form(None),
+    deadline_s: Optional[float] = Form(None),
+    run_id: Optional[str] = Form(None),
+    profile: Optional[str] = Form(None),
+    upload_id: Optional[str] = Form(None),
+    offset: Optional[int] = Form(None),
+    limit: Optional[int] = Form(None),
+    columns: Optional[str] = Form(None),
+    format: Optional[str] = Form(None),
+    stream: Optional[str] = Form(None),
+    file: Optional[UploadFile] = None,
+):
+    # A caller-chosen run_id lets another request cancel this run via DELETE /pipeline/jobs/{run_id}.
+    # `stream: true` sends the result as a chunked body, encoded while it is sent.
+    request = await _pipeline_request(yaml_text, yaml, preview_node, outputs, max_workers, deadline_s, profile, file, upload_id,
+                                      offset, limit, columns, format, http_request.headers.get("accept"),
+                                      _truthy(stream) if stream else False)
+    job = submit_job(request, run_id, kept=False)
+    try:
+        await asyncio.wrap_future(job.ready)
+    except asyncio.CancelledError:
+        # Client went away: stop the run at its next node/chunk boundary
+        cancel_job(job)
+        _forget_job(job)
+        raise
+    if isinstance(job.result, JobStream):
+        # Listed (and cancellable by run_id) until the body is sent or abandoned
+        job.result.on_close = lambda: _forget_job(job)
+    try:
+        response = job_result(job)
+    except HTTPException:
+        _forget_job(job)
+        raise
+    if not isinstance(response, StreamingResponse):
+        _forget_job(job)
+    return response
+
+
+def _forget_job(job: PipelineJob):
+    with _jobs_lock:
+        _jobs.pop(job.id, None)
 
 
 # ======================== Result serialization ========================
 
-def serialize_result(result: Any):
+class ResultWindow:
+    """The slice of a result to serialize: rows [offset, offset + limit), optionally some columns."""
+
+    def __init__(self, offset: int = 0, limit: Optional[int] = None, columns: Optional[List[Any]] = None):
+        self.offset = offset
+        self.limit = limit
+        self.columns = columns
+
+    @property
+    def rows(self) -> slice:
+        return slice(self.offset, None if self.limit is None else self.offset + self.limit)
+
+    def apply(self, result: Any) -> Any:
+        if isinstance(result, pd.DataFrame):
+            return self.select(result.iloc[self.rows])
+        if isinstance(result, (pd.Series, np.ndarray)):
+            return result[self.rows] if isinstance(result, np.ndarray) else result.iloc[self.rows]
+        return result
+
+    def over_chunks(self, chunks: Any) -> Any:
+        """The window across a sequence of row chunks; stops pulling once `limit` rows are out."""
+        skip, left = self.offset, self.limit
+        try:
+            for chunk in chunks:
+                if left is not None and left <= 0:
+                    break
+                n = len(chunk)
+                if skip >= n:
+                    skip -= n
+                    continue
+                part = chunk.iloc[skip:] if left is None else chunk.iloc[skip:skip + left]
+                skip = 0
+                if left is not None:
+                    left -= len(part)
+                yield self.select(part) if isinstance(part, pd.DataFrame) else part
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def select(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not self.columns:
+            return df
+        by_name = {str(c): c for c in df.columns}
+        missing = [str(c) for c in self.columns if str(c) not in by_name]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown column(s) {', '.join(missing)}")
+        return df[[by_name[str(c)] for c in self.columns]]
+
+
+def parse_window(offset: Optional[int], limit: Optional[int], columns: Optional[str]) -> Optional[ResultWindow]:
+    """offset/limit/columns form fields; None (the whole result) when none were sent."""
+    if offset is None and limit is None and not columns:
+        return None
+    for name, value in (("offset", offset), ("limit", limit)):
+        if value is not None and value < 0:
+            raise HTTPException(status_code=400, detail=f"'{name}' must be a non-negative integer, got {value}")
+    names = None
+    if columns:
+        raw = columns.strip()
+        names = _try_yaml_or_json_scalar(raw) if raw.startswith("[") else [c.strip() for c in raw.split(",") if c.strip()]
+        if not isinstance(names, list):
+            raise HTTPException(status_code=400, detail="'columns' must be a comma list or YAML list of names")
+    return ResultWindow(offset or 0, limit, names)
+
+
+def serialize_result(result: Any, window: Optional[ResultWindow] = None):
+    # Only the window is stringified; the totals describe the whole result so callers can page
+    window = window or ResultWindow()
     if isinstance(result, pd.DataFrame):
-        return {"columns": list(result.columns), "rows": result.astype(str).values.tolist()}
+        part = window.select(result.iloc[window.rows])
+        return {"columns": list(part.columns), "rows": result_formats.display_rows(part),
+                "dtypes": [str(t) for t in part.dtypes], "offset": window.offset,
+                "total_rows": result.shape[0], "total_columns": result.shape[1]}
     if isinstance(result, pd.Series):
-        return {"columns": [result.name or "value"], "rows": [[str(v)] for v in result.values]}
+        part = result.iloc[window.rows].to_frame()
+        return {"columns": [result.name or "value"], "rows": result_formats.display_rows(part),
+                "dtypes": [str(result.dtype)], "offset": window.offset,
+                "total_rows": len(result), "total_columns": 1}
     if isinstance(result, np.ndarray):
-        return {"columns": ["value"], "rows": [[str(v)] for v in result.flatten()]}
-    return {"columns": ["value"], "rows": [[str(result)]]}
+        flat = result.reshape(-1)
+        return {"columns": ["value"], "rows": [[str(v)] for v in flat[window.rows]],
+                "dtypes": [str(result.dtype)], "offset": window.offset,
+                "total_rows": int(flat.size), "total_columns": 1}
+    return {"columns": ["value"], "rows": [[str(v)] for v in [result][window.rows]],
+            "dtypes": [type(result).__name__], "offset": window.offset, "total_rows": 1, "total_columns": 1}
 
 
 # ======================== Search & details ========================
@@ -1956,6 +4176,55 @@ async def function_details(function_name: str):
     return info
 
 
+# ======================== Metrics ========================
+
+def _lru_stats(fn) -> Dict[str, Any]:
+    info = fn.cache_info()
+    return {"entries": info.currsize, "hits": info.hits, "misses": info.misses}
+
+
+def _cache_stats() -> Dict[str, Dict[str, Any]]:
+    out = {
+        "function_index": _lru_stats(_light_index),
+        "function_resolve": _lru_stats(_resolve_fallback),
+        "compiled_plan": PLAN_CACHE.stats(),
+        "node_result": node_cache.NODE_CACHE.stats(),
+        "upload_parse": uploads.PARSED_UPLOADS.stats(),
+    }
+    try:
+        from vanna_router import cache as vanna_cache
+        out["vanna_memory"] = vanna_cache.stats()
+    except Exception:
+        pass
+    return out
+
+
+def _cache_samples(field: str):
+    def collect():
+        return [({"cache": name}, st[field]) for name, st in _cache_stats().items() if field in st]
+    return collect
+
+
+def _cache_hit_ratio():
+    samples = []
+    for name, st in _cache_stats().items():
+        total = st.get("hits", 0) + st.get("misses", 0)
+        samples.append(({"cache": name}, st["hits"] / total if total else 0.0))
+    return samples
+
+
+metrics.REGISTRY.collector("tharavu_cache_entries", "Entries held per cache.", _cache_samples("entries"))
+metrics.REGISTRY.collector("tharavu_cache_bytes", "Bytes held per cache (where tracked).", _cache_samples("bytes"))
+metrics.REGISTRY.collector("tharavu_cache_hits_total", "Cache hits.", _cache_samples("hits"), kind="counter")
+metrics.REGISTRY.collector("tharavu_cache_misses_total", "Cache misses.", _cache_samples("misses"), kind="counter")
+metrics.REGISTRY.collector("tharavu_cache_hit_ratio", "Lifetime hit ratio per cache.", _cache_hit_ratio)
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # ======================== NL → YAML ========================
 
 _YAML_FENCE_RE = re.compile(r"```(?:yaml|yml)?\s*([\s\S]*?)```", re.IGNORECASE)
@@ -2201,7 +4470,8 @@ async def nl2yaml(
                     ],
                     "temperature": 0.2,
                 }
-                r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
+                with metrics.timed(metrics.LLM_REQUEST_SECONDS, caller="nl2yaml", provider="openrouter"):
+                    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
                 if r.status_code == 401:
                     raise HTTPException(status_code=401, detail=f"OpenRouter auth error: {r.text}")
                 if r.status_code >= 400:
@@ -2219,7 +4489,8 @@ async def nl2yaml(
                     ],
                     "temperature": 0.2,
                 }
-                r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
+                with metrics.timed(metrics.LLM_REQUEST_SECONDS, caller="nl2yaml", provider="deepseek"):
+                    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
                 if r.status_code == 401:
                     raise HTTPException(status_code=401, detail=f"DeepSeek error: {r.text}")
                 if r.status_code >= 400:
@@ -2261,7 +4532,8 @@ DATABASE_URL = os.getenv(
 
 def _db():
     # One short-lived connection per request (simple & safe)
-    return psycopg.connect(DATABASE_URL)
+    with metrics.timed(metrics.DB_CONNECT_SECONDS, db="app"):
+        return psycopg.connect(DATABASE_URL)
 
 class LoginIn(BaseModel):
     email: str
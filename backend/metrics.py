@@ -0,0 +1,246 @@
+# metrics.py
+"""
+In-process Prometheus metrics (text exposition format 0.0.4), no client
+library or agent needed. Counters/histograms are updated inline; gauges
+that mirror another component's state (cache sizes, queue depth) are read
+through collector callbacks at scrape time.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans sub-millisecond node calls to multi-minute LLM/pipeline requests
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _labels(pairs: Dict[str, str]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items()) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, k)), v) for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels: str):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, k)), v) for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts..., sum, count
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def samples(self) -> List[Sample]:
+        out: List[Sample] = []
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for key, values in series.items():
+            base = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, values):
+                cumulative += n
+                out.append((self.name + "_bucket", {**base, "le": _fmt(bound)}, cumulative))
+            out.append((self.name + "_sum", base, values[-2]))
+            out.append((self.name + "_count", base, values[-1]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        # name -> (type, help, callback returning [(labels, value)])
+        self._collectors: Dict[str, Tuple[str, str, Callable[[], Iterable[Tuple[Dict[str, str], float]]]]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics or metric.name in self._collectors:
+                raise ValueError(f"Metric '{metric.name}' already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def collector(self, name: str, doc: str, callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]],
+                  kind: str = "gauge"):
+        """Samples computed at scrape time from another component's own stats."""
+        with self._lock:
+            if name in self._metrics or name in self._collectors:
+                raise ValueError(f"Metric '{name}' already registered")
+            self._collectors[name] = (kind, doc, callback)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.doc}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, value in m.samples():
+                lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+        for name, (kind, doc, callback) in collectors:
+            try:
+                samples = list(callback())
+            except Exception:
+                continue  # a broken collector must not take the whole scrape down
+            lines.append(f"# HELP {name} {doc}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, doc: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, doc, labelnames))
+
+
+def gauge(name: str, doc: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, doc, labelnames))
+
+
+def histogram(name: str, doc: str, labelnames: Iterable[str] = (),
+              buckets: Optional[Iterable[float]] = None) -> Histogram:
+    return REGISTRY.register(Histogram(name, doc, labelnames, buckets or DEFAULT_BUCKETS))
+
+
+# ---------------- shared instruments ----------------
+# Defined here rather than in main so vanna_router / nl2yaml_engine can
+# record into them without importing the app.
+
+HTTP_REQUEST_SECONDS = histogram(
+    "tharavu_http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code.",
+    ("route", "method", "status"),
+)
+LLM_REQUEST_SECONDS = histogram(
+    "tharavu_llm_request_duration_seconds",
+    "LLM call latency by caller, provider and outcome.",
+    ("caller", "provider", "outcome"),
+)
+DB_CONNECT_SECONDS = histogram(
+    "tharavu_db_connect_duration_seconds",
+    "Time to acquire a database connection.",
+    ("db", "outcome"),
+)
+
+
+@contextmanager
+def timed(hist: Histogram, **labels: str):
+    """Observe the block's duration with outcome="ok"/"error" added to `labels`."""
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        hist.observe(time.perf_counter() - t0, outcome=outcome, **labels)
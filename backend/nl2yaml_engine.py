@@ -7,6 +7,8 @@ from typing import Any, Dict, Optional, Tuple
 import requests
 import yaml as pyyaml
 
+import metrics
+
 # -------- YAML block extractors ------------------------------------------------
 
 _YAML_FENCE_RE = re.compile(r"```(?:yaml|yml)?\s*([\s\S]*?)```", re.IGNORECASE)
@@ -196,7 +198,8 @@ class NL2YAMLEngine:
             ],
             "temperature": 0.2,
         }
-        r = requests.post(f"{self.or_base}/chat/completions", headers=headers, data=json.dumps(body), timeout=60)
+        with metrics.timed(metrics.LLM_REQUEST_SECONDS, caller="nl2yaml_engine", provider="openrouter"):
+            r = requests.post(f"{self.or_base}/chat/completions", headers=headers, data=json.dumps(body), timeout=60)
         if r.status_code == 401:
             raise ValueError(f"OpenRouter auth error: {r.text}")
         if r.status_code >= 400:
@@ -214,7 +217,8 @@ class NL2YAMLEngine:
             ],
             "temperature": 0.2,
         }
-        r = requests.post(f"{self.ds_base}/chat/completions", headers=headers, data=json.dumps(body), timeout=60)
+        with metrics.timed(metrics.LLM_REQUEST_SECONDS, caller="nl2yaml_engine", provider="deepseek"):
+            r = requests.post(f"{self.ds_base}/chat/completions", headers=headers, data=json.dumps(body), timeout=60)
         if r.status_code == 401:
             raise ValueError(f"DeepSeek auth error: {r.text}")
         if r.status_code >= 400:
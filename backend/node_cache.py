@@ -0,0 +1,137 @@
+# node_cache.py
+"""
+Process-wide LRU of pipeline node results, keyed by content hash.
+
+Keys are computed by the planner (function + coerced params + upstream keys +
+source digest), so an unchanged prefix of a re-posted pipeline is served from
+here and only the edited node and its descendants recompute.
+
+Frames and Series go in and come out as copies (detach): shallow ones when
+pandas copy-on-write is on, as main turns it on at startup, so a consumer
+that inserts a column or assigns into a hit gets its own copy of what it
+touches and the cached entry stays as computed; deep ones otherwise. Both
+sides of a shallow exchange stay recognisable (shares_cached_data), so the
+spill store leaves them resident: spilling them would free no memory.
+"""
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+_MISSING = object()
+
+# Objects handed out by (or stored into) a cache share their buffers with a live entry
+_SHARED: "weakref.WeakValueDictionary[int, Any]" = weakref.WeakValueDictionary()
+
+
+def result_nbytes(obj: Any) -> int:
+    try:
+        if isinstance(obj, pd.DataFrame):
+            return int(obj.memory_usage(deep=True).sum())
+        if isinstance(obj, pd.Series):
+            return int(obj.memory_usage(deep=True))
+        if isinstance(obj, np.ndarray):
+            return int(obj.nbytes)
+    except Exception:
+        pass
+    return sys.getsizeof(obj)
+
+
+def _copy_on_write() -> bool:
+    # "warn" (pandas 2.2) only reports writes through shared data; it doesn't copy
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def detach(value: Any) -> Any:
+    """A copy of `value` that its holder can mutate without reaching the original."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        # Shallow copies only isolate writes under copy-on-write
+        return value.copy(deep=not _copy_on_write())
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    return value
+
+
+def _mark_shared(value: Any):
+    if not _copy_on_write():
+        return  # detach made deep copies: nothing shares a cached entry's data
+    try:
+        _SHARED[id(value)] = value
+    except TypeError:
+        pass  # not weak-referenceable (ints, strings, ...): nothing worth tracking
+
+
+def shares_cached_data(value: Any) -> bool:
+    """Whether `value` came out of, or went into, a cache whose entry still holds its data."""
+    return _SHARED.get(id(value)) is value
+
+
+class NodeResultCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str, count: bool = True) -> Any:
+        """Cached value or the module's _MISSING sentinel (results may legitimately be None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += count
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += count
+            value = detach(entry[0])
+        _mark_shared(value)
+        return value
+
+    def put(self, key: str, value: Any):
+        size = result_nbytes(value)
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (detach(value), size)
+            self.bytes += size
+            _mark_shared(value)
+            while self.bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
+
+def is_missing(value: Any) -> bool:
+    return value is _MISSING
+
+
+NODE_CACHE = NodeResultCache(int(os.getenv("PIPELINE_CACHE_MAX_BYTES", str(512 * 1024 * 1024))))
@@ -0,0 +1,571 @@
+# polars_engine.py
+"""
+Polars LazyFrame execution for pipeline subgraphs (`engine: polars`).
+
+Supported nodes translate onto a LazyFrame built from their inputs' plans
+(query -> filter, column selection -> select, rename, fillna/astype ->
+with_columns, dropna -> drop_nulls, groupby/agg -> group_by/agg, merge ->
+join, sort_values -> sort, head). Nothing runs until a result is collected
+(a kept node, or one feeding a pandas node); Polars then optimises the whole
+plan and runs it on its streaming engine. Only collected results become
+pandas objects.
+
+pandas semantics are kept the same way as in duckdb_engine: hidden columns
+carry the row labels, missing values compare two-valued, join keys match
+NaN with NaN, groupby drops NaN keys and sorts by them, CSV columns get
+read_csv's types (integer columns with gaps read as float64), and a
+single-key sort with ties runs in pandas unless it asks for a stable kind.
+"""
+import ast
+import itertools
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import pushdown
+from duckdb_engine import PANDAS_BOOLS, PANDAS_FLOAT, PANDAS_INT, PANDAS_NA_VALUES, STABLE_SORTS, canonical, \
+    restored_extension_columns, shared_capability
+
+try:
+    import polars as pl
+except Exception:  # optional: only needed for `engine: polars`
+    pl = None
+
+NAME = "polars"
+# "streaming" runs plans in morsels on all cores; "in-memory" / "auto" are Polars' other engines
+POLARS_COLLECT_ENGINE = os.getenv("PIPELINE_POLARS_ENGINE", "streaming")
+
+_FLOAT_DTYPES = {"float", "float64", "double"}
+
+
+class Unsupported(Exception):
+    """The node, with these inputs, has no LazyFrame translation; it runs in pandas instead."""
+
+
+def available() -> bool:
+    return pl is not None
+
+
+def _names(value: Any) -> Optional[List[str]]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+        return value
+    return None
+
+
+# ---------------- static capability ----------------
+
+def capability(node: Any) -> Optional[str]:
+    """None if the node can run as part of a LazyFrame plan, else why it runs in pandas."""
+    return shared_capability(node, _lazyframe_only_capability)
+
+
+def _lazyframe_only_capability(fn: str, params: Dict[str, Any]) -> Optional[str]:
+    # Nodes Polars translates and DuckDB doesn't
+    extra = lambda allowed: sorted(set(params) - set(allowed))
+    if fn == "DataFrame.fillna":
+        value = params.get("value")
+        if extra({"value"}) or isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            return "fillna supports a scalar value only"
+        return None
+    if fn == "DataFrame.dropna":
+        if extra({"subset"}) or (params.get("subset") is not None and _names(params["subset"]) is None):
+            return "dropna supports subset only"
+        return None
+    if fn == "DataFrame.astype":
+        dtype = params.get("dtype")
+        targets = dtype.values() if isinstance(dtype, dict) else [dtype]
+        if extra({"dtype"}) or not all(str(t).lower() in _FLOAT_DTYPES for t in targets):
+            return "astype supports float64 targets only"
+        return None
+    return f"{fn or 'this function'} has no LazyFrame translation"
+
+
+# ---------------- frames ----------------
+
+class Frame:
+    """
+    Lazy result: `lf` holds the visible `columns` plus hidden index columns;
+    `index` pairs those with level names (empty: a fresh RangeIndex).
+    LazyFrames keep row order, so unlike SQL relations no ordinals are needed.
+    """
+
+    def __init__(self, lf: Any, columns: List[str], index: List[Tuple[str, Any]]):
+        self.lf = lf
+        self.columns = columns
+        self.index = index
+        self._schema: Optional[Dict[str, Any]] = None
+        self.frame: Optional[pd.DataFrame] = None
+
+    def schema(self) -> Dict[str, Any]:
+        if self._schema is None:
+            self._schema = dict(self.lf.collect_schema())
+        return self._schema
+
+    def derive(self, lf: Any, columns: Optional[List[str]] = None) -> "Frame":
+        return Frame(lf, list(self.columns if columns is None else columns), list(self.index))
+
+
+class Grouped:
+    """DataFrame.groupby over a frame; only an aggregation turns it back into rows."""
+
+    def __init__(self, frame: Frame, keys: List[str], as_index: bool):
+        self.frame = frame
+        self.keys = keys
+        self.as_index = as_index
+
+
+def is_lazy(value: Any) -> bool:
+    return isinstance(value, (Frame, Grouped))
+
+
+def _kind(dtype: Any) -> str:
+    if dtype == pl.String:
+        return "text"
+    return "number" if dtype.is_numeric() else str(dtype)
+
+
+# ---------------- query expressions ----------------
+
+_COMPARE = {ast.Eq: "__eq__", ast.NotEq: "__ne__", ast.Lt: "__lt__", ast.LtE: "__le__",
+            ast.Gt: "__gt__", ast.GtE: "__ge__"}
+_ARITH = {ast.Add: "__add__", ast.Sub: "__sub__", ast.Mult: "__mul__"}
+
+
+def _operand(node: ast.AST, schema: Dict[str, Any]) -> Tuple[Any, str]:
+    if isinstance(node, ast.Name):
+        if node.id not in schema:
+            raise Unsupported(f"query name '{node.id}' is not a column")
+        return pl.col(node.id), _kind(schema[node.id])
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) and not isinstance(node.value, bool):
+        return pl.lit(node.value), "text" if isinstance(node.value, str) else "number"
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        expr, kind = _operand(node.operand, schema)
+        if kind != "number":
+            raise Unsupported("negating a non-number")
+        return -expr, kind
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITH:
+        (a, ka), (b, kb) = _operand(node.left, schema), _operand(node.right, schema)
+        if ka != "number" or kb != "number":
+            raise Unsupported("arithmetic on non-numbers")
+        return getattr(a, _ARITH[type(node.op)])(b), "number"
+    raise Unsupported(f"query operand {ast.dump(node)[:60]}")
+
+
+def _isin(expr: Any, kind: str, node: ast.AST) -> Any:
+    values = _in_list(node, kind)
+    if kind == "number":
+        # is_in wants one dtype on both sides; query compares 1 == 1.0
+        expr, values = expr.cast(pl.Float64), [float(v) for v in values]
+    return expr.is_in(values).fill_null(False)
+
+
+def _in_list(node: ast.AST, kind: str) -> List[Any]:
+    if not isinstance(node, (ast.List, ast.Tuple)) or not node.elts \
+            or not all(isinstance(e, ast.Constant) and isinstance(e.value, (int, float, str))
+                       and not isinstance(e.value, bool) for e in node.elts):
+        raise Unsupported("`in` needs a list of literals")
+    if any(("text" if isinstance(e.value, str) else "number") != kind for e in node.elts):
+        raise Unsupported("`in` list doesn't match the column type")
+    return [e.value for e in node.elts]
+
+
+def _predicate(node: ast.AST, schema: Dict[str, Any]) -> Any:
+    """Boolean expression without nulls, matching pandas' NaN handling."""
+    if isinstance(node, ast.BoolOp):
+        parts = [_predicate(v, schema) for v in node.values]
+        out = parts[0]
+        for p in parts[1:]:
+            out = (out & p) if isinstance(node.op, ast.And) else (out | p)
+        return out
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+        return ~_predicate(node.operand, schema)
+    if isinstance(node, ast.Compare):
+        terms, left = [], node.left
+        for op, right in zip(node.ops, node.comparators):
+            expr, kind = _operand(left, schema)
+            if isinstance(op, (ast.In, ast.NotIn)) or isinstance(right, (ast.List, ast.Tuple)):
+                if not isinstance(op, (ast.In, ast.NotIn, ast.Eq, ast.NotEq)):
+                    raise Unsupported("ordering comparison with a list")
+                cond = _isin(expr, kind, right)
+                terms.append(~cond if isinstance(op, (ast.NotIn, ast.NotEq)) else cond)
+            elif type(op) in _COMPARE:
+                other, other_kind = _operand(right, schema)
+                if kind != other_kind:
+                    raise Unsupported(f"comparing {kind} with {other_kind}")
+                # NaN compares False, except != which pandas makes True
+                terms.append(getattr(expr, _COMPARE[type(op)])(other).fill_null(isinstance(op, ast.NotEq)))
+            else:
+                raise Unsupported(f"query operator {type(op).__name__}")
+            left = right
+        out = terms[0]
+        for t in terms[1:]:
+            out = out & t
+        return out
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "isin" \
+            and len(node.args) == 1 and not node.keywords:
+        expr, kind = _operand(node.func.value, schema)
+        return _isin(expr, kind, node.args[0])
+    raise Unsupported(f"query expression {ast.dump(node)[:60]}")
+
+
+# ---------------- session ----------------
+
+class Session:
+    """One run's temp files and collected plans; LazyFrames themselves need no connection."""
+
+    def __init__(self, tmp_dir: Path):
+        self.queries: Dict[str, str] = {}
+        self._tmp_dir = tmp_dir
+        self._tmp_files: List[str] = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def fresh(self, kind: str) -> str:
+        return f"__td_{kind}{next(self._ids)}"
+
+    def temp_file(self, data: bytes, suffix: str) -> str:
+        path = self._tmp_dir / f"pipeline-{uuid.uuid4().hex}{suffix}"
+        path.write_bytes(data)
+        with self._lock:
+            self._tmp_files.append(str(path))
+        return str(path)
+
+    # -------- inputs --------
+
+    def read(self, fn: str, path: str, fmt: str, params: Dict[str, Any]) -> Frame:
+        rn = self.fresh("rn")
+        if fmt == "csv":
+            sep = params.get("sep", params.get("delimiter")) or ("\t" if fn == "read_table" else ",")
+            return self._read_csv(path, sep, params.get("usecols"), rn)
+        import pyarrow.parquet as pq
+        meta = pq.read_schema(path).pandas_metadata or {}
+        index = meta.get("index_columns", [])
+        if index and not (isinstance(index[0], dict) and index[0].get("start") == 0 and index[0].get("step") == 1):
+            raise Unsupported("Parquet file stores its own index")
+        lf = pl.scan_parquet(path, row_index_name=rn)
+        schema = dict(lf.collect_schema())
+        columns = [c for c in schema if c != rn]
+        wanted = params.get("columns")
+        if wanted is not None:
+            names = set(_names(wanted) or [])
+            columns = [c for c in columns if c in names]
+        restored = restored_extension_columns(meta, columns)
+        if restored:
+            raise Unsupported(f"Parquet columns {restored} store pandas extension dtypes")
+        # pandas reads an integer column with gaps as float64, and it stays float downstream
+        ints = [c for c in columns if schema[c].is_integer()]
+        gaps = lf.select([pl.col(c).null_count() for c in ints]).collect().row(0) if ints else ()
+        floats = {c for c, n in zip(ints, gaps) if n}
+        exprs = [pl.col(c).cast(pl.Float64) if c in floats else pl.col(c) for c in columns]
+        return Frame(lf.select(exprs + [pl.col(rn).cast(pl.Int64)]), columns, [(rn, None)])
+
+    def _read_csv(self, path: str, sep: str, usecols: Any, rn: str) -> Frame:
+        """
+        A CSV typed the way read_csv types it: whole numbers int64 (float64
+        with gaps), other numbers float64, True/False spellings bool,
+        all-missing columns float64, anything else text. One pass over the
+        file as text classifies every column; the plan's scan then parses
+        numbers with Polars' own reader, except where a value has trailing
+        whitespace (which only pandas skips) and the text is cast instead.
+        An integer past int64 sends the read back to pandas.
+        """
+        # pandas' own header parse: mangled duplicates (a.1) and "Unnamed: i" for blank names
+        names = [str(c) for c in pd.read_csv(path, sep=sep, nrows=0).columns]
+        options = dict(separator=sep, null_values=PANDAS_NA_VALUES, infer_schema=False, new_columns=names)
+        try:
+            text = pl.scan_csv(path, **options)
+            if len(text.head(1).collect().columns) != len(names):
+                raise Unsupported("the header doesn't line up with the data the way read_csv reads it")
+        except pl.exceptions.PolarsError as e:
+            raise Unsupported(f"Polars can't read the CSV the way read_csv does: {str(e).splitlines()[0]}")
+        columns = names
+        if usecols is not None:
+            keep = usecols if callable(usecols) else (lambda c, wanted=set(_names(usecols) or []): c in wanted)
+            columns = [c for c in names if keep(c)]
+
+        stats = []
+        for c in columns:
+            v = pl.col(c)
+            stats += [v.count(), v.str.contains(f"^(?:{PANDAS_INT})$").sum(),
+                      v.str.contains(f"^(?:{PANDAS_FLOAT})$").sum(), v.is_in(PANDAS_BOOLS).sum(),
+                      v.str.contains(r"\s$").any(), v.str.len_bytes().max()]
+        row = text.select([pl.len()] + [e.alias(f"s{i}") for i, e in enumerate(stats)]).collect().row(0) \
+            if columns else (0,)
+        rows, kinds = row[0], {}
+        for i, c in enumerate(columns):
+            present, ints, floats, bools, padded, longest = row[1 + 6 * i:7 + 6 * i]
+            if rows and not present:
+                kinds[c] = pl.Float64, False
+            elif present and ints == present:
+                # integers with gaps read as float64
+                kinds[c] = (pl.Int64 if present == rows else pl.Float64), padded
+                if longest > 18 and present == rows:
+                    wide = text.select(pl.col(c).str.strip_chars().cast(pl.Int64, strict=False).count()).collect()
+                    if wide.item() < present:
+                        raise Unsupported(f"column '{c}' holds integers past int64")
+            elif present and floats == present:
+                kinds[c] = pl.Float64, padded
+            elif present and bools == present:
+                kinds[c] = pl.Boolean, True
+            else:
+                kinds[c] = pl.String, False
+
+        typed = {c: dtype for c, (dtype, from_text) in kinds.items() if dtype != pl.String and not from_text}
+        lf = pl.scan_csv(path, schema_overrides=typed, row_index_name=rn, **options)
+        exprs = []
+        for c in columns:
+            dtype, from_text = kinds[c]
+            if dtype == pl.Boolean:
+                exprs.append(pl.col(c).is_in(PANDAS_BOOLS[:3]))
+            elif from_text:
+                exprs.append(pl.col(c).str.strip_chars().cast(dtype))
+            else:
+                exprs.append(pl.col(c))
+        return Frame(lf.select(exprs + [pl.col(rn).cast(pl.Int64)]), columns, [(rn, None)])
+
+    def frame(self, value: Any) -> Frame:
+        """A frame for an input: lazy results as they are, pandas frames via Arrow."""
+        if isinstance(value, Frame):
+            return value
+        if not isinstance(value, pd.DataFrame):
+            raise Unsupported(f"{type(value).__name__} input")
+        cols = list(value.columns)
+        if not all(isinstance(c, str) and not c.startswith("__td_") for c in cols) or len(set(cols)) != len(cols):
+            raise Unsupported("input has non-string or duplicate column labels")
+        if not all(isinstance(t, np.dtype) for t in value.dtypes):
+            # Int64, category, ArrowDtype, ... would come back as plain numpy columns
+            raise Unsupported("input has pandas extension dtypes")
+        default_index = isinstance(value.index, pd.RangeIndex) and value.index.start == 0 \
+            and value.index.step == 1 and value.index.name is None
+        try:
+            df = pl.from_pandas(value.reset_index(drop=True), nan_to_null=True)
+            if default_index:
+                index = [(self.fresh("pos"), None)]
+                df = df.with_row_index(index[0][0]).with_columns(pl.col(index[0][0]).cast(pl.Int64))
+            else:
+                index = [(self.fresh("idx"), n) for n in value.index.names]
+                df = df.with_columns([pl.Series(col, value.index.get_level_values(i), nan_to_null=True)
+                                      for i, (col, _) in enumerate(index)])
+        except Exception as e:
+            raise Unsupported(f"input can't be converted to Polars: {e}")
+        return Frame(df.lazy(), cols, index)
+
+    # -------- node translation --------
+
+    def apply(self, node: Any, env: Dict[str, Any]) -> Any:
+        """Frame (or Grouped) for a non-read node whose inputs are in `env`."""
+        fn = canonical(node.func_name)
+        params = node.params
+        recv = env.get(node.receiver) if isinstance(node.receiver, str) else None
+
+        if fn.startswith("DataFrameGroupBy."):
+            if not isinstance(recv, Grouped):
+                raise Unsupported("receiver is not a groupby over a frame")
+            return self._aggregate(recv, fn.split(".")[-1], params)
+        if fn == "DataFrame.merge" and recv is None:
+            recv = env.get(params.get("left")) if isinstance(params.get("left"), str) else None
+        if recv is None:
+            raise Unsupported("receiver is not a pipeline node")
+        frame = self.frame(recv)
+        schema = frame.schema()
+
+        if fn == "DataFrame.query":
+            tree = pushdown.parse_query(params.get("expr"))
+            return frame.derive(frame.lf.filter(_predicate(tree, {c: schema[c] for c in frame.columns})))
+        if fn == "DataFrame.loc":
+            return self._select(frame, [(c, c) for c in node.cols])
+        if fn == "DataFrame.__getitem__":
+            return self._select(frame, [(c, c) for c in params["key"]])
+        if fn == "DataFrame.filter":
+            return self._select(frame, [(c, c) for c in params["items"] if c in frame.columns])
+        if fn == "DataFrame.rename":
+            mapping = params["columns"]
+            return self._select(frame, [(c, mapping.get(c, c)) for c in frame.columns])
+        if fn == "DataFrame.fillna":
+            value = params["value"]
+            kind = "text" if isinstance(value, str) else "number"
+            # pandas would mix types in a column; Polars would upcast a whole integer column
+            if any(_kind(schema[c]) != kind for c in frame.columns):
+                raise Unsupported("fill value doesn't match every column's type")
+            if isinstance(value, float) and any(schema[c].is_integer() for c in frame.columns):
+                raise Unsupported("float fill of an integer column")
+            return frame.derive(frame.lf.with_columns([pl.col(c).fill_null(value) for c in frame.columns]))
+        if fn == "DataFrame.dropna":
+            subset = _names(params.get("subset")) or frame.columns
+            if any(c not in frame.columns for c in subset):
+                raise Unsupported("dropna subset is not columns")
+            return frame.derive(frame.lf.drop_nulls(subset))
+        if fn == "DataFrame.astype":
+            dtype = params["dtype"]
+            targets = list(dtype) if isinstance(dtype, dict) else list(frame.columns)
+            if any(c not in frame.columns or not schema[c].is_numeric() for c in targets):
+                raise Unsupported("astype of a missing or non-numeric column")
+            return frame.derive(frame.lf.with_columns([pl.col(c).cast(pl.Float64) for c in targets]))
+        if fn == "DataFrame.merge":
+            right = env.get(params.get("right")) if isinstance(params.get("right"), str) else None
+            if right is None:
+                raise Unsupported("merge right is not a pipeline node")
+            return self._merge(frame, self.frame(right), params)
+        if fn == "DataFrame.groupby":
+            keys = _names(params.get("by"))
+            if any(k not in frame.columns for k in keys):
+                raise Unsupported("groupby keys are not columns")
+            return Grouped(frame, keys, params.get("as_index", True) is not False)
+        if fn == "DataFrame.sort_values":
+            return self._sort(frame, params)
+        if fn == "DataFrame.head":
+            return frame.derive(frame.lf.head(int(params.get("n", 5))))
+        raise Unsupported(f"{fn} has no LazyFrame translation")
+
+    def _select(self, frame: Frame, pairs: List[Tuple[str, str]]) -> Frame:
+        out = [d for _, d in pairs]
+        if any(s not in frame.columns for s, _ in pairs) or len(set(out)) != len(out):
+            raise Unsupported("columns are missing or would be duplicated")
+        exprs = [pl.col(s).alias(d) for s, d in pairs] + [pl.col(c) for c, _ in frame.index]
+        return frame.derive(frame.lf.select(exprs), out)
+
+    def _merge(self, left: Frame, right: Frame, params: Dict[str, Any]) -> Frame:
+        on = params.get("on")
+        if on is None and params.get("left_on") is None:
+            on = [c for c in left.columns if c in right.columns]
+        lo = _names(on if on is not None else params.get("left_on"))
+        ro = _names(on if on is not None else params.get("right_on"))
+        if not lo or not ro or len(lo) != len(ro):
+            raise Unsupported("merge keys must be column names")
+        if any(k not in left.columns for k in lo) or any(k not in right.columns for k in ro):
+            raise Unsupported("merge keys are not columns")
+        ls, rs = left.schema(), right.schema()
+        key_types = []
+        for a, b in zip(lo, ro):
+            if ls[a] == rs[b]:
+                key_types.append(ls[a])
+            elif _kind(ls[a]) == _kind(rs[b]) == "number":
+                key_types.append(pl.Float64 if ls[a].is_float() or rs[b].is_float() else pl.Int64)
+            else:
+                raise Unsupported("merge keys have different types")
+
+        # pandas: a right key named like its left key is dropped; other clashes get _x/_y
+        dropped = {b for a, b in zip(lo, ro) if a == b}
+        right_cols = [c for c in right.columns if c not in dropped]
+        clash = set(left.columns) & set(right_cols)
+        names = [f"{c}_x" if c in clash else c for c in left.columns] + [f"{c}_y" if c in clash else c for c in right_cols]
+        if len(set(names)) != len(names):
+            raise Unsupported("merge would produce duplicate column names")
+
+        # Right columns under private names so Polars never renames or coalesces anything
+        lpos, rpos = self.fresh("ord"), self.fresh("ord")
+        tmp = {c: self.fresh("r") for c in right.columns}
+        rkeys = [self.fresh("k") for _ in ro]
+        rlf = right.lf.select([pl.col(c).alias(tmp[c]) for c in right.columns]
+                              + [pl.col(b).cast(t).alias(k) for b, t, k in zip(ro, key_types, rkeys)]
+                              ).with_row_index(rpos)
+        lkeys = [pl.col(a).cast(t) for a, t in zip(lo, key_types)]
+        joined = left.lf.select(left.columns).with_row_index(lpos).join(
+            rlf, left_on=lkeys, right_on=rkeys, how=params.get("how", "inner"), nulls_equal=True, coalesce=False)
+        # pandas order: left rows in order, each left row's matches in right order
+        joined = joined.sort([lpos, rpos], nulls_last=True)
+        exprs = [pl.col(c).alias(n) for c, n in zip(left.columns, names)] \
+            + [pl.col(tmp[c]).alias(n) for c, n in zip(right_cols, names[len(left.columns):])]
+        return Frame(joined.select(exprs), names, [])
+
+    def _aggregate(self, grouped: Grouped, how: str, params: Dict[str, Any]) -> Frame:
+        frame, keys = grouped.frame, grouped.keys
+        schema = frame.schema()
+        if how == "agg":
+            func = params.get("func", params.get("arg"))
+            targets = list(func.items())
+        else:
+            targets = [(c, how) for c in frame.columns if c not in keys]
+        aggs = []
+        for col, fn in targets:
+            if col not in frame.columns or col in keys:
+                raise Unsupported(f"can't aggregate '{col}'")
+            aggs.append(_agg_expr(col, fn, schema[col]).alias(col))
+        lf = frame.lf.filter(pl.all_horizontal([pl.col(k).is_not_null() for k in keys])) \
+            .group_by(keys).agg(aggs).sort(keys)
+        if grouped.as_index:
+            index = [(self.fresh("idx"), k) for k in keys]
+            lf = lf.select([pl.col(c) for c, _ in targets] + [pl.col(k).alias(h) for h, k in index])
+            return Frame(lf, [c for c, _ in targets], index)
+        return Frame(lf.select(keys + [c for c, _ in targets]), keys + [c for c, _ in targets], [])
+
+    def _sort(self, frame: Frame, params: Dict[str, Any]) -> Frame:
+        by = _names(params["by"])
+        if any(c not in frame.columns for c in by):
+            raise Unsupported("sort_values keys are not columns")
+        asc = params.get("ascending", True)
+        asc = asc if isinstance(asc, list) else [asc] * len(by)
+        if len(asc) != len(by) or not all(isinstance(a, bool) for a in asc):
+            raise Unsupported("ascending must be booleans")
+        nulls_last = params.get("na_position", "last") != "first"
+        if len(by) == 1 and params.get("kind") not in STABLE_SORTS:
+            # pandas sorts one key with an unstable quicksort: ties come out in no order Polars can reproduce
+            key = pl.col(by[0])
+            if frame.lf.select(key.count() > key.drop_nulls().n_unique()).collect().item():
+                raise Unsupported("single-key sort with ties needs kind: stable to match pandas")
+        # maintain_order: ties keep their current order (a stable sort)
+        return frame.derive(frame.lf.sort(by, descending=[not a for a in asc], nulls_last=nulls_last,
+                                          maintain_order=True))
+
+    # -------- results --------
+
+    def collect(self, value: Any, node_id: Optional[str] = None) -> Any:
+        """pandas result for a lazy value (cached on it); anything else passes through."""
+        if isinstance(value, Grouped):
+            return self.collect(value.frame).groupby(value.keys, as_index=value.as_index)
+        if not isinstance(value, Frame):
+            return value
+        if value.frame is not None:
+            return value.frame
+        idx = [c for c, _ in value.index]
+        lf = value.lf.select(value.columns + idx)
+        if node_id is not None:
+            with self._lock:
+                self.queries[node_id] = lf.explain()
+        df = lf.collect(engine=POLARS_COLLECT_ENGINE).to_pandas()
+        for c in df.columns[df.dtypes == object]:
+            # Arrow gives None for missing text; read_csv/merge give NaN
+            if df[c].isna().any():
+                df[c] = df[c].where(df[c].notna(), np.nan)
+        if idx:
+            labels = [df.pop(c) for c in idx]
+            if len(labels) == 1:
+                index = pd.Index(labels[0]).rename(value.index[0][1])
+                if value.index[0][1] is None and index.dtype.kind == "i" and index.equals(pd.RangeIndex(len(df))):
+                    index = pd.RangeIndex(len(df))
+            else:
+                index = pd.MultiIndex.from_arrays(labels, names=[n for _, n in value.index])
+            df.index = index
+        value.frame = df
+        return df
+
+    def close(self):
+        for p in self._tmp_files:
+            try:
+                os.unlink(p)
+            except OSError:
+                pass
+
+
+def _agg_expr(col: str, fn: str, dtype: Any) -> Any:
+    if fn not in ("count", "nunique") and not dtype.is_numeric():
+        # pandas sums text by concatenation and fails min/max of text with gaps
+        raise Unsupported(f"{fn} of a {dtype} column")
+    c = pl.col(col)
+    if fn == "sum":
+        # pandas: an all-NaN group sums to 0 and integer sums stay int64
+        return c.sum().cast(pl.Int64 if dtype.is_integer() else pl.Float64)
+    if fn in ("mean", "median", "std", "var"):
+        return getattr(c, fn)().cast(pl.Float64)
+    if fn == "count":
+        return c.count().cast(pl.Int64)
+    if fn == "nunique":
+        return c.drop_nulls().n_unique().cast(pl.Int64)
+    return getattr(c, fn)()  # min / max
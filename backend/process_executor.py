@@ -0,0 +1,256 @@
+# process_executor.py
+"""
+Warm process pool for GIL-bound pipeline nodes (DataFrame.apply, object-dtype
+string ops, groupby with Python lambdas...).
+
+DataFrames/Series cross the process boundary as Arrow IPC files in /dev/shm:
+the parent writes each upstream result once per run, the worker memory-maps it,
+runs the node and writes its result back the same way. Only node ids, paths
+and small descriptors are pickled. Reading a file back builds the frame with
+one copy out of the mapping (pandas-owned, writable arrays; nothing is
+unpickled). Frames Arrow can't represent, e.g. object columns mixing strings
+and numbers, are pickled whole instead.
+
+Every task leaves its worker's pid in a file next to its inputs, so an
+aborted run kills only the workers running its own nodes. A killed worker
+breaks the whole ProcessPoolExecutor; other runs' nodes caught in that
+retry once on a fresh pool.
+"""
+import os
+import signal
+import time
+import uuid
+import threading
+import multiprocessing as mp
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+try:
+    import pyarrow as pa
+except Exception:  # optional: only needed when a node asks for executor: process
+    pa = None
+
+SHM_DIR = Path(os.getenv("PIPELINE_SHM_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else "/tmp"))
+PROCESS_WORKERS = int(os.getenv("PIPELINE_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+# Functions that always run out-of-process, e.g. "DataFrame.apply,DataFrame.groupby"
+PROCESS_FUNCTIONS = {f.strip() for f in os.getenv("PIPELINE_PROCESS_FUNCTIONS", "").split(",") if f.strip()}
+
+_SERIES_COL = "__series__"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def wants_process(spec: Dict[str, Any], node_def: Dict[str, Any]) -> bool:
+    """Per-node `executor:` hint wins, then the spec-wide one, then the allow-list."""
+    hint = node_def.get("executor") or spec.get("executor")
+    if hint:
+        return str(hint).lower() == "process"
+    return node_def.get("function") in PROCESS_FUNCTIONS
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None or getattr(_pool, "_broken", False):
+            # fork keeps the already-imported pandas/numpy warm in every worker
+            ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS, mp_context=ctx)
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _retire(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next get_pool() starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _kill_task(future: Future, pid_path: str, grace_s: float = 1.0):
+    """Terminate the worker running `future` (a timed-out node can't be stopped any other way)."""
+    give_up = time.monotonic() + grace_s
+    while not future.done():
+        try:
+            pid = int(Path(pid_path).read_text())
+        except (OSError, ValueError):
+            # Picked up but the worker hasn't written its pid yet
+            if time.monotonic() >= give_up:
+                return
+            time.sleep(0.01)
+            continue
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+        return
+
+
+# ---------------- Arrow IPC handoff ----------------
+
+def write_arrow(obj: Any, directory: Path = SHM_DIR) -> Optional[Dict[str, Any]]:
+    """
+    Write a DataFrame/Series to an Arrow IPC file; None for anything else and
+    for frames Arrow can't convert (callers pickle those).
+    """
+    try:
+        if isinstance(obj, pd.Series):
+            name = obj.name
+            table = pa.Table.from_pandas(obj.to_frame(_SERIES_COL), preserve_index=True)
+            desc = {"kind": "series", "name": name}
+        elif isinstance(obj, pd.DataFrame):
+            table = pa.Table.from_pandas(obj, preserve_index=True)
+            desc = {"kind": "frame"}
+        else:
+            return None
+    except (pa.ArrowException, ValueError, TypeError):  # e.g. duplicate column names
+        return None
+    path = directory / f"pipeline-{uuid.uuid4().hex}.arrow"
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    desc["path"] = str(path)
+    return desc
+
+
+def read_arrow(desc: Dict[str, Any], memory_map: bool = False) -> Any:
+    """The frame/Series in `desc`; either way the file can be unlinked right after.
+
+    By default to_pandas copies out of the mapping. With `memory_map` numeric
+    columns stay zero-copy views of the mapped file (read-only arrays), so the
+    pages are file-backed and the kernel can drop them under pressure.
+    """
+    with pa.memory_map(desc["path"], "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+        df = table.to_pandas(split_blocks=True) if memory_map else table.to_pandas()
+    if desc["kind"] == "series":
+        s = df[_SERIES_COL]
+        s.name = desc.get("name")
+        return s
+    return df
+
+
+def unlink_all(paths: List[str]):
+    for p in paths:
+        try:
+            os.unlink(p)
+        except OSError:
+            pass
+
+
+# ---------------- worker side ----------------
+
+def _worker(fn: Callable, node_id: str, node_def: Dict[str, Any],
+            inputs: Dict[str, Any], upload_path: Optional[str], pid_path: str):
+    Path(pid_path).write_text(str(os.getpid()))
+    try:
+        executed = {k: read_arrow(v["shm"]) if "shm" in v else v["value"] for k, v in inputs.items()}
+        uploaded = Path(upload_path).read_bytes() if upload_path else None
+        result = fn(node_id, node_def, executed, uploaded)
+        desc = write_arrow(result)
+        return ("ok", {"shm": desc} if desc else {"value": result})
+    except HTTPException as e:
+        # HTTPException loses `detail` through pickle; send the parts instead
+        return ("error", e.status_code, e.detail)
+    except Exception as e:
+        return ("error", 500, f"Error executing node '{node_id}' ({node_def.get('function')}): {e}")
+
+
+# ---------------- parent side ----------------
+
+class ProcessRun:
+    """Per-run bookkeeping: each upstream result is exported to shm at most once."""
+
+    def __init__(self, uploaded_bytes: Optional[bytes] = None):
+        self._lock = threading.Lock()
+        self._exported: Dict[str, Dict[str, Any]] = {}
+        self._paths: List[str] = []
+        self._uploaded = uploaded_bytes
+        self._upload_path: Optional[str] = None
+        self._tasks: List[Tuple[Future, str]] = []
+        self.aborted = False
+
+    def _upload(self) -> Optional[str]:
+        if self._uploaded is None:
+            return None
+        with self._lock:
+            if self._upload_path is None:
+                path = SHM_DIR / f"pipeline-{uuid.uuid4().hex}.upload"
+                path.write_bytes(self._uploaded)
+                self._upload_path = str(path)
+                self._paths.append(self._upload_path)
+            return self._upload_path
+
+    def _export(self, node_id: str, value: Any) -> Dict[str, Any]:
+        with self._lock:
+            if node_id not in self._exported:
+                desc = write_arrow(value)
+                if desc:
+                    self._paths.append(desc["path"])
+                self._exported[node_id] = {"shm": desc} if desc else {"value": value}
+            return self._exported[node_id]
+
+    def execute(self, fn: Callable, node_id: str, node_def: Dict[str, Any],
+                deps: List[str], executed: Dict[str, Any]) -> Any:
+        inputs = {d: self._export(d, executed[d]) for d in deps if d in executed}
+        upload = self._upload()
+        for attempt in (1, 2):
+            if self.aborted:
+                raise HTTPException(status_code=500, detail=f"Error executing node '{node_id}' ({node_def.get('function')}): run was interrupted")
+            pool = get_pool()
+            pid_path = str(SHM_DIR / f"pipeline-{uuid.uuid4().hex}.pid")
+            with self._lock:
+                self._paths.append(pid_path)
+            try:
+                future = pool.submit(_worker, fn, node_id, node_def, inputs, upload, pid_path)
+                with self._lock:
+                    self._tasks.append((future, pid_path))
+                status, *payload = future.result()
+                break
+            except (BrokenProcessPool, CancelledError):
+                _retire(pool)
+                if self.aborted:
+                    raise HTTPException(status_code=500, detail=f"Error executing node '{node_id}' ({node_def.get('function')}): run was interrupted")
+                if attempt == 2:
+                    raise HTTPException(status_code=500, detail=f"Error executing node '{node_id}' ({node_def.get('function')}): worker process died")
+                # Possibly another run killing its own worker, which breaks every task in the pool
+        if status == "error":
+            raise HTTPException(status_code=payload[0], detail=payload[1])
+        out = payload[0]
+        if "shm" not in out:
+            return out["value"]
+        try:
+            return read_arrow(out["shm"])
+        finally:
+            unlink_all([out["shm"]["path"]])
+
+    def abort(self):
+        """Stop this run's in-flight nodes: queued ones are cancelled, running ones' workers killed."""
+        self.aborted = True
+        with self._lock:
+            tasks, self._tasks = self._tasks, []
+        for future, pid_path in tasks:
+            if not future.cancel() and not future.done():
+                _kill_task(future, pid_path)
+
+    def close(self):
+        unlink_all(self._paths)
+        self._paths.clear()
@@ -0,0 +1,263 @@
+# pushdown.py
+"""
+Reader-level pushdown for read_* nodes.
+
+- ColumnSelector: injected usecols/columns (see plan_projection in main).
+- translate_query: the part of a DataFrame.query expression that maps onto
+  pyarrow `filters` (DNF of (column, op, value)); the query node still runs
+  on the result, so anything left out only costs rows, never correctness.
+- ordered_comparison_columns: the columns a query orders (<, <=, >, >=),
+  which optimized reads must not turn into unordered categoricals.
+- read_parquet_pruned: reads only the row groups whose statistics can match
+  those filters, keeping the row labels a full read would have given.
+"""
+import ast
+import io
+import re
+import tokenize
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except Exception:  # optional: without it reads are never pruned
+    pa = pa_csv = ds = pq = None
+
+Conjunction = List[Tuple[str, str, Any]]
+DNF = List[Conjunction]
+
+# Beyond this many OR-ed conjunctions the statistics check costs more than it saves
+MAX_CONJUNCTIONS = 16
+
+_COMPARE_OPS = {ast.Eq: "==", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=", ast.In: "in"}
+_FLIPPED = {"<": ">", "<=": ">=", ">": "<", ">=": "<=", "==": "=="}
+
+
+class ColumnSelector:
+    """
+    Injected usecols/columns. A predicate rather than a list, so a name the
+    file doesn't have is skipped and the consumer fails (or not) exactly as
+    it would have; the repr is stable so cache keys stay deterministic.
+    """
+
+    def __init__(self, columns: List[str]):
+        self.columns = sorted(set(columns))
+        self._names = frozenset(self.columns)
+
+    def __call__(self, name: Any) -> bool:
+        return name in self._names
+
+    def __repr__(self) -> str:
+        return f"ColumnSelector({self.columns!r})"
+
+
+class RowGroupFilter:
+    """Injected `filters` for a read node: used to skip row groups, never to drop rows."""
+
+    def __init__(self, dnf: DNF):
+        self.dnf = dnf
+
+    def columns(self) -> List[str]:
+        return sorted({col for conj in self.dnf for col, _, _ in conj})
+
+    def __repr__(self) -> str:
+        return f"RowGroupFilter({self.dnf!r})"
+
+
+def bind_columns(func_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn an injected selector into the list read_parquet/read_feather expect
+    for `columns`, and the pyarrow CSV engine for `usecols`.
+    """
+    arrow_csv = params.get("engine") == "pyarrow"
+    option = "usecols" if arrow_csv else "columns"
+    selector = params.get(option)
+    if not isinstance(selector, ColumnSelector):
+        return params
+    src = params.get("filepath_or_buffer")
+    try:
+        pos = src.tell() if hasattr(src, "seek") else None
+        try:
+            if arrow_csv:
+                sep = params.get("sep", params.get("delimiter")) or ("\t" if func_name.endswith("read_table") else ",")
+                names = pa_csv.open_csv(src, parse_options=pa_csv.ParseOptions(delimiter=sep)).schema.names
+            elif func_name.endswith("read_parquet"):
+                names = pq.read_schema(src).names
+            else:
+                names = pa.ipc.open_file(src).schema.names
+        finally:
+            if pos is not None:
+                src.seek(pos)
+        columns = [n for n in names if selector(n)]
+    except Exception:
+        if arrow_csv:
+            return params  # header unreadable: the C parser takes the selector as is
+        columns = None  # schema unreadable here: read every column
+    return dict(params, **{option: columns})
+
+
+# ---------------- query translation ----------------
+
+def _boolean_tokens(expr: str) -> str:
+    # The pandas query parser gives & and | the precedence of and/or
+    lines = expr.splitlines(keepends=True)
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+    out, pos = [], 0
+    for tok in tokenize.generate_tokens(io.StringIO(expr).readline):
+        if tok.type == tokenize.OP and tok.string in ("&", "|"):
+            at = starts[tok.start[0] - 1] + tok.start[1]
+            out.append(expr[pos:at])
+            out.append(" and " if tok.string == "&" else " or ")
+            pos = at + 1
+    out.append(expr[pos:])
+    return "".join(out)
+
+
+def _literal(node: ast.AST) -> Tuple[bool, Any]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) \
+            and not isinstance(node.value, bool):
+        return True, node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        ok, value = _literal(node.operand)
+        return (True, -value) if ok and not isinstance(value, str) else (False, None)
+    if isinstance(node, (ast.List, ast.Tuple)) and node.elts:
+        values = [_literal(e) for e in node.elts]
+        if all(ok for ok, _ in values):
+            return True, [v for _, v in values]
+    return False, None
+
+
+def _comparison(left: ast.AST, op: ast.cmpop, right: ast.AST) -> Optional[Tuple[str, str, Any]]:
+    sym = _COMPARE_OPS.get(type(op))
+    if sym is None:
+        return None  # != and `not in` keep missing values that a filter would drop
+    if isinstance(right, ast.Name) and not isinstance(left, ast.Name) and sym != "in":
+        left, right, sym = right, left, _FLIPPED[sym]
+    if not isinstance(left, ast.Name):
+        return None
+    ok, value = _literal(right)
+    if not ok:
+        return None
+    if isinstance(value, list):
+        # `col == [..]` means isin in query
+        return (left.id, "in", value) if sym in ("==", "in") else None
+    return None if sym == "in" else (left.id, sym, value)
+
+
+def _translate(node: ast.AST) -> Optional[DNF]:
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        # Dropping an untranslatable conjunct only widens the filter
+        parts = [p for p in (_translate(v) for v in node.values) if p is not None]
+        if not parts:
+            return None
+        dnf: DNF = [[]]
+        for part in parts:
+            dnf = [a + b for a in dnf for b in part]
+            if len(dnf) > MAX_CONJUNCTIONS:
+                return None
+        return dnf
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.Or):
+        parts = [_translate(v) for v in node.values]
+        if any(p is None for p in parts):
+            return None
+        dnf = [conj for part in parts for conj in part]
+        return dnf if len(dnf) <= MAX_CONJUNCTIONS else None
+    if isinstance(node, ast.Compare):
+        # Chains (1 < a < 5) are a conjunction of their links
+        terms = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            terms.append(_comparison(left, op, right))
+            left = right
+        terms = [t for t in terms if t is not None]
+        return [terms] if terms else None
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "isin" \
+            and isinstance(node.func.value, ast.Name) and len(node.args) == 1 and not node.keywords:
+        ok, value = _literal(node.args[0])
+        return [[(node.func.value.id, "in", value)]] if ok and isinstance(value, list) else None
+    return None
+
+
+def parse_query(expr: Any) -> Optional[ast.AST]:
+    """AST of a DataFrame.query expression; None for @locals, backticks or bad syntax."""
+    if not isinstance(expr, str) or "`" in expr or "@" in expr:
+        return None
+    try:
+        return ast.parse(_boolean_tokens(expr).strip(), mode="eval").body
+    except (SyntaxError, tokenize.TokenError, ValueError):
+        return None
+
+
+def translate_query(expr: Any) -> Optional[DNF]:
+    """pyarrow filters implied by a query expression, or None if nothing translates."""
+    tree = parse_query(expr)
+    return _translate(tree) if tree is not None else None
+
+
+def ordered_comparison_columns(expr: Any) -> Set[str]:
+    """Names a query compares with <, <=, > or >=; every name in it when it doesn't parse."""
+    tree = parse_query(expr)
+    if tree is None:
+        text = expr if isinstance(expr, str) else ""
+        return {quoted or name for quoted, name in re.findall(r"`([^`]*)`|([A-Za-z_]\w*)", text)}
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Compare):
+            operands = [node.left] + node.comparators
+            for op, a, b in zip(node.ops, operands, operands[1:]):
+                if isinstance(op, (ast.Lt, ast.LtE, ast.Gt, ast.GtE)):
+                    names.update(n.id for n in (a, b) if isinstance(n, ast.Name))
+    return names
+
+
+# ---------------- pruned Parquet reads ----------------
+
+def _matching_row_groups(path: str, dnf: DNF) -> Optional[List[int]]:
+    try:
+        fragment = next(iter(ds.dataset(path, format="parquet").get_fragments()))
+        expr = pq.filters_to_expression(dnf)
+        return sorted(rg.id for f in fragment.split_by_row_group(expr) for rg in f.row_groups)
+    except Exception:
+        return None  # e.g. a string literal against a numeric column: read everything
+
+
+def read_parquet_pruned(path: Any, row_filter: RowGroupFilter, columns: Optional[List[str]],
+                        fallback: Callable[[], pd.DataFrame],
+                        dtype_backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    read_parquet(path, columns=columns, dtype_backend=...) minus the row
+    groups `row_filter` rules out. Calls `fallback` (the plain read) when
+    nothing can be skipped or the file can't be checked.
+    """
+    if pq is None or not isinstance(path, str):
+        return fallback()
+    try:
+        pf = pq.ParquetFile(path)
+        schema = pf.schema_arrow
+    except Exception:
+        return fallback()
+    if any(c not in schema.names for c in row_filter.columns()):
+        return fallback()  # index level or a typo: the query decides
+    kept = _matching_row_groups(path, row_filter.dnf)
+    if kept is None or len(kept) == pf.num_row_groups:
+        return fallback()
+
+    table = pf.read_row_groups(kept, columns=columns, use_pandas_metadata=True)
+    df = table.to_pandas(types_mapper=pd.ArrowDtype if dtype_backend == "pyarrow" else None)
+    index = (schema.pandas_metadata or {}).get("index_columns", [])
+    if index and not isinstance(index[0], dict):
+        return df  # stored index columns came back with their rows
+    # Range (or default) index: relabel rows with the positions a full read gives them
+    rng = index[0] if index else {"start": 0, "step": 1, "name": None}
+    sizes = [pf.metadata.row_group(i).num_rows for i in range(pf.num_row_groups)]
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    positions = np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in kept] or [np.empty(0, dtype=np.int64)])
+    df.index = pd.Index(rng["start"] + rng["step"] * positions.astype(np.int64), name=rng.get("name"))
+    return df
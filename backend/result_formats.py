@@ -0,0 +1,251 @@
+# result_formats.py
+"""
+Binary and line-oriented encodings of a pipeline result, picked by the
+`format` form field or the request's Accept header.
+
+- arrow:   Arrow IPC stream (application/vnd.apache.arrow.stream)
+- parquet: one Parquet file (application/vnd.apache.parquet)
+- ndjson:  one JSON object per row (application/x-ndjson)
+
+Arrow and Parquet keep dtypes and the index (pandas metadata). Arrow-backed
+columns (`ingest: arrow`) enter the table without a copy, so the only copy
+is the encoded buffer into the response body. `json` stays the default
+columns/rows body built by serialize_result.
+
+encode_stream does the same chunk by chunk for streamed responses: an IPC
+record batch or Parquet row group per chunk, so bytes leave before the
+last chunk is encoded. The first chunk fixes the Arrow schema; a later
+chunk that can't be cast to it ends the stream with an error. As in
+encode, a default RangeIndex is left out and any other index is kept,
+here as columns in every batch: the first chunk decides for the whole
+stream, unless the caller knows the chunks' labels vary (`index=True`).
+"""
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # optional: arrow/parquet need it, ndjson does not
+    pa = pq = None
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "ndjson": "application/x-ndjson",
+}
+# Accept values other clients send for the same formats
+_ALIASES = {
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/x-parquet": "parquet",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+    "application/jsonlines": "ndjson",
+}
+# Rows per chunk when a materialized result is streamed
+STREAM_RESPONSE_ROWS = int(os.getenv("PIPELINE_STREAM_RESPONSE_ROWS", "65536"))
+
+
+class EncodedResult:
+    """An encoded run result; job_result sends it as the raw response body."""
+
+    def __init__(self, fmt: str, body: bytes, headers: Dict[str, str]):
+        self.format = fmt
+        self.body = body
+        self.media_type = MEDIA_TYPES[fmt]
+        self.headers = headers
+
+
+class StreamedResult:
+    """A run result sent chunk by chunk; job_result wraps it in a StreamingResponse."""
+
+    def __init__(self, fmt: str, chunks: Iterable[Any], headers: Dict[str, str],
+                 trailer: Optional[Callable[[], Dict[str, Any]]] = None, index: Optional[bool] = None):
+        self.format = fmt
+        self.media_type = MEDIA_TYPES[fmt]
+        self.headers = headers
+        self._chunks = chunks
+        self._trailer = trailer
+        self._index = index
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            yield from encode_stream(self._chunks, self.format, self._trailer, self._index)
+        finally:
+            self.close()
+
+    def close(self):
+        # Stops the upstream chunk generators (and their file readers) if the client went away
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def negotiate(fmt: Optional[str], accept: Optional[str]) -> str:
+    """The `format` field wins; otherwise the first known Accept media type; else json."""
+    if fmt:
+        name = fmt.strip().lower()
+        if name not in MEDIA_TYPES:
+            raise ValueError(f"'format' must be one of {', '.join(MEDIA_TYPES)}, got {fmt!r}")
+        return name
+    by_type = {v: k for k, v in MEDIA_TYPES.items()}
+    for part in (accept or "").split(","):
+        media = part.split(";")[0].strip().lower()
+        name = by_type.get(media) or _ALIASES.get(media)
+        if name is not None:
+            return name
+    return "json"
+
+
+def requires_pyarrow(fmt: str) -> bool:
+    return fmt in ("arrow", "parquet") and pa is None
+
+
+def _frame(result: Any) -> pd.DataFrame:
+    if isinstance(result, pd.DataFrame):
+        df = result
+    elif isinstance(result, pd.Series):
+        df = result.to_frame(result.name if result.name is not None else "value")
+    elif isinstance(result, np.ndarray):
+        df = pd.DataFrame(result.reshape(len(result), -1) if result.ndim else result.reshape(1, 1))
+    else:
+        df = pd.DataFrame({"value": [result]})
+    # Arrow has no sparse type and wants string field names
+    sparse = [i for i, t in enumerate(df.dtypes) if isinstance(t, pd.SparseDtype)]
+    if sparse or not all(isinstance(c, str) for c in df.columns):
+        df = df.copy(deep=False)
+        for i in sparse:
+            df.isetitem(i, df.iloc[:, i].sparse.to_dense())
+        df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def display_rows(df: pd.DataFrame) -> List[List[Optional[str]]]:
+    """The `rows` of a json body: each cell as its display string, missing cells as null."""
+    out = np.empty(df.shape, dtype=object)
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if isinstance(col.dtype, np.dtype):
+            text = col.astype(str)
+        else:
+            # Extension arrays stringify through numpy: nullable/Arrow ints with gaps become "5.0"
+            text = col.astype(object).map(str)
+        out[:, i] = text.where(col.notna(), None).to_numpy(dtype=object)
+    return out.tolist()
+
+
+def encode(result: Any, fmt: str) -> bytes:
+    """`result` encoded as `fmt`."""
+    df = _frame(result)
+    if fmt == "ndjson":
+        if df.empty:
+            return b""
+        return df.to_json(orient="records", lines=True, date_format="iso", default_handler=str).encode("utf-8")
+    table = pa.Table.from_pandas(df, preserve_index=None)
+    sink = pa.BufferOutputStream()
+    if fmt == "arrow":
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+# ---------------- streamed encoding ----------------
+
+class _Drain:
+    """Write-only sink handing back what was written since the last take()."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data: Any) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def iter_chunks(result: Any, rows: Optional[int] = None) -> Iterator[Any]:
+    """Row slices of a materialized result (at least one, so an empty result still has a schema)."""
+    rows = rows or STREAM_RESPONSE_ROWS
+    if not isinstance(result, (pd.DataFrame, pd.Series)):
+        result = _frame(result)
+    for start in range(0, max(len(result), 1), max(1, rows)):
+        yield result.iloc[start:start + rows]
+
+
+def _default_index(index: pd.Index) -> bool:
+    return isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1 and index.name is None
+
+
+def _json_stream(chunks: Iterable[Any], trailer: Optional[Callable[[], Dict[str, Any]]]) -> Iterator[bytes]:
+    # The serialize_result body, rows written as they come and totals at the end
+    started = wrote = False
+    for chunk in chunks:
+        df = _frame(chunk)
+        if not started:
+            started = True
+            yield ('{"columns": ' + json.dumps(list(df.columns)) + ', "dtypes": '
+                   + json.dumps([str(t) for t in df.dtypes]) + ', "rows": [').encode("utf-8")
+        if len(df):
+            yield ((", " if wrote else "") + json.dumps(display_rows(df))[1:-1]).encode("utf-8")
+            wrote = True
+    if not started:
+        yield b'{"columns": [], "dtypes": [], "rows": ['
+    tail = json.dumps(trailer() if trailer else {})[1:-1]
+    yield ("]" + (", " + tail if tail else "") + "}").encode("utf-8")
+
+
+def encode_stream(chunks: Iterable[Any], fmt: str,
+                  trailer: Optional[Callable[[], Dict[str, Any]]] = None,
+                  index: Optional[bool] = None) -> Iterator[bytes]:
+    """
+    Encoded pieces of `chunks` as `fmt`; `trailer` adds closing fields to the
+    json body. `index` keeps (True) or drops (False) every chunk's index in
+    arrow/parquet; None lets the first chunk decide.
+    """
+    if fmt == "json":
+        yield from _json_stream(chunks, trailer)
+        return
+    if fmt == "ndjson":
+        for chunk in chunks:
+            df = _frame(chunk)
+            if len(df):
+                yield df.to_json(orient="records", lines=True, date_format="iso", default_handler=str).encode("utf-8")
+        return
+    sink = _Drain()
+    writer = schema = None
+    for chunk in chunks:
+        df = _frame(chunk)
+        if index is None:
+            # Range metadata can't span batches (readers renumber from 0), so a kept index is columns
+            index = not _default_index(df.index)
+        table = pa.Table.from_pandas(df, preserve_index=index)
+        if writer is None:
+            schema = table.schema
+            writer = pa.ipc.new_stream(sink, schema) if fmt == "arrow" else pq.ParquetWriter(sink, schema)
+        elif not table.schema.equals(schema, check_metadata=False):
+            table = table.cast(schema)
+        writer.write_table(table)
+        out = sink.take()
+        if out:
+            yield out
+    if writer is None:
+        table = pa.Table.from_pandas(pd.DataFrame(), preserve_index=False)
+        writer = pa.ipc.new_stream(sink, table.schema) if fmt == "arrow" else pq.ParquetWriter(sink, table.schema)
+    writer.close()
+    yield sink.take()
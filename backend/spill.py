@@ -0,0 +1,159 @@
+# spill.py
+"""
+Spill-to-disk store for a run's intermediate results.
+
+Behaves like the plain `executed` dict, but once the resident size passes a
+threshold the least recently used DataFrames/Series are written to Arrow IPC
+files under LOCAL_STORAGE and memory-mapped back when a downstream node reads them.
+Results a node cache still holds are never spilled: writing them out would
+free nothing, since the cache entry keeps the same buffers alive.
+"""
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from node_cache import detach, result_nbytes, shares_cached_data
+from process_executor import available as arrow_available, read_arrow, write_arrow, unlink_all
+
+SPILL_THRESHOLD_BYTES = int(os.getenv("PIPELINE_SPILL_THRESHOLD_BYTES", str(1024 * 1024 * 1024)))
+
+
+def spilling_enabled() -> bool:
+    return SPILL_THRESHOLD_BYTES > 0 and arrow_available()
+
+
+class SpillingResults(MutableMapping):
+    def __init__(self, root: Path, threshold_bytes: Optional[int] = None):
+        self.threshold_bytes = SPILL_THRESHOLD_BYTES if threshold_bytes is None else threshold_bytes
+        self.resident_bytes = 0
+        self.peak_resident_bytes = 0
+        self.spill_count = 0
+        self.spilled_bytes = 0
+        self._dir = root / f"run-{uuid.uuid4().hex}"
+        self._resident: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._spilled: Dict[str, Dict[str, Any]] = {}
+        # Spilled results as read back: views of the mapped file, so their pages stay
+        # file-backed. Readers get detached copies: shallow under copy-on-write, which
+        # with the mapped frame still referenced here copies any write instead of hitting
+        # its read-only arrays; deep (and writable) otherwise.
+        self._mapped: Dict[str, Any] = {}
+        self._in_flight: set = set()
+        self._lock = threading.Lock()
+
+    # -------- mapping protocol --------
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._resident or key in self._spilled
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            entry = self._resident.get(key)
+            if entry is not None:
+                self._resident.move_to_end(key)
+                return entry[0]
+            mapped = self._mapped.get(key)
+            if mapped is None:
+                # Not re-admitted to the resident set: the pages belong to the file
+                mapped = self._mapped[key] = read_arrow(self._spilled[key], memory_map=True)
+        return detach(mapped)
+
+    def __setitem__(self, key: str, value: Any):
+        size = result_nbytes(value)
+        with self._lock:
+            self._forget(key)
+            self._resident[key] = (value, size)
+            self.resident_bytes += size
+            self.peak_resident_bytes = max(self.peak_resident_bytes, self.resident_bytes)
+            victims = self._pick_victims(keep=key)
+        self._spill(victims)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            if key not in self._resident and key not in self._spilled:
+                raise KeyError(key)
+            self._forget(key)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._resident) + list(self._spilled))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._resident) + len(self._spilled)
+
+    # -------- spilling --------
+
+    def _forget(self, key: str):
+        entry = self._resident.pop(key, None)
+        if entry is not None:
+            self.resident_bytes -= entry[1]
+        self._mapped.pop(key, None)
+        desc = self._spilled.pop(key, None)
+        if desc is not None:
+            unlink_all([desc["path"]])
+
+    def _pick_victims(self, keep: str) -> List[str]:
+        victims = []
+        over = self.resident_bytes - self.threshold_bytes
+        for key, (value, size) in self._resident.items():
+            if over <= 0:
+                break
+            if key == keep or key in self._in_flight or not isinstance(value, (pd.DataFrame, pd.Series)):
+                continue
+            if shares_cached_data(value):
+                continue
+            victims.append(key)
+            self._in_flight.add(key)
+            over -= size
+        return victims
+
+    def _spill(self, victims: List[str]):
+        # File writes happen outside the lock so other workers keep going
+        for key in victims:
+            with self._lock:
+                entry = self._resident.get(key)
+            desc = None
+            if entry is not None:
+                try:
+                    self._dir.mkdir(parents=True, exist_ok=True)
+                    desc = write_arrow(entry[0], self._dir)
+                except Exception:
+                    desc = None  # e.g. non-string column labels: stay resident
+            with self._lock:
+                self._in_flight.discard(key)
+                current = self._resident.get(key)
+                if desc is None or current is None or current[0] is not entry[0]:
+                    if desc is not None:
+                        unlink_all([desc["path"]])
+                    continue
+                self._resident.pop(key)
+                self.resident_bytes -= current[1]
+                self._spilled[key] = desc
+                self.spill_count += 1
+                self.spilled_bytes += current[1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold_bytes": self.threshold_bytes,
+                "resident_bytes": self.resident_bytes,
+                "peak_resident_bytes": self.peak_resident_bytes,
+                "spilled": self.spill_count,
+                "spilled_bytes": self.spilled_bytes,
+            }
+
+    def close(self):
+        with self._lock:
+            self._resident.clear()
+            self._spilled.clear()
+            self._mapped.clear()
+            self.resident_bytes = 0
+        shutil.rmtree(self._dir, ignore_errors=True)
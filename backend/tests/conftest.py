@@ -0,0 +1,78 @@
+# conftest.py
+"""
+Shared fixtures for the backend tests: a TestClient over main.app with
+LOCAL_STORAGE pointed at a scratch directory, and process-wide caches
+emptied before every test so one test's results never serve another's.
+
+    cd backend && python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+os.environ.setdefault("LOCAL_STORAGE", tempfile.mkdtemp(prefix="pipeline-tests-"))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import node_cache  # noqa: E402
+import process_executor  # noqa: E402
+import uploads  # noqa: E402
+
+CSV = b"a,b,c\n1,x,3.0\n2,y,4.0\n3,x,5.0\n"
+# `tests.slow` sleeps for `seconds`, then passes its input on (see the slow_function fixture)
+SLOW = """
+nodes:
+  r:
+    function: read_csv
+    params: {filepath_or_buffer: data.csv}
+  s:
+    function: tests.slow
+    params: {self: r, seconds: %s}
+%s
+"""
+
+
+def _slow(self, seconds):
+    time.sleep(float(seconds))
+    return self
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    node_cache.NODE_CACHE.clear()
+    uploads.PARSED_UPLOADS.clear()
+    main.PLAN_CACHE.clear()
+    yield
+
+
+@pytest.fixture
+def run(client):
+    """POST /pipeline/run; `csv` is sent as the run's uploaded data.csv (None sends no file)."""
+
+    def _run(yaml_text: str, csv: bytes = CSV, filename: str = "data.csv", **fields):
+        files = {"file": (filename, csv)} if csv is not None else None
+        return client.post("/pipeline/run", data={"yaml": yaml_text, **fields}, files=files)
+
+    return _run
+
+
+@pytest.fixture
+def slow_function(monkeypatch):
+    # Workers fork from a pool started after the name is registered
+    process_executor.shutdown_pool()
+    monkeypatch.setattr(process_executor, "PROCESS_WORKERS", 2)
+    monkeypatch.setitem(main.resolution_table(), "tests.slow", _slow)
+    main.PLAN_CACHE.clear()
+    yield
+    process_executor.shutdown_pool()
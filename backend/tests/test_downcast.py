@@ -0,0 +1,69 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+import downcast
+
+CITIES = ("city,amount\n" + "\n".join(f"{c},{i}" for i, c in enumerate(["a", "b", "c", "a", "b", "a"] * 5))).encode()
+
+GROUPED = """
+nodes:
+  r:
+    function: read_csv
+    params: {filepath_or_buffer: data.csv}
+    optimize: %s
+  f:
+    function: DataFrame.query
+    params: {self: r, expr: "city != 'c'"}
+  g:
+    function: DataFrame.groupby
+    params: {self: f, by: city}
+  s:
+    function: pandas.core.groupby.DataFrameGroupBy.sum
+    params: {self: g}
+  lookup:
+    function: DataFrame.drop_duplicates
+    params: {self: r}
+  m:
+    function: merge
+    params: {left: f, right: lookup, "on": [city, amount], how: left}
+outputs: [s, m]
+"""
+
+
+@pytest.mark.parametrize("target", ["s", "m"])
+def test_optimized_read_gives_the_same_results(run, target):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        plain = run(GROUPED % "false", csv=CITIES, preview_node=target)
+        optimized = run(GROUPED % "true", csv=CITIES, preview_node=target)
+    assert plain.status_code == optimized.status_code == 200, optimized.text
+    assert optimized.json()["rows"] == plain.json()["rows"]
+    assert optimized.json()["total_rows"] == plain.json()["total_rows"]
+
+
+def test_columns_a_query_orders_stay_text(run):
+    nodes = """
+nodes:
+  r: {function: read_csv, params: {filepath_or_buffer: data.csv}, optimize: %s}
+  q: {function: DataFrame.query, params: {self: r, expr: "city > 'a' and amount < 20"}}
+"""
+    plain = run(nodes % "false", csv=CITIES)
+    optimized = run(nodes % "true", csv=CITIES)
+    assert plain.status_code == optimized.status_code == 200, optimized.text
+    assert optimized.json()["rows"] == plain.json()["rows"]
+
+
+def test_key_columns_stay_text():
+    df = pd.DataFrame({"city": ["a", "b"] * 10, "kind": ["x", "y"] * 10})
+    opts = downcast.parse_options(True).with_key_columns(["city"])
+    out, report = downcast.optimize_frame(df, opts)
+    assert out["city"].dtype == object
+    assert isinstance(out["kind"].dtype, pd.CategoricalDtype)
+    assert list(report["columns"]) == ["kind"]
+
+
+def test_key_columns_are_not_an_option():
+    with pytest.raises(ValueError):
+        downcast.parse_options({"key_columns": ["city"]})
@@ -0,0 +1,136 @@
+"""pandas vs `engine: duckdb` on the cases where SQL and pandas semantics part ways."""
+import io
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+READ = "  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+
+
+def check(run, nodes: str, csv: str, engine: str = "duckdb"):
+    """Run with engine_check; returns {node: engine it ran in} after asserting the outputs match pandas."""
+    r = run(f"engine: {engine}\nengine_check: true\ncache: false\nnodes:\n" + nodes, csv=csv.encode())
+    assert r.status_code == 200, r.text
+    report = r.json()["engine"]
+    assert report["check"] == {"match": True, "mismatches": {}}
+    return {nid: n["engine"] for nid, n in report["nodes"].items()}
+
+
+TIES = "k,j,v\n" + "\n".join(f"{i % 3 if i % 7 else ''},{i % 2},{i}" for i in range(200))
+
+
+@pytest.mark.parametrize("params, engine", [
+    ("by: k", "pandas"),  # quicksort ties: no SQL order reproduces them
+    ("by: k, ascending: false", "pandas"),
+    ("by: k, kind: stable", "duckdb"),
+    ("by: k, kind: stable, ascending: false, na_position: first", "duckdb"),
+    ("by: [k, j], ascending: [false, true]", "duckdb"),
+    ("by: v", "duckdb"),
+])
+def test_sort_with_ties(run, params, engine):
+    ran = check(run, READ + f"  s: {{function: DataFrame.sort_values, params: {{self: r, {params}}}}}\n", TIES)
+    assert ran["s"] == engine
+
+
+MERGE = READ + """  q: {function: DataFrame.query, params: {self: r, expr: "v > 2"}}
+  m: {function: merge, params: {left: r, right: q, %s}}
+"""
+NAN_KEYS = "k,v,b\na,1,True\n,2,False\nb,3,True\n,4,True\nc,5,False\n"
+
+
+@pytest.mark.parametrize("params", ['"on": k', '"on": k, how: left', '"on": [k, v], how: left'])
+def test_nan_join_keys(run, params):
+    assert check(run, MERGE % params, NAN_KEYS)["m"] == "duckdb"
+
+
+def test_numeric_nan_join_keys(run):
+    assert check(run, MERGE % '"on": k', "k,v\n1,3\n,4\n2,5\n,6\n")["m"] == "duckdb"
+
+
+def test_left_merge_upcasts_unmatched_columns(run):
+    # Unmatched rows turn the right side's int64 into float64 and bool into object
+    ran = check(run, MERGE.replace("v > 2", "v == 1") % '"on": k, how: left', NAN_KEYS)
+    assert ran["m"] == "duckdb"
+
+
+GROUPED = "k,x,y\na,1,\nb,,\n,3,4\na,2,\nb,,5\n"
+
+
+@pytest.mark.parametrize("agg", [
+    "DataFrameGroupBy.sum, params: {self: g}",  # all-NaN group sums to 0
+    "DataFrameGroupBy.min, params: {self: g}",
+    "DataFrameGroupBy.count, params: {self: g}",
+    "DataFrameGroupBy.agg, params: {self: g, func: {x: sum, y: mean}}",
+])
+def test_groupby_nan_keys_and_all_nan_groups(run, agg):
+    nodes = READ + "  g: {function: DataFrame.groupby, params: {self: r, by: k}}\n" \
+        + f"  a: {{function: pandas.core.groupby.{agg}}}\n"
+    assert check(run, nodes, GROUPED)["a"] == "duckdb"
+
+
+@pytest.mark.parametrize("expr", ["a > 1", "a != 3", "b != 'x'", "not (a == 1)", "b not in ['x']", "a == a",
+                                  "~(b == 'x') and a < 4"])
+def test_query_on_nulls(run, expr):
+    nodes = READ + f'  q: {{function: DataFrame.query, params: {{self: r, expr: "{expr}"}}}}\n'
+    assert check(run, nodes, "a,b\n1,x\n,y\n3,\n,\n5,x\n")["q"] == "duckdb"
+
+
+SNIFF = {
+    "t/f": "a,b\nt,1\nf,2\n",
+    "yes/no": "a,b\nyes,1\nno,2\n",
+    "True/false": "a,b\nTRUE,1\nfalse,2\n",
+    "leading zeros": "a\n007\n010\n",
+    "plus sign": "a\n+1\n2\n",
+    "hex": "a\n0x10\n1\n",
+    "whitespace": "a\n 1\n2 \n",
+    "only missing": "a,b\n,1\n,2\n",
+    "ints with gaps": "a,b\n1,x\n,y\n",
+    "duplicate header": "a,a\n1,2\n",
+    "no rows": "a,b\n",
+    "floats": "a\n1.\n.5\n1e3\ninf\n",
+}
+
+
+@pytest.mark.parametrize("name", sorted(SNIFF))
+def test_csv_types_follow_read_csv(run, name):
+    nodes = READ + "  h: {function: DataFrame.head, params: {self: r, n: 100000}}\n"
+    assert check(run, nodes, SNIFF[name])["r"] == "duckdb"
+
+
+@pytest.mark.parametrize("csv", [
+    "a,b\n" + "\n".join(f"{i},{i}" for i in range(30000)) + "\nx,1\n",  # text after the sampled rows
+    "a\n99999999999999999999\n1\n",
+    "a\n18446744073709551615\n1\n",  # read_csv: uint64
+])
+def test_csv_columns_duckdb_types_differently_fall_back(run, csv):
+    nodes = READ + "  h: {function: DataFrame.head, params: {self: r, n: 10}}\n"
+    assert check(run, nodes, csv)["r"] == "pandas"
+
+
+@pytest.mark.parametrize("csv", [
+    "a,b,c,d\n,1,,\n,2,,\n,3,True,x\n5,4,False,\n",  # missing in the sample: decided by the full scan
+    "a,b\n1,x\n2,y\n3,True\n",
+])
+def test_csv_types_past_a_small_sample(run, monkeypatch, csv):
+    import duckdb_engine
+
+    monkeypatch.setattr(duckdb_engine, "CSV_SAMPLE_ROWS", 2)
+    nodes = READ + "  h: {function: DataFrame.head, params: {self: r, n: 10}}\n"
+    assert check(run, nodes, csv)["r"] == "duckdb"
+
+
+def test_parquet_pandas_extension_dtypes_stay_in_pandas(run):
+    buf = io.BytesIO()
+    pd.DataFrame({"a": pd.array([1, None, 3], dtype="Int64"), "b": pd.Categorical(["x", "y", "x"]),
+                  "c": [1, 2, 3]}).to_parquet(buf, index=False)
+    nodes = "  r: {function: read_parquet, params: {path: data.parquet}}\n" \
+        "  h: {function: DataFrame.head, params: {self: r, n: 10}}\n"
+    r = run("engine: duckdb\nengine_check: true\ncache: false\nnodes:\n" + nodes,
+            csv=buf.getvalue(), filename="data.parquet")
+    assert r.status_code == 200, r.text
+    report = r.json()["engine"]
+    assert report["check"] == {"match": True, "mismatches": {}}
+    assert r.json()["dtypes"] == ["Int64", "category", "int64"]
+    assert {nid: n["engine"] for nid, n in report["nodes"].items()} == {"r": "pandas", "h": "pandas"}
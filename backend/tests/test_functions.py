@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+READ = "  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("merge", pd.merge),
+    ("pandas.merge", pd.merge),
+    ("DataFrame.head", pd.DataFrame.head),
+    ("numpy.mean", np.mean),
+    ("linalg.norm", np.linalg.norm),
+    ("numpy.ma.masked_invalid", np.ma.masked_invalid),  # outside the table: resolved by import
+])
+def test_names_resolve_like_the_importing_resolver(name, expected):
+    assert main.get_callable_from_name(name) is expected
+    assert main._resolve_by_import(name) is expected
+
+
+def test_unknown_functions_are_reported_and_memoized(run):
+    misses = main._resolve_fallback.cache_info().misses
+    for _ in range(2):
+        r = run("cache: false\nnodes:\n" + READ + "  x: {function: DataFrame.no_such_method, params: {self: r}}\n")
+        assert r.status_code != 200 and "Function 'DataFrame.no_such_method' not found" in r.text
+    assert main._resolve_fallback.cache_info().misses == misses + 1
+
+
+def test_pipeline_nodes_use_resolved_functions(run):
+    nodes = READ + """  c: {function: DataFrame.get, params: {self: r, key: c}}
+  s: {function: numpy.cumsum, params: {a: c}}
+"""
+    r = run("nodes:\n" + nodes)
+    assert r.status_code == 200, r.text
+    assert r.json()["rows"] == [["3.0"], ["7.0"], ["12.0"]]
@@ -0,0 +1,52 @@
+import pytest
+
+import main
+from test_metrics import scrape
+
+READ = """
+cache: false
+nodes:
+  r:
+    function: read_csv
+    ingest: %s
+    params: {filepath_or_buffer: data.csv%s}
+"""
+CSV = b"a,b,c\n1,x,1.5\n2,y,2.5\n3,z,3.5\n"
+
+
+def test_arrow_ingest_keeps_arrow_dtypes(run):
+    arrow = run(READ % ("arrow", ""), csv=CSV).json()
+    numpy = run(READ % ("numpy", ""), csv=CSV).json()
+    assert arrow["dtypes"] == ["int64[pyarrow]", "string[pyarrow]", "double[pyarrow]"]
+    assert numpy["dtypes"] == ["int64", "object", "float64"]
+    assert arrow["rows"] == numpy["rows"]
+
+
+def test_options_the_arrow_parser_rejects_keep_the_c_parser(run):
+    body = run(READ % ("arrow", ", nrows: 2"), csv=CSV).json()
+    assert body["total_rows"] == 2 and body["dtypes"][0] == "int64[pyarrow]"
+
+
+def test_files_arrow_cannot_parse_fall_back(client, run):
+    fallbacks = 'tharavu_read_ingest_fallbacks_total{function="read_csv"}'
+    before = scrape(client).get(fallbacks, 0)
+    ragged = b"a,b\n1,2,3\n4,5,6\n"  # pandas makes the extra first column the index; pyarrow rejects it
+    arrow = run(READ % ("arrow", ""), csv=ragged)
+    numpy = run(READ % ("numpy", ""), csv=ragged)
+    assert arrow.status_code == numpy.status_code == 200, arrow.text
+    assert arrow.json()["rows"] == numpy.json()["rows"]
+    assert scrape(client)[fallbacks] == before + 1
+
+
+def test_unknown_ingest_modes_are_rejected(run):
+    r = run(READ % ("polars", ""), csv=CSV)
+    assert r.status_code != 200 and "ingest must be one of numpy, arrow" in r.text
+
+
+@pytest.mark.parametrize("mode", main.INGEST_MODES)
+def test_server_default_applies_without_a_node_setting(run, monkeypatch, mode):
+    monkeypatch.setattr(main, "READ_INGEST", mode)
+    main.PLAN_CACHE.clear()
+    body = run("cache: false\nnodes:\n  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n",
+               csv=CSV).json()
+    assert body["dtypes"][0] == ("int64[pyarrow]" if mode == "arrow" else "int64")
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import main
+from conftest import CSV, SLOW
+
+
+def _submit(client, yaml_text: str, **fields):
+    r = client.post("/pipeline/jobs", data={"yaml": yaml_text, **fields}, files={"file": ("data.csv", CSV)})
+    assert r.status_code == 202, r.text
+    return r.json()["id"]
+
+
+def _wait(client, job_id: str, until, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/pipeline/jobs/{job_id}").json().get("status")  # None until submitted
+        if until(status):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {status}")
+
+
+def test_cancelling_a_queued_run_answers_cancelled(client, run, slow_function):
+    busy = [_submit(client, SLOW % (2, "cache: false")) for _ in range(main.PIPELINE_JOB_WORKERS)]
+    for jid in busy:
+        _wait(client, jid, lambda s: s == "running")
+    answer = {}
+    t = threading.Thread(target=lambda: answer.update(r=run(SLOW % (0, "cache: false"), run_id="queued-run")))
+    t.start()
+    _wait(client, "queued-run", lambda s: s == "queued")
+    assert client.delete("/pipeline/jobs/queued-run").json()["status"] == "cancelled"
+    t.join(20)
+    assert answer["r"].status_code == 409, answer["r"].text
+    assert answer["r"].json()["status"] == "cancelled"
+    for jid in busy:
+        _wait(client, jid, lambda s: s != "running")
+
+
+def test_job_history_is_capped_by_result_bytes(client, monkeypatch):
+    monkeypatch.setattr(main, "PIPELINE_JOB_HISTORY_BYTES", 10)
+    nodes = "nodes:\n  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+    first = _submit(client, nodes, format="arrow")
+    _wait(client, first, lambda s: s == "succeeded")
+    second = _submit(client, nodes)
+    _wait(client, second, lambda s: s == "succeeded")
+    # The older result is dropped to get under the cap; the newest is kept even though it alone is over
+    assert client.get(f"/pipeline/jobs/{first}").status_code == 404
+    r = client.get(f"/pipeline/jobs/{second}/result")
+    assert r.status_code == 200 and r.json()["total_rows"] == 3
+
+
+def test_jobs_cancelled_as_they_start_still_answer():
+    # DELETE lost the race with the pool: the future had started, so only the event was set
+    job = main.PipelineJob({}, kept=False)
+    job.cancel_event.set()
+    main._run_job(job)
+    assert job.ready.done() and job.status == "cancelled"
+    assert job.result["status"] == "cancelled" and job.finished_at is not None
@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+import pytest
+
+import main
+
+SPIKE_BYTES = 128 * 1024 * 1024
+NODES = """
+cache: false
+nodes:
+  r:
+    function: read_csv
+    params: {filepath_or_buffer: data.csv}
+  s:
+    function: tests.spike
+    params: {self: r}
+  h:
+    function: DataFrame.head
+    params: {self: s, n: 1}
+"""
+
+
+def _spike(self):
+    # A temporary that is gone again by the time the node returns
+    scratch = np.ones(SPIKE_BYTES // 8)
+    time.sleep(0.2)
+    del scratch
+    return self
+
+
+@pytest.fixture
+def spike(monkeypatch):
+    monkeypatch.setitem(main.resolution_table(), "tests.spike", _spike)
+    main.PLAN_CACHE.clear()
+
+
+def test_peak_rss_includes_memory_freed_inside_a_node(run, spike):
+    r = run(NODES)
+    assert r.status_code == 200, r.text
+    memory = r.json()["memory"]
+    assert memory["rss_peak_bytes"] - max(memory["rss_start_bytes"], memory["rss_end_bytes"]) > SPIKE_BYTES // 2
+
+
+def test_intermediates_are_freed_after_their_last_consumer(run, spike):
+    r = run(NODES, preview_node="h")
+    assert r.status_code == 200, r.text
+    assert r.json()["memory"]["freed_early"] == 2
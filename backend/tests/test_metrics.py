@@ -0,0 +1,43 @@
+import metrics
+
+READ = "nodes:\n  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+
+
+def scrape(client) -> dict:
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"] == metrics.CONTENT_TYPE
+    samples = {}
+    for line in r.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_requests_and_nodes_are_counted(client, run):
+    route = 'tharavu_http_request_duration_seconds_count{route="/pipeline/run",method="POST",status="200"}'
+    node = 'tharavu_pipeline_node_duration_seconds_count{function="read_csv"}'
+    before = scrape(client)
+    assert run(READ).status_code == 200
+    after = scrape(client)
+    assert after[route] == before.get(route, 0) + 1
+    assert after[node] == before.get(node, 0) + 1
+    assert after["tharavu_pipeline_runs_in_flight"] == 0
+
+
+def test_routes_are_labelled_by_template(client):
+    client.get("/files/not-an-upload")
+    samples = scrape(client)
+    assert 'tharavu_http_request_duration_seconds_count{route="/files/{upload_id}",method="GET",status="404"}' \
+        in samples
+    assert not any("not-an-upload" in name for name in samples)
+
+
+def test_cache_counters_follow_the_caches(client, run):
+    hits = 'tharavu_cache_hits_total{cache="node_result"}'
+    before = scrape(client)
+    run(READ)
+    run(READ)
+    after = scrape(client)
+    assert after[hits] == before[hits] + 1
+    assert after['tharavu_cache_entries{cache="node_result"}'] == 1
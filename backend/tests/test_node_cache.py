@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+import main
+import node_cache
+
+READ = """
+nodes:
+  r:
+    function: read_csv
+    params: {filepath_or_buffer: data.csv}
+"""
+
+
+def test_mutating_node_does_not_corrupt_cached_read(run):
+    mutate = READ + """
+  ins:
+    function: DataFrame.insert
+    params: {self: r, loc: 0, column: extra, value: 7}
+"""
+    assert run(mutate, preview_node="r").status_code == 200
+    assert run(mutate, preview_node="ins").status_code == 200
+
+    body = run(READ).json()
+    assert body["columns"] == ["a", "b", "c"]
+    assert node_cache.NODE_CACHE.hits >= 1
+
+
+@pytest.mark.parametrize("copy_on_write", [True, False])
+def test_cache_hands_out_copies(copy_on_write):
+    cache = node_cache.NodeResultCache(1 << 20)
+    with pd.option_context("mode.copy_on_write", copy_on_write):
+        df = pd.DataFrame({"a": [1, 2, 3]})
+        cache.put("k", df)
+        df.loc[0, "a"] = 100
+        hit = cache.get("k")
+        hit["b"] = 1
+        hit.loc[1, "a"] = 200
+        assert cache.get("k").to_dict("list") == {"a": [1, 2, 3]}
+
+
+def _key(function: str, params: dict) -> str:
+    plan = main.build_pipeline_plan({"n": {"function": function, "params": params}})
+    return main.node_cache_key(plan.compiled["n"], {})
+
+
+def test_pure_to_functions_are_cacheable():
+    assert _key("to_datetime", {"arg": "2024-01-02"}) is not None
+    assert _key("to_numeric", {"arg": "5"}) is not None
+
+
+def test_writers_are_not_cacheable():
+    assert _key("DataFrame.to_csv", {"self": "x", "path_or_buf": "out.csv"}) is None
+    assert _key("DataFrame.to_parquet", {"self": "x", "path": "out.parquet"}) is None
@@ -0,0 +1,108 @@
+import time
+
+import main
+
+READ = "  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+# Consumers listed before what they read: the plan orders them, not the YAML
+BRANCHES = """nodes:
+  m: {function: merge, params: {left: h, right: t, "on": a}}
+  h: {function: DataFrame.head, params: {self: r, n: 2}}
+  t: {function: DataFrame.tail, params: {self: r, n: 2}}
+""" + READ
+
+
+def explain(client, yaml_text: str, **fields):
+    return client.post("/pipeline/explain", data={"yaml": yaml_text, **fields})
+
+
+def test_nodes_run_in_dependency_order(client, run):
+    plan = explain(client, BRANCHES).json()
+    assert plan["levels"] == [["r"], ["h", "t"], ["m"]]
+    assert plan["order"] == ["r", "h", "t", "m"]
+    assert plan["edges"] == [["r", "h"], ["r", "t"], ["h", "m"], ["t", "m"]]
+    r = run(BRANCHES)
+    assert r.status_code == 200, r.text
+    assert r.json()["columns"] == ["a", "b_x", "c_x", "b_y", "c_y"]
+    assert r.json()["rows"] == [["2", "y", "4.0", "y", "4.0"]]
+
+
+def test_cycles_name_only_their_members(client):
+    cyclic = "nodes:\n" + READ + """  x: {function: DataFrame.head, params: {self: y}}
+  y: {function: DataFrame.head, params: {self: x}}
+  z: {function: DataFrame.head, params: {self: y}}
+"""
+    r = explain(client, cyclic)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Pipeline has cyclic dependencies among nodes: x, y"
+
+
+def test_unknown_dependencies_are_reported(client):
+    r = explain(client, "nodes:\n" + READ + "  h: {function: DataFrame.head, params: {self: r}, dependencies: [nope]}\n")
+    assert r.status_code == 400
+    assert "node 'h' depends on unknown node(s) nope" in r.json()["detail"]
+
+
+BROKEN = "nodes:\n" + READ + """  h: {function: DataFrame.head, params: {self: r, n: 1}}
+  bad: {function: DataFrame.head, params: {self: r, n: not-a-number}}
+"""
+
+
+def test_only_ancestors_of_the_requested_nodes_run(client, run):
+    assert explain(client, BROKEN, preview_node="h").json()["execute"] == ["r", "h"]
+    assert run(BROKEN).status_code != 200
+    r = run(BROKEN, preview_node="h")
+    assert r.status_code == 200, r.text
+    assert r.json()["total_rows"] == 1
+    r = run(BROKEN, outputs="h")
+    assert r.status_code == 200, r.text
+    assert list(r.json()["outputs"]) == ["h"]
+
+
+SLOW_BRANCHES = "cache: false\nnodes:\n" + READ + """  s1: {function: tests.slow, params: {self: r, seconds: 0.5}}
+  s2: {function: tests.slow, params: {self: r, seconds: 0.5}}
+"""
+
+
+def test_independent_branches_overlap(run, slow_function, monkeypatch):
+    monkeypatch.setattr(main, "PIPELINE_MAX_WORKERS_CAP", 2)  # this host may have one CPU
+
+    def took(workers: int) -> float:
+        t0 = time.monotonic()
+        r = run(SLOW_BRANCHES, outputs="s1,s2", max_workers=str(workers))
+        assert r.status_code == 200, r.text
+        return time.monotonic() - t0
+
+    assert took(1) >= 1.0
+    assert took(2) < 0.9
+
+
+def test_max_workers_must_be_an_integer(run):
+    r = run("max_workers: many\nnodes:\n" + READ)
+    assert r.status_code == 400 and "'max_workers' must be an integer" in r.json()["detail"]
+
+
+def test_reposted_pipelines_reuse_their_compiled_plan(run):
+    hits = main.PLAN_CACHE.hits
+    text = "nodes:\n" + READ + "  h: {function: DataFrame.head, params: {self: r, n: 1}}\n"
+    reformatted = "nodes:\n" + READ + "  h:  {params: {n: 1, self: r},  function: DataFrame.head}\n\n"
+    for yaml_text in (text, text, reformatted):
+        r = run(yaml_text)
+        assert r.status_code == 200 and r.json()["total_rows"] == 1, r.text
+    assert main.PLAN_CACHE.hits == hits + 1
+    # Same spec, different text: parsed again, compiled once
+    assert main.compile_pipeline(text)[1] is main.compile_pipeline(reformatted)[1]
+
+
+def test_node_order_is_part_of_the_plan_key(run):
+    x = "  x: {function: DataFrame.head, params: {self: r, n: 1}}\n"
+    y = "  y: {function: DataFrame.head, params: {self: r, n: 2}}\n"
+    # With no preview_node or outputs the last node in the YAML is the result
+    assert run("nodes:\n" + READ + x + y).json()["total_rows"] == 2
+    assert run("nodes:\n" + READ + y + x).json()["total_rows"] == 1
+
+
+def test_invalid_pipelines_are_not_cached(run):
+    for _ in range(2):
+        r = run("nodes: [")
+        assert r.status_code == 400 and "Invalid YAML" in r.json()["detail"]
+    assert main.PLAN_CACHE.stats()["entries"] == 0
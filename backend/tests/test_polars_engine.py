@@ -0,0 +1,117 @@
+"""pandas vs `engine: polars` on the cases where Polars and pandas semantics part ways."""
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+pytest.importorskip("polars")
+
+from test_duckdb_engine import READ, SNIFF, TIES, check
+
+
+def polars(run, nodes: str, csv: str):
+    return check(run, nodes, csv, engine="polars")
+
+
+@pytest.mark.parametrize("params, engine", [
+    ("by: k", "pandas"),  # quicksort ties: maintain_order doesn't reproduce them
+    ("by: k, ascending: false", "pandas"),
+    ("by: k, kind: stable", "polars"),
+    ("by: k, kind: stable, ascending: false, na_position: first", "polars"),
+    ("by: [k, j], ascending: [false, true]", "polars"),
+    ("by: v", "polars"),
+])
+def test_sort_with_ties(run, params, engine):
+    ran = polars(run, READ + f"  s: {{function: DataFrame.sort_values, params: {{self: r, {params}}}}}\n", TIES)
+    assert ran["s"] == engine
+
+
+MERGE = READ + """  q: {function: DataFrame.query, params: {self: r, expr: "v > 1"}}
+  m: {function: merge, params: {left: r, right: q, %s}}
+"""
+# Repeated keys out of order: pandas keeps left rows in order, each one's matches in right order
+MANY = "k,v,w\nb,1,x\na,2,y\nb,3,z\n,4,x\na,5,y\nb,6,\nc,7,x\n"
+
+
+@pytest.mark.parametrize("params", ['"on": k', '"on": k, how: left', "left_on: k, right_on: k, how: left",
+                                    '"on": [k, w], how: left'])
+def test_merge_row_order(run, params):
+    assert polars(run, MERGE % params, MANY)["m"] == "polars"
+
+
+def test_merge_of_int_and_float_keys(run):
+    nodes = READ + """  f: {function: DataFrame.astype, params: {self: r, dtype: {v: float}}}
+  m: {function: merge, params: {left: r, right: f, "on": v}}
+"""
+    assert polars(run, nodes, "v,w\n1,a\n2,b\n2,c\n")["m"] == "polars"
+
+
+GROUPED = "k,x,y,z\na,1,,1.5\nb,,,\n,3,4,2.5\na,2,,\nb,,5,\na,7,,0.5\n"
+
+
+@pytest.mark.parametrize("agg", [
+    "DataFrameGroupBy.sum, params: {self: g}",  # all-NaN group sums to 0; int sums stay int64
+    "DataFrameGroupBy.mean, params: {self: g}",
+    "DataFrameGroupBy.max, params: {self: g}",
+    "DataFrameGroupBy.count, params: {self: g}",
+    "DataFrameGroupBy.agg, params: {self: g, func: {x: sum, y: nunique, z: median}}",
+])
+def test_groupby_aggregations(run, agg):
+    nodes = READ + "  g: {function: DataFrame.groupby, params: {self: r, by: k}}\n" \
+        + f"  a: {{function: pandas.core.groupby.{agg}}}\n"
+    assert polars(run, nodes, GROUPED)["a"] == "polars"
+
+
+def test_integer_sum_stays_int64(run):
+    nodes = READ + """  g: {function: DataFrame.groupby, params: {self: r, by: k, as_index: false}}
+  a: {function: pandas.core.groupby.DataFrameGroupBy.sum, params: {self: g}}
+"""
+    r = run("engine: polars\ncache: false\nnodes:\n" + nodes, csv=b"k,n\na,1\nb,2\na,3\n")
+    assert r.status_code == 200, r.text
+    assert r.json()["dtypes"] == ["object", "int64"]
+
+
+@pytest.mark.parametrize("name", sorted(SNIFF))
+def test_csv_types_follow_read_csv(run, name):
+    nodes = READ + "  h: {function: DataFrame.head, params: {self: r, n: 100000}}\n"
+    assert polars(run, nodes, SNIFF[name])["r"] == "polars"
+
+
+def test_ints_with_gaps_read_as_float64(run):
+    nodes = READ + "  h: {function: DataFrame.head, params: {self: r, n: 10}}\n"
+    r = run("engine: polars\ncache: false\nnodes:\n" + nodes, csv=b"a,b,c\n1,2, 3\n,4,5 \n6,7,8\n")
+    assert r.status_code == 200, r.text
+    assert r.json()["dtypes"] == ["float64", "int64", "int64"]
+
+
+@pytest.mark.parametrize("csv", ["a\n99999999999999999999\n1\n", "a\n18446744073709551615\n1\n"])
+def test_integers_past_int64_fall_back(run, csv):
+    nodes = READ + "  h: {function: DataFrame.head, params: {self: r, n: 10}}\n"
+    assert polars(run, nodes, csv)["r"] == "pandas"
+
+
+def _parquet(run, table, nodes: str):
+    buf = io.BytesIO()
+    pq.write_table(table, buf)
+    r = run("engine: polars\nengine_check: true\ncache: false\nnodes:\n"
+            "  r: {function: read_parquet, params: {path: data.parquet}}\n" + nodes,
+            csv=buf.getvalue(), filename="data.parquet")
+    assert r.status_code == 200, r.text
+    report = r.json()["engine"]
+    assert report["check"] == {"match": True, "mismatches": {}}
+    return r.json()["dtypes"], {nid: n["engine"] for nid, n in report["nodes"].items()}
+
+
+def test_parquet_ints_with_gaps_read_as_float64(run):
+    table = pa.table({"a": pa.array([1, None, 3], pa.int64()), "b": pa.array([1, 2, 3], pa.int64())})
+    dtypes, ran = _parquet(run, table, "  h: {function: DataFrame.head, params: {self: r, n: 10}}\n")
+    assert dtypes == ["float64", "int64"] and ran == {"r": "polars", "h": "polars"}
+
+
+def test_parquet_pandas_extension_dtypes_stay_in_pandas(run):
+    df = pd.DataFrame({"a": pd.array([1, None, 3], dtype="Int64"), "b": pd.Categorical(["x", "y", "x"])})
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    dtypes, ran = _parquet(run, table, "  h: {function: DataFrame.head, params: {self: r, n: 10}}\n")
+    assert dtypes == ["Int64", "category"] and ran == {"r": "pandas", "h": "pandas"}
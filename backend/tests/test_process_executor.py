@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+import process_executor
+
+
+def _passthrough(node_id, node_def, executed, uploaded):
+    return executed["src"]
+
+
+def _mixed(node_id, node_def, executed, uploaded):
+    return pd.DataFrame({"mixed": ["a", 1, 2.5, None]})
+
+
+def _execute(fn, executed):
+    run = process_executor.ProcessRun()
+    try:
+        return run.execute(fn, "n", {"function": "tests.fn"}, sorted(executed), executed)
+    finally:
+        run.close()
+
+
+def test_frames_round_trip_through_arrow():
+    df = pd.DataFrame({"a": np.arange(5), "b": list("vwxyz")}, index=list("pqrst"))
+    out = _execute(_passthrough, {"src": df})
+    pd.testing.assert_frame_equal(out, df)
+    out.loc["p", "a"] = 99  # arrays come back writable
+    assert df.loc["p", "a"] == 0
+
+
+def test_unconvertible_inputs_and_results_are_pickled():
+    mixed = pd.DataFrame({"mixed": ["a", 1, 2.5, None]})
+    assert process_executor.write_arrow(mixed) is None
+    assert _execute(_passthrough, {"src": mixed})["mixed"].tolist() == ["a", 1, 2.5, None]
+    assert _execute(_mixed, {})["mixed"].tolist() == ["a", 1, 2.5, None]
+
+
+DUPLICATE_COLUMNS = """
+cache: false
+nodes:
+  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}
+  c: {function: concat, params: {objs: [r, r], axis: 1}}
+  h: {function: DataFrame.head, params: {self: c, n: 2}, executor: %s}
+"""
+
+
+def test_duplicate_columns_cross_to_worker_processes(run):
+    thread = run(DUPLICATE_COLUMNS % "thread")
+    process = run(DUPLICATE_COLUMNS % "process")
+    assert thread.status_code == process.status_code == 200, process.text
+    assert process.json()["columns"] == ["a", "b", "c"] * 2
+    assert process.json()["rows"] == thread.json()["rows"]
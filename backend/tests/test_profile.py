@@ -0,0 +1,29 @@
+READ = "  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+BRANCHES = "nodes:\n" + READ + """  slow: {function: tests.slow, params: {self: r, seconds: 0.3}}
+  fast: {function: DataFrame.head, params: {self: r, n: 2}}
+  m: {function: merge, params: {left: slow, right: fast, "on": a}}
+"""
+
+
+def test_profile_reports_every_node_and_the_critical_path(run, slow_function):
+    r = run(BRANCHES, profile="true")
+    assert r.status_code == 200, r.text
+    profile = r.json()["profile"]
+    nodes = profile["nodes"]
+    assert list(nodes) == ["r", "slow", "fast", "m"]
+    assert profile["critical_path"] == ["r", "slow", "m"]
+    assert nodes["slow"]["wall_s"] >= 0.3 and profile["critical_path_s"] >= 0.3
+    assert (nodes["r"]["rows_out"], nodes["r"]["cols_out"]) == (3, 3)
+    assert nodes["m"]["inputs"] == {"fast": {"rows": 2, "cols": 3}, "slow": {"rows": 3, "cols": 3}}
+    assert {n["executor"] for n in nodes.values()} == {"thread"}
+    assert [n["cache"] for n in nodes.values()] == ["miss"] * 4
+
+
+def test_cache_hits_are_profiled_as_such(run, slow_function):
+    run(BRANCHES)
+    nodes = run(BRANCHES, profile="true").json()["profile"]["nodes"]
+    assert nodes["m"]["executor"] == "cache" and nodes["m"]["cache"] == "hit"
+
+
+def test_profile_is_opt_in(run):
+    assert "profile" not in run("nodes:\n" + READ).json()
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+READ = "  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+CSV = b"a,b,c,d\n" + b"".join(b"%d,%s,%d.5,%d\n" % (i, b"xyz"[i % 3:i % 3 + 1], i, i % 4) for i in range(30))
+
+
+def explain(client, nodes: str) -> dict:
+    r = client.post("/pipeline/explain", data={"yaml": "nodes:\n" + nodes})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def same_as_without_pushdown(run, nodes: str, csv=CSV, **fields) -> dict:
+    pushed = run("nodes:\n" + nodes, csv=csv, **fields)
+    plain = run("pushdown: false\ncache: false\nnodes:\n" + nodes, csv=csv, **fields)
+    assert pushed.status_code == plain.status_code == 200, pushed.text
+    assert pushed.json()["outputs"] == plain.json()["outputs"]
+    return pushed.json()
+
+
+SELECT = "  s: {function: DataFrame.get, params: {self: r, key: [c, a]}}\n"
+
+
+@pytest.mark.parametrize("nodes, projection", [
+    (SELECT, ["a", "c"]),
+    (SELECT + "  t: {function: DataFrame.loc, params: {self: r, rows: ':', cols: [b]}}\n", ["a", "b", "c"]),
+    (SELECT + "  t: {function: DataFrame.filter, params: {self: r, items: [d]}}\n", ["a", "c", "d"]),
+    # Every column is needed by describe: nothing is pushed
+    (SELECT + "  t: {function: DataFrame.describe, params: {self: r}}\n", None),
+])
+def test_reads_load_only_the_columns_consumers_select(client, run, nodes, projection):
+    assert explain(client, READ + nodes)["projection"] == ({"r": projection} if projection else {})
+    outputs = "s,t" if "  t:" in nodes else "s"
+    body = same_as_without_pushdown(run, READ + nodes, outputs=outputs, profile="true")
+    assert body["profile"]["nodes"]["r"].get("columns_read") == projection
+
+
+def test_selecting_a_missing_column_behaves_like_the_full_read(run):
+    body = same_as_without_pushdown(run, READ + "  s: {function: DataFrame.get, params: {self: r, key: [a, nope]}}\n",
+                                    outputs="s")
+    assert body["outputs"]["s"]["rows"] == [["None"]]
+
+
+PARQUET_READ = "  r: {function: read_parquet, params: {path: '%s'}}\n"
+FILTERED = """  q: {function: DataFrame.query, params: {self: r, expr: "v >= 25 and k != 'b'"}}
+  i: {function: DataFrame.reset_index, params: {self: q}}
+"""
+
+
+@pytest.fixture
+def row_groups(tmp_path):
+    df = pd.DataFrame({"v": range(40), "k": [("a", "b")[i % 2] for i in range(40)]})
+    path = tmp_path / "rows.parquet"
+    df.to_parquet(path, row_group_size=10)
+    return PARQUET_READ % path
+
+
+def test_query_filters_skip_parquet_row_groups(client, run, row_groups):
+    nodes = row_groups + FILTERED
+    # != keeps its null semantics in the query only
+    assert explain(client, nodes)["predicates"] == {"r": [[["v", ">=", 25]]]}
+    body = same_as_without_pushdown(run, nodes, csv=None, outputs="i", profile="true")
+    # Row groups 0-1 can't match; the survivors keep the labels a full read gives them
+    assert body["profile"]["nodes"]["r"]["rows_out"] == 20
+    assert body["outputs"]["i"]["rows"][0] == ["26", "26", "a"]
@@ -0,0 +1,78 @@
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+GAPS = b"a,b,c\n5,x,1.5\n,,\n7,z,2.5\n"
+READ = """
+nodes:
+  r:
+    function: read_csv
+    ingest: %s
+    params: {filepath_or_buffer: data.csv}
+"""
+
+
+@pytest.mark.parametrize("ingest", ["arrow", "numpy"])
+def test_missing_cells_are_null_and_ints_stay_ints(run, ingest):
+    body = run(READ % ingest, csv=GAPS).json()
+    assert body["rows"] == [["5", "x", "1.5"], [None, None, None], ["7", "z", "2.5"]] if ingest == "arrow" \
+        else body["rows"] == [["5.0", "x", "1.5"], [None, None, None], ["7.0", "z", "2.5"]]
+
+
+def test_series_cells_are_formatted_per_value(run):
+    nodes = READ % "arrow" + "  s: {function: DataFrame.__getitem__, params: {self: r, key: a}}\n"
+    body = run(nodes, csv=GAPS, preview_node="s").json()
+    assert body["rows"] == [["5"], [None], ["7"]]
+
+
+@pytest.mark.parametrize("ingest", ["arrow", "numpy"])
+def test_streamed_json_body_matches(run, ingest):
+    whole = run(READ % ingest, csv=GAPS).json()
+    streamed = run(READ % ingest, csv=GAPS, stream="true").json()
+    assert streamed["rows"] == whole["rows"] and streamed["total_rows"] == 3
+
+
+def test_window_pages_with_whole_result_totals(run):
+    body = run(READ % "numpy", csv=GAPS, offset="1", limit="1", columns="c,a").json()
+    assert body["columns"] == ["c", "a"] and body["rows"] == [[None, None]]
+    assert (body["offset"], body["total_rows"], body["total_columns"]) == (1, 3, 3)
+
+
+GROUPED = READ % "numpy" + """  g: {function: DataFrame.groupby, params: {self: r, by: b}}
+  s: {function: pandas.core.groupby.DataFrameGroupBy.sum, params: {self: g}}
+"""
+EXPECTED = pd.read_csv(io.BytesIO(GAPS)).groupby("b").sum()
+
+
+@pytest.mark.parametrize("fields, headers, media", [
+    ({"format": "arrow"}, {}, "application/vnd.apache.arrow.stream"),
+    ({"format": "parquet"}, {}, "application/vnd.apache.parquet"),
+    ({}, {"Accept": "text/html, application/vnd.apache.arrow.stream;q=0.9"}, "application/vnd.apache.arrow.stream"),
+    ({}, {"Accept": "application/x-parquet"}, "application/vnd.apache.parquet"),
+])
+def test_binary_formats_keep_dtypes_and_index(client, fields, headers, media):
+    r = client.post("/pipeline/run", data={"yaml": GROUPED, **fields}, headers=headers,
+                    files={"file": ("data.csv", GAPS)})
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"] == media
+    got = pa.ipc.open_stream(r.content).read_pandas() if "arrow" in media else pd.read_parquet(io.BytesIO(r.content))
+    pd.testing.assert_frame_equal(got, EXPECTED)
+
+
+def test_ndjson_is_one_record_per_row(run):
+    r = run(READ % "numpy", csv=GAPS, format="ndjson")
+    assert r.status_code == 200 and r.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert records == [{"a": 5.0, "b": "x", "c": 1.5}, {"a": None, "b": None, "c": None}, {"a": 7.0, "b": "z", "c": 2.5}]
+
+
+def test_json_stays_the_default_and_unknown_formats_are_rejected(run):
+    assert run(READ % "numpy", csv=GAPS).headers["content-type"] == "application/json"
+    r = run(READ % "numpy", csv=GAPS, format="xml")
+    assert r.status_code == 400 and "'format' must be one of" in r.json()["detail"]
+    r = run(GROUPED + "  t: {function: DataFrame.head, params: {self: r}}\n", csv=GAPS, format="arrow",
+            outputs="s,t")
+    assert r.status_code == 400 and "format arrow returns one result" in r.json()["detail"]
@@ -0,0 +1,68 @@
+import gc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+import node_cache
+import spill
+
+READ = "  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+SMALL = pd.DataFrame({"a": [1]})
+
+
+def test_spilling_releases_memory(tmp_path):
+    results = spill.SpillingResults(tmp_path, threshold_bytes=1 << 20)
+    results["big"] = pd.DataFrame({f"c{i}": np.arange(2_000_000, dtype="float64") + i for i in range(5)})
+    size = results.resident_bytes
+    gc.collect()
+    before = main.current_rss()
+    results["small"] = SMALL
+    gc.collect()
+    assert results.spill_count == 1
+    after = main.current_rss()
+    assert before - after > size // 2
+    # Read back as views of the mapped file: pages only come in as they're touched
+    back = results["big"]
+    assert main.current_rss() - after < size // 2
+    assert back["c4"].iloc[-1] == 2_000_003
+    results.close()
+
+
+def test_results_a_cache_holds_are_not_spilled(tmp_path):
+    # The cache entry keeps the same buffers alive: spilling would only add a file
+    df = pd.DataFrame({"a": np.arange(100_000)})
+    node_cache.NODE_CACHE.put("held", df)
+    results = spill.SpillingResults(tmp_path, threshold_bytes=1)
+    results["held"] = df
+    results["hit"] = node_cache.NODE_CACHE.get("held")
+    results["free"] = df + 1
+    results["small"] = SMALL
+    assert results.spill_count == 1 and "free" in results._spilled
+    results.close()
+
+
+def test_spilled_results_are_writable_copies_of_the_mapping(tmp_path):
+    results = spill.SpillingResults(tmp_path, threshold_bytes=1)
+    results["df"] = pd.DataFrame({"a": np.arange(10)})
+    results["small"] = SMALL
+    assert results.spill_count == 1
+    df = results["df"]
+    df.clip(lower=3, inplace=True)
+    df.loc[9, "a"] = -1
+    assert df["a"].tolist()[:4] == [3, 3, 3, 3] and df["a"].iloc[-1] == -1
+    assert results["df"]["a"].tolist() == list(range(10))
+    results.close()
+
+
+def test_in_place_node_on_a_spilled_result(run, monkeypatch):
+    monkeypatch.setattr(spill, "SPILL_THRESHOLD_BYTES", 1)
+    # q is spilled once h is stored, then clipped in place; the parsed upload r is never spilled
+    nodes = READ + """  q: {function: DataFrame.query, params: {self: r, expr: "a > 0"}}
+  h: {function: DataFrame.max, params: {self: q}}
+  c: {function: DataFrame.clip, params: {self: q, upper: h, axis: 1, inplace: true}}
+"""
+    r = run("cache: false\nnodes:\n" + nodes, csv=b"a,b\n1,5\n4,2\n", preview_node="c")
+    assert r.status_code == 200, r.text
+    assert r.json()["spill"]["spilled"] >= 1
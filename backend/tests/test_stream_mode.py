@@ -0,0 +1,58 @@
+import pytest
+
+READ = "  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+ROWS = b"k,v\n" + b"".join(b"%d,%s\n" % (i % 4, b"" if i % 5 == 0 else b"%d" % i) for i in range(40))
+ROW_LOCAL = READ + """  q: {function: DataFrame.query, params: {self: r, expr: "k != 1"}}
+  d: {function: DataFrame.dropna, params: {self: q}}
+  n: {function: DataFrame.rename, params: {self: d, columns: {v: value}}}
+"""
+
+
+def explain(client, yaml_text: str):
+    r = client.post("/pipeline/explain", data={"yaml": yaml_text})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+@pytest.mark.parametrize("nodes", [
+    ROW_LOCAL,
+    ROW_LOCAL + "  h: {function: DataFrame.iloc, params: {self: n, rows: '0:7'}}\n",
+    # Blocking: the stream is collected into one frame for the sort
+    ROW_LOCAL + "  s: {function: DataFrame.sort_values, params: {self: n, by: value, kind: stable}}\n",
+    # Merges renumber their rows and categories depend on every row: both materialize
+    ROW_LOCAL + """  l: {function: read_csv, params: {filepath_or_buffer: data.csv}}
+  u: {function: DataFrame.drop_duplicates, params: {self: l, subset: k}}
+  m: {function: merge, params: {left: n, right: u, "on": k}}
+  i: {function: DataFrame.reset_index, params: {self: m}}
+""",
+    ROW_LOCAL + "  c: {function: DataFrame.astype, params: {self: n, dtype: {k: category}}}\n",
+])
+def test_streamed_run_matches_whole_run(run, nodes):
+    whole = run("cache: false\nnodes:\n" + nodes, csv=ROWS)
+    streamed = run("cache: false\nmode: stream\nchunksize: 3\nnodes:\n" + nodes, csv=ROWS)
+    assert whole.status_code == streamed.status_code == 200, streamed.text
+    for key in ("columns", "rows", "dtypes", "total_rows"):
+        assert streamed.json()[key] == whole.json()[key]
+
+
+def test_explain_shows_where_the_stream_materializes(client):
+    nodes = ROW_LOCAL + "  g: {function: DataFrame.groupby, params: {self: n, by: k}}\n"
+    stream = explain(client, "mode: stream\nchunksize: 5\nnodes:\n" + nodes)["stream"]
+    assert stream["chunksize"] == 5
+    assert stream["streamed"] == ["r", "q", "d", "n"]
+    assert [m["node"] for m in stream["materialized"]] == ["g"]
+
+
+def test_only_casts_to_category_stop_the_stream(client):
+    nodes = ROW_LOCAL + """  f: {function: DataFrame.astype, params: {self: n, dtype: float}}
+  c: {function: DataFrame.astype, params: {self: f, dtype: category}}
+"""
+    stream = explain(client, "mode: stream\nnodes:\n" + nodes)["stream"]
+    assert stream["streamed"] == ["r", "q", "d", "n", "f"]
+    assert [m["node"] for m in stream["materialized"]] == ["c"]
+
+
+def test_blocking_nodes_can_be_rejected(run):
+    nodes = ROW_LOCAL + "  s: {function: DataFrame.sort_values, params: {self: n, by: value}}\n"
+    r = run("mode: stream\nstream_blocking: reject\nnodes:\n" + nodes, csv=ROWS)
+    assert r.status_code == 400 and "Streaming rejected at node 's'" in r.json()["detail"]
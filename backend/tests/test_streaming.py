@@ -0,0 +1,74 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import main
+import result_formats
+from conftest import CSV
+
+READ = "  r: {function: read_csv, params: {filepath_or_buffer: data.csv}}\n"
+ROWS = b"k,v\n" + b"".join(b"%d,%d\n" % (i % 3, i) for i in range(50))
+
+
+def _decode(body: bytes, fmt: str) -> pd.DataFrame:
+    return pa.ipc.open_stream(body).read_pandas() if fmt == "arrow" else pq.read_table(io.BytesIO(body)).to_pandas()
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+@pytest.mark.parametrize("yaml_text, fields", [
+    ("nodes:\n" + READ, {"offset": "3"}),
+    ("nodes:\n" + READ + "  g: {function: DataFrame.groupby, params: {self: r, by: v}}\n"
+     "  s: {function: pandas.core.groupby.DataFrameGroupBy.sum, params: {self: g}}\n", {}),
+    # The first chunk keeps every row, later ones don't: labels still have to survive
+    ("mode: stream\nchunksize: 3\nnodes:\n" + READ
+     + "  q: {function: DataFrame.query, params: {self: r, expr: 'v != 4'}}\n", {}),
+])
+def test_streamed_body_decodes_like_the_encoded_one(run, monkeypatch, fmt, yaml_text, fields):
+    monkeypatch.setattr(result_formats, "STREAM_RESPONSE_ROWS", 2)
+    whole = run(yaml_text, csv=ROWS, format=fmt, **fields)
+    streamed = run(yaml_text, csv=ROWS, format=fmt, stream="true", **fields)
+    assert whole.status_code == streamed.status_code == 200, streamed.text
+    expected, got = _decode(whole.content, fmt), _decode(streamed.content, fmt)
+    pd.testing.assert_frame_equal(got, expected, check_index_type=False)
+
+
+def _streaming_job(job_id=None) -> main.PipelineJob:
+    request = {"raw_yaml": "mode: stream\nchunksize: 1\nnodes:\n" + READ, "uploaded_bytes": ROWS,
+               "result_format": "ndjson", "stream_response": True}
+    job = main.submit_job(request, job_id, kept=False)
+    job.ready.result(20)
+    return job
+
+
+def test_streamed_run_holds_its_job_until_drained():
+    job = _streaming_job()
+    pieces = iter(job.result)
+    first = next(pieces)
+    assert first.startswith(b'{"k":0,"v":0}')
+    # Encoding happens on the job's pool thread, a few pieces ahead of the response
+    assert job.status == "running" and not job.future.done()
+    rest = b"".join(pieces)
+    job.future.result(20)
+    assert job.status == "succeeded"
+    assert (first + rest).count(b"\n") == 50
+
+
+def test_delete_stops_a_streamed_run(client):
+    job = _streaming_job("streaming-run")
+    pieces = iter(job.result)
+    next(pieces)
+    assert client.delete("/pipeline/jobs/streaming-run").status_code == 200
+    with pytest.raises(main.RunInterrupted):
+        for _ in pieces:
+            pass
+    job.future.result(20)
+    assert job.status == "cancelled"
+
+
+def test_streamed_run_is_listed_until_its_body_is_sent(client, run):
+    r = run("mode: stream\nnodes:\n" + READ, csv=CSV, stream="true", run_id="listed-run")
+    assert r.status_code == 200 and r.json()["total_rows"] == 3
+    assert client.get("/pipeline/jobs/listed-run").status_code == 404
@@ -0,0 +1,38 @@
+import threading
+import time
+
+import node_cache
+from conftest import SLOW
+
+
+def test_timeout_kills_the_worker_of_its_own_node(run, slow_function):
+    t0 = time.monotonic()
+    r = run(SLOW % (30, "    timeout_s: 0.5"))
+    assert time.monotonic() - t0 < 10
+    assert r.status_code == 504, r.text
+    assert "exceeded timeout_s" in r.json()["detail"]
+    # The killed worker's pool was retired; a fresh one serves the next run
+    assert run(SLOW % (0, "    timeout_s: 5")).status_code == 200
+
+
+def test_timeout_does_not_fail_other_runs_process_nodes(run, slow_function):
+    bystander = {}
+
+    def other():
+        bystander["r"] = run(SLOW % (2, "    executor: process") + "cache: false\n")
+
+    t = threading.Thread(target=other)
+    t.start()
+    time.sleep(0.5)
+    r = run(SLOW % (30, "    timeout_s: 0.3") + "cache: false\n")
+    assert r.status_code == 504, r.text
+    t.join(30)
+    assert bystander["r"].status_code == 200, bystander["r"].text
+
+
+def test_abandoned_thread_node_is_not_cached(run, slow_function):
+    r = run(SLOW % (1.5, "    timeout_s: 0.3\n    executor: thread"))
+    assert r.status_code == 504, r.text
+    entries = node_cache.NODE_CACHE.stats()["entries"]
+    time.sleep(2)  # the abandoned thread finishes its node
+    assert node_cache.NODE_CACHE.stats()["entries"] == entries
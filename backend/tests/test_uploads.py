@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+import uploads
+
+from conftest import CSV
+
+SHARED_READ = """
+nodes:
+  r:
+    function: read_csv
+    params: {filepath_or_buffer: data.csv}
+%s
+cache: false
+"""
+
+
+def _upload(client, name="data.csv", data=CSV):
+    r = client.post("/files/upload", files={"file": (name, data)})
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_mutating_run_does_not_change_shared_parse(client):
+    up = _upload(client)
+    mutate = SHARED_READ % """  ins:
+    function: DataFrame.insert
+    params: {self: r, loc: 0, column: extra, value: 7}
+  fill:
+    function: DataFrame.fillna
+    params: {self: r, value: 0, inplace: true}"""
+    first = client.post("/pipeline/run", data={"yaml": mutate, "upload_id": up["id"], "outputs": "ins,fill"})
+    assert first.status_code == 200, first.text
+
+    second = client.post("/pipeline/run", data={"yaml": SHARED_READ % "", "upload_id": up["id"]})
+    assert second.status_code == 200, second.text
+    assert second.json()["columns"] == ["a", "b", "c"]
+    assert uploads.PARSED_UPLOADS.hits >= 1
+
+
+def test_parse_cache_copies_are_independent():
+    key = "k"
+    first = uploads.get_or_parse(key, lambda: __import__("pandas").DataFrame({"a": [1, 2]}))
+    first.loc[0, "a"] = 9
+    second = uploads.get_or_parse(key, lambda: None)
+    assert second["a"].tolist() == [1, 2]
+
+
+READ_SOURCE = 'nodes:\n  r: {function: read_csv, params: {filepath_or_buffer: "%s"}}\n'
+
+
+def _converted(client, name="sales.csv", data=CSV):
+    up = _upload(client, name, data)
+    deadline = time.monotonic() + 20
+    while up["columnar"]["status"] == "pending" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        up = client.get(f"/files/{up['id']}").json()
+    assert up["columnar"]["status"] == "ready", up
+    return up
+
+
+@pytest.mark.parametrize("ref", ["saved:sales.csv", "id"])
+def test_read_node_names_a_saved_upload(client, run, ref):
+    up = _converted(client)
+    source = up["source"] if ref == "id" else ref
+    r = run(READ_SOURCE % source, csv=None)
+    assert r.status_code == 200, r.text
+    assert r.json()["columns"] == ["a", "b", "c"] and r.json()["total_rows"] == 3
+
+
+def test_bare_filename_is_not_a_saved_upload(client, run):
+    _converted(client)
+    r = run(READ_SOURCE % "sales.csv", csv=None)
+    assert r.status_code != 200
+    r = run(READ_SOURCE % "saved:missing.csv", csv=None)
+    assert r.status_code != 200 and "Unknown or modified upload" in r.text
+
+
+def test_arrow_ingest_reads_saved_uploads_like_the_upload_itself(client, run):
+    dated = b"a,d\n1,2024-01-02\n2,2024-01-03\n"
+    _converted(client, "dated.csv", dated)
+    ingest = READ_SOURCE.replace("read_csv,", "read_csv, ingest: arrow,")
+    saved = run(ingest % "saved:dated.csv", csv=None)
+    uploaded = run(ingest % "data.csv", csv=dated)
+    assert saved.status_code == uploaded.status_code == 200, saved.text
+    assert saved.json()["dtypes"] == uploaded.json()["dtypes"] == ["int64[pyarrow]", "date32[day][pyarrow]"]
@@ -0,0 +1,296 @@
+# uploads.py
+"""
+Uploaded files, addressed by content.
+
+- UploadRegistry: manifest of files saved by /files/upload, keyed by sha256,
+  so a pipeline run can name an earlier upload (`upload_id`) instead of
+  re-sending its bytes.
+- PARSED_UPLOADS: bounded cache of DataFrames parsed from upload bytes, keyed
+  by digest + read function + read options; every read node of every run
+  that asks for the same parse shares its data, each through its own
+  detached copy (see node_cache.detach).
+- Columnar copies: CSV/TSV/xlsx uploads are converted to Parquet in the
+  background (row groups + statistics) next to the original; read nodes that
+  name the upload (`saved:<filename>` or `saved:<id>`) load the Parquet copy
+  when their options allow it. A bare filename stays a path on the server.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from node_cache import NodeResultCache, is_missing
+import pushdown
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # optional: without it uploads simply stay row-oriented
+    pa = pq = None
+
+UPLOAD_CACHE_MAX_BYTES = int(os.getenv("PIPELINE_UPLOAD_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PARQUET_ROW_GROUP_ROWS = int(os.getenv("PIPELINE_PARQUET_ROW_GROUP_ROWS", "131072"))
+CONVERT_WORKERS = int(os.getenv("PIPELINE_CONVERT_WORKERS", "1"))
+
+# Upload suffix -> (reader family, options the conversion parsed with)
+_COLUMNAR_SOURCES = {
+    ".csv": ("csv", {"sep": ","}),
+    ".tsv": ("csv", {"sep": "\t"}),
+    ".xlsx": ("excel", {}),
+}
+_READER_FAMILY = {"read_csv": "csv", "read_table": "csv", "read_excel": "excel"}
+
+# Read node sources that name a saved upload rather than a path
+SAVED_PREFIX = "saved:"
+
+# Reader options that return an iterator rather than a frame
+_STREAMING_READ_PARAMS = ("chunksize", "iterator")
+
+
+def digest_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_saved_ref(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(SAVED_PREFIX)
+
+
+# ---------------- registry ----------------
+
+class UploadRegistry:
+    """
+    digest -> {id, digest, filename, path, size, mtime_ns}, persisted next to
+    the files. An entry whose file was overwritten or removed since it was
+    registered no longer resolves.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._manifest = root / ".uploads.json"
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self._manifest.read_text())
+            except Exception:
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        tmp = self._manifest.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._entries, indent=1))
+        os.replace(tmp, self._manifest)
+
+    def register(self, filename: str, path: Path, data: bytes) -> Dict[str, Any]:
+        digest = digest_bytes(data)
+        st = path.stat()
+        entry = {
+            "id": digest[:16],
+            "digest": digest,
+            "filename": filename,
+            "path": str(path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        with self._lock:
+            entries = self._load()
+            # Same name, new content: the old digest no longer has a file behind it
+            for d in [d for d, e in entries.items() if e["path"] == entry["path"] and d != digest]:
+                del entries[d]
+            entries[digest] = entry
+            self._save()
+        return entry
+
+    def lookup(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Entry for a full digest or its 16-char id, if the file is still intact."""
+        ref = (ref or "").strip().lower()
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(ref)
+            if entry is None and len(ref) == 16:
+                entry = next((e for e in entries.values() if e["id"] == ref), None)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(entry["path"])
+        except OSError:
+            return None
+        if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime_ns"]:
+            return None
+        return entry
+
+    def by_source(self, value: Any) -> Optional[Dict[str, Any]]:
+        """Upload a read node names as `saved:<filename>` or `saved:<id>`; None for any other source."""
+        if not is_saved_ref(value):
+            return None
+        ref = value[len(SAVED_PREFIX):].strip()
+        with self._lock:
+            entry = next((e for e in self._load().values() if e["filename"] == ref), None)
+        return self.lookup(entry["digest"] if entry else ref)
+
+    # -------- columnar conversion --------
+
+    def _set_columnar(self, digest: str, info: Dict[str, Any]):
+        with self._lock:
+            entry = self._load().get(digest)
+            if entry is not None:
+                entry["columnar"] = info
+                self._save()
+
+    def convert_async(self, digest: str) -> Dict[str, Any]:
+        """Queue a Parquet conversion; returns the initial status."""
+        entry = self.lookup(digest)
+        source = _COLUMNAR_SOURCES.get(Path(entry["filename"]).suffix.lower()) if entry else None
+        if source is None or pq is None:
+            info = {"status": "unsupported"}
+        else:
+            info = {"status": "pending", "family": source[0], **source[1]}
+            _convert_pool().submit(self._convert, digest)
+        self._set_columnar(digest, info)
+        return info
+
+    def resume_pending(self):
+        """Re-queue conversions a restart interrupted."""
+        with self._lock:
+            pending = [d for d, e in self._load().items() if (e.get("columnar") or {}).get("status") == "pending"]
+        for digest in pending:
+            self.convert_async(digest)
+
+    def _convert(self, digest: str):
+        entry = self.lookup(digest)
+        if entry is None:
+            return  # replaced or deleted while queued
+        family, options = _COLUMNAR_SOURCES[Path(entry["filename"]).suffix.lower()]
+        dest = Path(entry["path"] + ".parquet")
+        tmp = dest.with_name(f".{dest.name}.{digest[:8]}.tmp")
+        try:
+            # Parsed by pandas itself so the copy reads back exactly as read_csv/read_excel would
+            if family == "csv":
+                df = pd.read_csv(entry["path"], **options)
+            else:
+                df = pd.read_excel(entry["path"], engine=_excel_engine())
+            table = pa.Table.from_pandas(df)
+            pq.write_table(table, tmp, row_group_size=PARQUET_ROW_GROUP_ROWS, write_statistics=True)
+            if self.lookup(digest) is None:
+                tmp.unlink()
+                return
+            os.replace(tmp, dest)
+            info = {"status": "ready", "family": family, **options, "path": str(dest),
+                    "rows": table.num_rows, "row_groups": pq.ParquetFile(dest).num_row_groups}
+        except Exception as e:
+            tmp.unlink(missing_ok=True)
+            info = {"status": "failed", "family": family, **options, "error": f"{e.__class__.__name__}: {e}"}
+        self._set_columnar(digest, info)
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _convert_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=CONVERT_WORKERS, thread_name_prefix="upload-convert")
+        return _pool
+
+
+def _excel_engine() -> Optional[str]:
+    # calamine (Rust) parses xlsx several times faster than openpyxl
+    try:
+        import python_calamine  # noqa: F401
+        return "calamine"
+    except Exception:
+        return None
+
+
+def columnar_compatible(info: Dict[str, Any], func_name: str, params: Dict[str, Any]) -> bool:
+    """True when a read node's options are exactly what the conversion parsed with."""
+    short = (func_name or "").split(".")[-1]
+    family = _READER_FAMILY.get(short)
+    if info.get("status") != "ready" or family != info.get("family"):
+        return False
+    # The copy was parsed by the default engine into numpy dtypes, so engine and
+    # dtype_backend (set by hand or by `ingest: arrow`) count as options too
+    options = {k: v for k, v in params.items() if k not in ("filepath_or_buffer", "path")}
+    if callable(options.get("usecols")):
+        options.pop("usecols")  # a projection: applied to the Parquet columns instead
+    if family == "csv":
+        default_sep = "\t" if short == "read_table" else ","
+        sep = options.pop("sep", None) or options.pop("delimiter", None) or default_sep
+        if sep != info.get("sep"):
+            return False
+    else:
+        if options.pop("sheet_name", 0) != 0:
+            return False
+    return not options
+
+
+def load_saved(entry: Dict[str, Any], func_name: str, func: Callable, params: Dict[str, Any],
+               source_arg: str = "filepath_or_buffer",
+               row_filter: Optional["pushdown.RowGroupFilter"] = None) -> Any:
+    """
+    Run a read node against a saved upload, via its Parquet copy when
+    possible; there `row_filter` skips row groups that can't match.
+    """
+    info = entry.get("columnar") or {}
+    if columnar_compatible(info, func_name, params) and os.path.exists(info["path"]):
+        path, usecols = info["path"], params.get("usecols")
+        columns = [n for n in pq.read_schema(path).names if usecols(n)] if usecols else None
+        if row_filter is not None:
+            return pushdown.read_parquet_pruned(path, row_filter, columns,
+                                                lambda: pd.read_parquet(path, columns=columns))
+        return pd.read_parquet(path, columns=columns)
+    return func(**dict(params, **{source_arg: entry["path"]}))
+
+
+# ---------------- parsed frames ----------------
+
+PARSED_UPLOADS = NodeResultCache(UPLOAD_CACHE_MAX_BYTES)
+
+_inflight: Dict[str, threading.Lock] = {}
+_inflight_lock = threading.Lock()
+
+
+def parse_key(digest: str, func_name: str, params: Dict[str, Any]) -> Optional[str]:
+    """Cache key for one parse of an upload; None when the read can't be shared."""
+    if any(params.get(p) not in (None, False) for p in _STREAMING_READ_PARAMS):
+        return None
+    options = {k: v for k, v in params.items() if k != "filepath_or_buffer"}
+    try:
+        blob = json.dumps({"digest": digest, "function": func_name, "options": options},
+                          sort_keys=True, default=repr)
+    except Exception:
+        return None
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def get_or_parse(key: str, parse: Callable[[], Any]) -> Any:
+    """
+    Cached frame for `key`, parsing at most once even when read nodes race.
+    Every caller gets its own detached copy: a node that mutates its
+    read in place doesn't change what the next run parses to.
+    """
+    value = PARSED_UPLOADS.get(key)
+    if not is_missing(value):
+        return value  # already a copy (NodeResultCache.get)
+    with _inflight_lock:
+        lock = _inflight.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            value = PARSED_UPLOADS.get(key, count=False)
+            if is_missing(value):
+                value = parse()
+                if isinstance(value, (pd.DataFrame, pd.Series)):
+                    PARSED_UPLOADS.put(key, value)
+            return value
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
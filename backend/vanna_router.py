@@ -502,6 +502,8 @@ from typing import Any, Dict, Optional, List
 from fastapi import APIRouter, HTTPException, Query, Response, Body, UploadFile, File
 import pandas as pd
 
+import metrics
+
 router = APIRouter(prefix="/vanna/v0", tags=["vanna"])
 
 __all__ = ["router", "auto_connect_from_env"]
@@ -541,13 +543,20 @@ VECTOR_STORE: Dict[str, Any] = {"name": None, "persist_directory": None}
 class MemoryCache:
     def __init__(self):
         self.cache: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
 
     def generate_id(self, question: str) -> str:
         import hashlib
         return hashlib.md5(question.encode()).hexdigest()[:8]
 
     def get(self, id: str, field: str):
-        return self.cache.get(id, {}).get(field)
+        value = self.cache.get(id, {}).get(field)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
 
     def set(self, id: str, field: str, value: Any):
         self.cache.setdefault(id, {})[field] = value
@@ -561,6 +570,9 @@ class MemoryCache:
     def delete(self, id: str):
         self.cache.pop(id, None)
 
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self.cache), "hits": self.hits, "misses": self.misses}
+
 cache = MemoryCache()
 _vn = None  # Vanna instance
 
@@ -642,6 +654,10 @@ def _build_vn():
             def extract_sql(self, llm_response: str) -> str:
                 return extract_sql(llm_response)
 
+            def submit_prompt(self, prompt, **kwargs):
+                with metrics.timed(metrics.LLM_REQUEST_SECONDS, caller="vanna", provider="vanna-cloud"):
+                    return super().submit_prompt(prompt, **kwargs)
+
         inst = MyVanna(model=os.environ["VANNA_MODEL"], api_key=os.environ["VANNA_API_KEY"])
         # Harden prompt
         inst.config.update({
@@ -690,6 +706,10 @@ def _build_vn():
         def extract_sql(self, llm_response: str) -> str:
             return extract_sql(llm_response)
 
+        def submit_prompt(self, prompt, **kwargs):
+            with metrics.timed(metrics.LLM_REQUEST_SECONDS, caller="vanna", provider="ollama"):
+                return super().submit_prompt(prompt, **kwargs)
+
     inst = MyVanna()
     # Harden prompt
     inst.config.update({
@@ -771,14 +791,15 @@ def _connect_to_data(vn) -> None:
         raise RuntimeError(
             "DATA Postgres env is incomplete. Set VANNA_DATA_PG_HOST, VANNA_DATA_PG_DB, VANNA_DATA_PG_USER, VANNA_DATA_PG_PASSWORD (and optionally VANNA_DATA_PG_PORT, VANNA_DATA_PG_SSLMODE)."
         )
-    vn.connect_to_postgres(
-        host=DATA_ENV["host"],
-        dbname=DATA_ENV["dbname"],
-        user=DATA_ENV["user"],
-        password=DATA_ENV["password"],
-        port=int(DATA_ENV["port"] or 5432),
-        sslmode=DATA_ENV["sslmode"] or "require",
-    )
+    with metrics.timed(metrics.DB_CONNECT_SECONDS, db="vanna_data"):
+        vn.connect_to_postgres(
+            host=DATA_ENV["host"],
+            dbname=DATA_ENV["dbname"],
+            user=DATA_ENV["user"],
+            password=DATA_ENV["password"],
+            port=int(DATA_ENV["port"] or 5432),
+            sslmode=DATA_ENV["sslmode"] or "require",
+        )
     try:
         vn.run_sql("SET search_path TO public, pg_catalog")
     except Exception:
@@ -807,14 +828,15 @@ def _ensure_connected_or_reconnect(vn):
             raise probe_err
         try:
             print("[Vanna] Reconnecting to DATA Postgres…")
-            vn.connect_to_postgres(
-                host=DATA_ENV["host"],
-                dbname=DATA_ENV["dbname"],
-                user=DATA_ENV["user"],
-                password=DATA_ENV["password"],
-                port=int(DATA_ENV["port"] or 5432),
-                sslmode=DATA_ENV["sslmode"] or "require",
-            )
+            with metrics.timed(metrics.DB_CONNECT_SECONDS, db="vanna_data"):
+                vn.connect_to_postgres(
+                    host=DATA_ENV["host"],
+                    dbname=DATA_ENV["dbname"],
+                    user=DATA_ENV["user"],
+                    password=DATA_ENV["password"],
+                    port=int(DATA_ENV["port"] or 5432),
+                    sslmode=DATA_ENV["sslmode"] or "require",
+                )
             try:
                 vn.run_sql("SET search_path TO public, pg_catalog")
             except Exception:
@@ -1,5 +1,5 @@
 import React, { useMemo } from "react";
-import { X, Table as TableIcon } from "lucide-react";
+import { X, Table as TableIcon, ChevronLeft, ChevronRight } from "lucide-react";
 
 interface TableModalProps {
   open: boolean;
@@ -7,7 +7,13 @@ interface TableModalProps {
   table: {
     columns?: string[];
     data?: any[][];
+    dtypes?: string[];
+    // Set when `data` is one window of a larger result (server-side paging)
+    totalRows?: number;
+    offset?: number;
   } | null;
+  pageSize?: number;
+  onPage?: (offset: number) => void;
 }
 
 function isNumberLike(v: any) {
@@ -25,15 +31,15 @@ function cellDisplay(v: any) {
   return s;
 }
 
-export function TableModal({ open, onClose, table }: TableModalProps) {
+export function TableModal({ open, onClose, table, pageSize = 200, onPage }: TableModalProps) {
   if (!open) return null;
 
   // derive a key so the modal re-mounts when dataset changes
   const remountKey = useMemo(() => {
     const cols = table?.columns?.length ?? 0;
     const rows = table?.data?.length ?? 0;
-    return `t:${cols}x${rows}`;
-  }, [table?.columns, table?.data]);
+    return `t:${cols}x${rows}@${table?.offset ?? 0}`;
+  }, [table?.columns, table?.data, table?.offset]);
 
   // Prepare data
   const columns: string[] = useMemo(() => {
@@ -43,9 +49,11 @@ export function TableModal({ open, onClose, table }: TableModalProps) {
     return Array.from({ length: first.length }, (_, i) => `col_${i + 1}`);
   }, [table?.columns, table?.data]);
 
-  const totalRows = table?.data?.length ?? 0;
-  const previewRows = Math.min(totalRows, 200);
+  const offset = table?.offset ?? 0;
+  const totalRows = table?.totalRows ?? table?.data?.length ?? 0;
+  const previewRows = Math.min(table?.data?.length ?? 0, pageSize);
   const rows = (table?.data ?? []).slice(0, previewRows);
+  const paged = onPage !== undefined && table?.totalRows !== undefined;
 
   return (
     <div className="pipeline-modal" key={remountKey}>
@@ -86,6 +94,9 @@ export function TableModal({ open, onClose, table }: TableModalProps) {
                       className="px-4 py-3 text-left font-semibold whitespace-nowrap border-b border-border/60"
                     >
                       {col}
+                      {table?.dtypes?.[i] ? (
+                        <span className="ml-2 text-xs font-normal text-muted-foreground">{table.dtypes[i]}</span>
+                      ) : null}
                     </th>
                   ))}
                 </tr>
@@ -125,7 +136,32 @@ export function TableModal({ open, onClose, table }: TableModalProps) {
 
         {/* Footer note */}
         <div className="px-6 py-3 border-t border-border/50 bg-background/80 backdrop-blur supports-[backdrop-filter]:bg-background/60">
-          {totalRows > previewRows ? (
+          {paged && totalRows > previewRows ? (
+            <div className="flex items-center justify-between">
+              <p className="text-xs text-muted-foreground">
+                Rows {(previewRows ? offset + 1 : offset).toLocaleString()}–{(offset + previewRows).toLocaleString()} of{" "}
+                {totalRows.toLocaleString()}
+              </p>
+              <div className="flex items-center gap-1">
+                <button
+                  onClick={() => onPage!(Math.max(0, offset - pageSize))}
+                  disabled={offset === 0}
+                  className="p-1 rounded hover:bg-muted/50 disabled:opacity-40"
+                  aria-label="Previous page"
+                >
+                  <ChevronLeft className="w-4 h-4" />
+                </button>
+                <button
+                  onClick={() => onPage!(offset + pageSize)}
+                  disabled={offset + previewRows >= totalRows}
+                  className="p-1 rounded hover:bg-muted/50 disabled:opacity-40"
+                  aria-label="Next page"
+                >
+                  <ChevronRight className="w-4 h-4" />
+                </button>
+              </div>
+            </div>
+          ) : totalRows > previewRows ? (
             <p className="text-xs text-muted-foreground">
               Showing first {previewRows.toLocaleString()} rows of{" "}
               {totalRows.toLocaleString()} total rows
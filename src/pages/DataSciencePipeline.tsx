@@ -16,6 +16,8 @@ import { getSelectedFile, onSelectedFile } from "@/lib/files";
 import { authFetch, getToken } from "@/lib/auth";
 
 const API_BASE = (import.meta.env.VITE_API_BASE as string) || "/api";
+// Rows per preview page; the backend only serializes this window
+const PREVIEW_PAGE_SIZE = 200;
 
 /* -------------------- helpers -------------------- */
 
@@ -186,7 +188,7 @@ export default function DataSciencePipelinePage() {
   const [selectedFile, setSelectedFile] = useState<File | null>(getSelectedFile());
 
   const [preloaded, setPreloaded] = useState<any[]>([]);
-  const [tableModal, setTableModal] = useState<{ open: boolean; table: any | null }>({
+  const [tableModal, setTableModal] = useState<{ open: boolean; table: any | null; node?: any }>({
     open: false,
     table: null,
   });
@@ -489,12 +491,14 @@ export default function DataSciencePipelinePage() {
   }
 
   /* 👉 double-click: preview */
-  async function handleNodeDoubleClick(e: any, node: any) {
+  async function handleNodeDoubleClick(e: any, node: any, offset = 0) {
     e?.stopPropagation?.();
 
     const fd = new FormData();
     fd.append("yaml", yamlText);
     fd.append("preview_node", node.id);
+    fd.append("offset", String(offset));
+    fd.append("limit", String(PREVIEW_PAGE_SIZE));
     // attach the globally-selected file if present
     if (selectedFile) fd.append("file", selectedFile, selectedFile.name);
 
@@ -525,9 +529,13 @@ export default function DataSciencePipelinePage() {
       const data = await res.json();
       setTableModal({
         open: true,
+        node,
         table: {
           columns: Array.isArray(data?.columns) ? data.columns : [],
-          data: Array.isArray(data?.rows) ? data.rows.slice(0, 200) : [],
+          data: Array.isArray(data?.rows) ? data.rows : [],
+          dtypes: Array.isArray(data?.dtypes) ? data.dtypes : undefined,
+          totalRows: typeof data?.total_rows === "number" ? data.total_rows : undefined,
+          offset: typeof data?.offset === "number" ? data.offset : offset,
         },
       });
     } catch (err: any) {
@@ -792,6 +800,12 @@ export default function DataSciencePipelinePage() {
         open={tableModal.open}
         onClose={() => setTableModal({ open: false, table: null })}
         table={tableModal.table}
+        pageSize={PREVIEW_PAGE_SIZE}
+        onPage={
+          tableModal.node
+            ? (offset: number) => handleNodeDoubleClick(null, tableModal.node, offset)
+            : undefined
+        }
       />
     </div>
   );